@@ -0,0 +1,174 @@
+"""
+Benchmark čtecích endpointů: synchronní gunicorn (WSGI) vs. ASGI režim (src.asgi).
+
+Skript spustí obě varianty serveru nad stejnou databází (DATABASE_URL),
+přihlásí se a zatíží vybrané endpointy zadaným počtem souběžných klientů.
+
+Použití (z adresáře car_reservation_backend):
+    DATABASE_URL=postgresql://... python benchmarks/asgi_vs_wsgi.py --clients 300 --duration 30
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import date, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS = {
+    'sync': ['gunicorn', 'src.main:app'],
+    'async': ['gunicorn', 'src.asgi:app', '-k', 'uvicorn.workers.UvicornWorker'],
+}
+
+
+def default_paths():
+    today = date.today()
+    return [
+        '/api/vehicles',
+        '/api/reservations',
+        f'/api/calendar?start_date={today.isoformat()}&end_date={(today + timedelta(days=30)).isoformat()}',
+        f'/api/vehicles/1/availability?start_time={today.isoformat()}T08:00:00&end_time={today.isoformat()}T17:00:00',
+    ]
+
+
+def start_server(mode, port, workers):
+    command = SERVERS[mode] + ['--workers', str(workers), '--bind', f'127.0.0.1:{port}', '--log-level', 'warning']
+    # Měří se propustnost serveru, ne limity požadavků jednoho klienta
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env={**os.environ, 'RATE_LIMIT_ENABLED': 'false'})
+
+
+def login(port, timeout=60):
+    """Čekání na start serveru a získání JWT tokenu"""
+    request = urllib.request.Request(
+        f'http://127.0.0.1:{port}/api/auth/login',
+        data=json.dumps({'intranet_id': 'admin'}).encode(),
+        headers={'Content-Type': 'application/json'},
+    )
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(request) as response:
+                return json.loads(response.read())['access_token']
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.5)
+
+
+async def client(port, token, paths, deadline, latencies, errors):
+    """Jeden keep-alive klient posílající GET požadavky dokola"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    i = 0
+    try:
+        while time.monotonic() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            started = time.perf_counter()
+            writer.write(
+                f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n'
+                f'Authorization: Bearer {token}\r\n\r\n'.encode()
+            )
+            await writer.drain()
+
+            status_line = await reader.readline()
+            if not status_line:
+                # Server zavřel spojení, otevřeme nové
+                writer.close()
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                errors.append('disconnect')
+                continue
+
+            content_length = 0
+            keep_alive = True
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                if name.lower() == 'content-length':
+                    content_length = int(value)
+                elif name.lower() == 'connection' and value.strip().lower() == 'close':
+                    keep_alive = False
+            await reader.readexactly(content_length)
+
+            if not keep_alive:
+                # Sync workery gunicornu nepodporují keep-alive
+                writer.close()
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+
+            if status_line.split()[1] != b'200':
+                errors.append(status_line.decode().strip())
+            else:
+                latencies.append(time.perf_counter() - started)
+    finally:
+        writer.close()
+
+
+async def run_load(port, token, paths, clients, duration):
+    latencies, errors = [], []
+    deadline = time.monotonic() + duration
+    await asyncio.gather(*[
+        client(port, token, paths, deadline, latencies, errors) for _ in range(clients)
+    ], return_exceptions=True)
+    return latencies, errors
+
+
+def percentile(values, pct):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def benchmark(mode, args, paths):
+    port = args.port + (0 if mode == 'sync' else 1)
+    server = start_server(mode, port, args.workers)
+    try:
+        token = login(port)
+        # Zahřátí spojení a cache dotazů
+        asyncio.run(run_load(port, token, paths, min(args.clients, 10), 2))
+        latencies, errors = asyncio.run(run_load(port, token, paths, args.clients, args.duration))
+    finally:
+        server.terminate()
+        server.wait()
+
+    return {
+        'mode': mode,
+        'requests': len(latencies),
+        'rps': len(latencies) / args.duration,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'errors': len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=['sync', 'async', 'both'], default='both')
+    parser.add_argument('--clients', type=int, default=300, help='počet souběžných klientů')
+    parser.add_argument('--duration', type=int, default=30, help='délka měření v sekundách')
+    parser.add_argument('--workers', type=int, default=4, help='počet gunicorn workerů')
+    parser.add_argument('--port', type=int, default=8100)
+    parser.add_argument('--path', action='append', dest='paths', help='měřený endpoint (lze opakovat)')
+    args = parser.parse_args()
+
+    paths = args.paths or default_paths()
+    modes = ['sync', 'async'] if args.mode == 'both' else [args.mode]
+
+    results = [benchmark(mode, args, paths) for mode in modes]
+
+    print(f'\nclients={args.clients} duration={args.duration}s workers={args.workers}')
+    print(f'{"mode":<6} {"requests":>9} {"req/s":>9} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"errors":>7}')
+    for r in results:
+        print(f'{r["mode"]:<6} {r["requests"]:>9} {r["rps"]:>9.1f} {r["p50_ms"]:>9.1f} '
+              f'{r["p95_ms"]:>9.1f} {r["p99_ms"]:>9.1f} {r["errors"]:>7}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Benchmark zálohy a obnovy databáze: původní plain SQL + gzip proti src.services.backup.
+
+Záloha se dělá z databáze v DATABASE_URL, obnova vždy do dočasné kopie,
+zdrojová databáze zůstane beze změny. U PostgreSQL se měří:
+  legacy    - pg_dump | gzip, obnova gunzip | psql (jako původní backup.sh)
+  jobs=1    - adresářový formát, pg_restore v jednom procesu
+  jobs=N    - adresářový formát, pg_restore --jobs N
+U SQLite záloha přes backup API a obnova záměnou souboru.
+
+Použití (z adresáře car_reservation_backend, nejlépe nad kopií produkčních dat):
+    DATABASE_URL=postgresql://... python benchmarks/backup_restore.py --jobs 8
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from src.services.backup import _postgres_target, create_backup, restore_backup  # noqa: E402
+
+
+def size_of(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def recreate_database(database_url, name):
+    engine = create_engine(database_url, isolation_level='AUTOCOMMIT')
+    with engine.connect() as connection:
+        connection.execute(text(f'DROP DATABASE IF EXISTS "{name}"'))
+        connection.execute(text(f'CREATE DATABASE "{name}"'))
+    engine.dispose()
+
+
+def drop_database(database_url, name):
+    engine = create_engine(database_url, isolation_level='AUTOCOMMIT')
+    with engine.connect() as connection:
+        connection.execute(text(f'DROP DATABASE IF EXISTS "{name}"'))
+    engine.dispose()
+
+
+def legacy_dump(database_url, path):
+    target, env = _postgres_target(database_url)
+    with open(path, 'wb') as output:
+        dump = subprocess.Popen(['pg_dump', '--no-owner', '--no-privileges', f'--dbname={target}'],
+                                stdout=subprocess.PIPE, env=env)
+        subprocess.run(['gzip'], stdin=dump.stdout, stdout=output, check=True)
+        dump.stdout.close()
+        if dump.wait() != 0:
+            raise RuntimeError('pg_dump selhal')
+
+
+def legacy_restore(database_url, path):
+    target, env = _postgres_target(database_url)
+    unzip = subprocess.Popen(['gunzip', '-c', path], stdout=subprocess.PIPE)
+    subprocess.run(['psql', '--quiet', '--set=ON_ERROR_STOP=1', f'--dbname={target}'],
+                   stdin=unzip.stdout, stdout=subprocess.DEVNULL, env=env, check=True)
+    unzip.stdout.close()
+    unzip.wait()
+
+
+def benchmark_postgres(database_url, workdir, jobs):
+    url = make_url(database_url)
+    scratch_name = f'{url.database}_restore_bench'
+    scratch_url = url.set(database=scratch_name).render_as_string(hide_password=False)
+    results = []
+
+    legacy_path = os.path.join(workdir, 'legacy.sql.gz')
+    _, dump_seconds = timed(legacy_dump, database_url, legacy_path)
+    recreate_database(database_url, scratch_name)
+    _, restore_seconds = timed(legacy_restore, scratch_url, legacy_path)
+    results.append(('legacy', dump_seconds, size_of(legacy_path), restore_seconds))
+
+    path, dump_seconds = timed(create_backup, database_url, workdir, jobs)
+    for restore_jobs in sorted({1, jobs}):
+        recreate_database(database_url, scratch_name)
+        restore_seconds = restore_backup(scratch_url, path, restore_jobs)
+        results.append((f'jobs={restore_jobs}', dump_seconds, size_of(path), restore_seconds))
+
+    drop_database(database_url, scratch_name)
+    return results
+
+
+def benchmark_sqlite(database_url, workdir):
+    copy_path = os.path.join(workdir, 'restored.sqlite3')
+    path, dump_seconds = timed(create_backup, database_url, workdir)
+    restore_seconds = restore_backup(f'sqlite:///{copy_path}', path)
+    return [('sqlite', dump_seconds, size_of(path), restore_seconds)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='paralelní procesy pg_dump/pg_restore')
+    args = parser.parse_args()
+
+    database_url = os.environ.get('DATABASE_URL')
+    if not database_url:
+        print('Nastavte DATABASE_URL')
+        return 1
+    if database_url.startswith('postgres://'):
+        database_url = database_url.replace('postgres://', 'postgresql://', 1)
+
+    workdir = tempfile.mkdtemp(prefix='backup-bench-')
+    try:
+        if make_url(database_url).get_backend_name() == 'postgresql':
+            results = benchmark_postgres(database_url, workdir, args.jobs)
+        else:
+            results = benchmark_sqlite(database_url, workdir)
+    finally:
+        shutil.rmtree(workdir)
+
+    print(f'\n{"variant":<9} {"dump s":>8} {"size MB":>8} {"restore s":>10}')
+    for name, dump_seconds, size, restore_seconds in results:
+        print(f'{name:<9} {dump_seconds:>8.2f} {size / 1024 / 1024:>8.1f} {restore_seconds:>10.2f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
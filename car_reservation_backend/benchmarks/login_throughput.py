@@ -0,0 +1,129 @@
+"""
+Benchmark přihlášení při ranní špičce (8:00): propustnost POST /api/auth/login.
+
+Skript spustí gunicorn nad databází z DATABASE_URL a změří tři fáze:
+  new       - každé přihlášení je nový intranet_id (založení uživatele)
+  existing  - opakovaná přihlášení již existujících uživatelů
+  race      - všichni klienti současně přihlašují tentýž nový intranet_id
+              (musí skončit bez chyb unikátního omezení)
+
+Použití (z adresáře car_reservation_backend):
+    DATABASE_URL=postgresql://... python benchmarks/login_throughput.py --clients 50 --logins 2000
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_server(port, workers):
+    command = ['gunicorn', 'src.main:app', '--workers', str(workers),
+               '--bind', f'127.0.0.1:{port}', '--log-level', 'warning']
+    # Měří se propustnost serveru, ne limity požadavků jednoho klienta
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env={**os.environ, 'RATE_LIMIT_ENABLED': 'false'})
+
+
+def post_login(port, intranet_id):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        connection.request('POST', '/api/auth/login', body=json.dumps({'intranet_id': intranet_id}),
+                           headers={'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    finally:
+        connection.close()
+
+
+def wait_for_server(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            post_login(port, 'admin')
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.5)
+
+
+def percentile(values, pct):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run_phase(name, port, intranet_ids, clients):
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def login(intranet_id):
+        started = time.perf_counter()
+        try:
+            status = post_login(port, intranet_id)
+        except OSError as e:
+            status = str(e)
+        elapsed = time.perf_counter() - started
+        with lock:
+            if status == 200:
+                latencies.append(elapsed)
+            else:
+                errors.append(status)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        list(executor.map(login, intranet_ids))
+    duration = time.perf_counter() - started
+
+    return {
+        'phase': name,
+        'logins': len(latencies),
+        'per_sec': len(latencies) / duration,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'errors': len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=50, help='počet souběžných klientů')
+    parser.add_argument('--logins', type=int, default=2000, help='počet přihlášení ve fázích new a existing')
+    parser.add_argument('--workers', type=int, default=4, help='počet gunicorn workerů')
+    parser.add_argument('--port', type=int, default=8120)
+    args = parser.parse_args()
+
+    prefix = f'bench-{uuid.uuid4().hex[:8]}'
+    new_ids = [f'{prefix}-{i}' for i in range(args.logins)]
+
+    server = start_server(args.port, args.workers)
+    try:
+        wait_for_server(args.port)
+        results = [
+            run_phase('new', args.port, new_ids, args.clients),
+            run_phase('existing', args.port, new_ids, args.clients),
+            run_phase('race', args.port, [f'{prefix}-race'] * args.clients, args.clients),
+        ]
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f'\nclients={args.clients} logins={args.logins} workers={args.workers}')
+    print(f'{"phase":<9} {"logins":>7} {"logins/s":>9} {"p50 ms":>9} {"p95 ms":>9} {"errors":>7}')
+    for r in results:
+        print(f'{r["phase"]:<9} {r["logins"]:>7} {r["per_sec"]:>9.1f} {r["p50_ms"]:>9.1f} '
+              f'{r["p95_ms"]:>9.1f} {r["errors"]:>7}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
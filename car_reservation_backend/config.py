@@ -6,7 +6,13 @@ from dotenv import load_dotenv
 load_dotenv()
 
 class Config:
-    """Základní konfigurační třída"""
+    """Základní konfigurační třída
+
+    Nastavení jednotlivých funkcí (repliky, limity, cache, fronty, archivace
+    ...) čte create_app v src/main.py přímo z prostředí, jen tam mají výchozí
+    hodnoty. Zde zůstává connection pool, který podle prostředí čte i ASGI
+    režim (src/asgi.py).
+    """
     
     # Konfigurace Flask
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
@@ -19,10 +25,15 @@ class Config:
     # Konfigurace databáze
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///car_reservation.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        'pool_pre_ping': True,
-        'pool_recycle': 300,
-    }
+    
+    # Konfigurace connection poolu (viz src/services/pool.py)
+    # DB_POOL_MODE: 'queue' (pool v aplikaci) nebo 'pgbouncer' (NullPool, pooling v PgBouncer)
+    DB_POOL_MODE = os.environ.get('DB_POOL_MODE', 'queue')
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))  # sekundy
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 300))  # sekundy
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'True').lower() == 'true'
     
     # Konfigurace CORS
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', '*').split(',')
@@ -66,6 +77,10 @@ class TestingConfig(Config):
 class ProductionConfig(Config):
     """Produkční konfigurace"""
     DEBUG = False
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    # Spojení recyklovaná po 5 minutách nepotřebují ping při každém checkoutu
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'False').lower() == 'true'
     
     # Zajištění nastavení požadovaných proměnných prostředí v produkci
     @classmethod
@@ -20,6 +20,15 @@ CREATE TABLE IF NOT EXISTS roles (
     updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Vytvoření tabulky poboček
+CREATE TABLE IF NOT EXISTS locations (
+    location_id SERIAL PRIMARY KEY,
+    name VARCHAR(255) UNIQUE NOT NULL,
+    address VARCHAR(255),
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Vytvoření tabulky uživatelů
 CREATE TABLE IF NOT EXISTS users (
     user_id SERIAL PRIMARY KEY,
@@ -30,6 +39,7 @@ CREATE TABLE IF NOT EXISTS users (
     phone_number VARCHAR(50),
     role_id INTEGER NOT NULL REFERENCES roles(role_id),
     is_active BOOLEAN NOT NULL DEFAULT TRUE,
+    location_id INTEGER REFERENCES locations(location_id),
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
@@ -53,6 +63,7 @@ CREATE TABLE IF NOT EXISTS vehicles (
     highway_vignette_expiry_date DATE,
     emission_inspection_expiry_date DATE,
     entry_permissions_notes TEXT,
+    location_id INTEGER REFERENCES locations(location_id),
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
@@ -96,7 +107,173 @@ CREATE TABLE IF NOT EXISTS damage_records (
     estimated_cost DECIMAL(10, 2),
     actual_cost DECIMAL(10, 2),
     repair_status VARCHAR(50) NOT NULL DEFAULT 'Pending',
-    photos TEXT, -- JSON řetězec cest k fotografiím
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Vytvoření tabulky fotografií poškození
+CREATE TABLE IF NOT EXISTS damage_photos (
+    photo_id SERIAL PRIMARY KEY,
+    damage_id INTEGER NOT NULL REFERENCES damage_records(damage_id) ON DELETE CASCADE,
+    path VARCHAR(512) NOT NULL,
+    sha256 VARCHAR(64),
+    size INTEGER,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_damage_photos_damage_id_path UNIQUE (damage_id, path)
+);
+
+-- Vytvoření tabulky historie tachometru (append-only)
+CREATE TABLE IF NOT EXISTS odometer_readings (
+    reading_id SERIAL PRIMARY KEY,
+    vehicle_id INTEGER NOT NULL REFERENCES vehicles(vehicle_id) ON DELETE CASCADE,
+    recorded_at TIMESTAMP NOT NULL,
+    odometer INTEGER NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_odometer_readings_vehicle_id_recorded_at UNIQUE (vehicle_id, recorded_at)
+);
+
+-- Vytvoření tabulek agregovaných nákladů vozidel (udržuje aplikace)
+CREATE TABLE IF NOT EXISTS vehicle_cost_summary (
+    vehicle_id INTEGER NOT NULL REFERENCES vehicles(vehicle_id) ON DELETE CASCADE,
+    month DATE NOT NULL,
+    service_cost DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    damage_cost DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    service_count INTEGER NOT NULL DEFAULT 0,
+    damage_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (vehicle_id, month)
+);
+
+CREATE TABLE IF NOT EXISTS vehicle_cost_totals (
+    vehicle_id INTEGER PRIMARY KEY REFERENCES vehicles(vehicle_id) ON DELETE CASCADE,
+    service_cost DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    damage_cost DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    total_cost DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    service_count INTEGER NOT NULL DEFAULT 0,
+    damage_count INTEGER NOT NULL DEFAULT 0
+);
+
+-- Vytvoření tabulky zneplatněných tokenů
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    revocation_id SERIAL PRIMARY KEY,
+    jti VARCHAR(64) UNIQUE,
+    user_id INTEGER REFERENCES users(user_id) ON DELETE CASCADE,
+    revoked_at TIMESTAMP NOT NULL,
+    expires_at TIMESTAMP NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Vytvoření logu změn pro SSE stream (plní aplikace, starší záznamy maže)
+CREATE TABLE IF NOT EXISTS change_events (
+    event_id SERIAL PRIMARY KEY,
+    entity_type VARCHAR(50) NOT NULL,
+    entity_id INTEGER NOT NULL,
+    action VARCHAR(20) NOT NULL,
+    payload TEXT NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Vytvoření tabulky tombstones smazaných řádků pro rozdílovou synchronizaci
+CREATE TABLE IF NOT EXISTS tombstones (
+    tombstone_id SERIAL PRIMARY KEY,
+    entity_type VARCHAR(50) NOT NULL,
+    entity_id INTEGER NOT NULL,
+    deleted_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Vytvoření tabulky verzí iCalendar feedů (zvyšuje aplikace při změně rezervací)
+CREATE TABLE IF NOT EXISTS calendar_feed_versions (
+    feed_type VARCHAR(20) NOT NULL,
+    entity_id INTEGER NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (feed_type, entity_id)
+);
+
+-- Vytvoření archivu starých rezervací (plní flask archive-reservations)
+CREATE TABLE IF NOT EXISTS reservations_archive (
+    reservation_id INTEGER PRIMARY KEY,
+    vehicle_id INTEGER NOT NULL REFERENCES vehicles(vehicle_id),
+    user_id INTEGER NOT NULL REFERENCES users(user_id),
+    start_time TIMESTAMP NOT NULL,
+    end_time TIMESTAMP NOT NULL,
+    purpose VARCHAR(255) NOT NULL,
+    destination VARCHAR(255) NOT NULL,
+    number_of_passengers INTEGER,
+    status VARCHAR(50) NOT NULL,
+    user_notes TEXT,
+    admin_notes TEXT,
+    created_at TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP NOT NULL,
+    archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Vytvoření auditního logu změn (append-only, zapisuje aplikace na pozadí)
+CREATE TABLE IF NOT EXISTS audit_log (
+    audit_id SERIAL PRIMARY KEY,
+    entity_type VARCHAR(50) NOT NULL,
+    entity_id INTEGER NOT NULL,
+    action VARCHAR(20) NOT NULL,
+    changes TEXT NOT NULL,
+    actor_id INTEGER,
+    changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Tabulka mail_outbox (e-maily čekající na odeslání)
+CREATE TABLE IF NOT EXISTS mail_outbox (
+    message_id SERIAL PRIMARY KEY,
+    kind VARCHAR(50) NOT NULL,
+    recipient VARCHAR(255) NOT NULL,
+    subject VARCHAR(255) NOT NULL,
+    body TEXT NOT NULL,
+    dedupe_key VARCHAR(255) UNIQUE,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    claim_token VARCHAR(36),
+    claimed_until TIMESTAMP,
+    last_error TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    sent_at TIMESTAMP
+);
+
+-- Tabulka rate_limit_buckets (sdílené limity požadavků, RATE_LIMIT_BACKEND=database)
+CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+    bucket_key VARCHAR(200) PRIMARY KEY,
+    tokens DOUBLE PRECISION NOT NULL,
+    updated_at DOUBLE PRECISION NOT NULL,
+    allowed BOOLEAN NOT NULL
+);
+
+-- Tabulka idempotency_keys (uložené odpovědi POST požadavků s Idempotency-Key)
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key_hash VARCHAR(64) PRIMARY KEY,
+    request_hash VARCHAR(64) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    response_status INTEGER,
+    response_body TEXT,
+    response_mimetype VARCHAR(100),
+    locked_until TIMESTAMP NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL
+);
+
+-- Tabulka waitlist_entries (pořadník na obsazené termíny)
+CREATE TABLE IF NOT EXISTS waitlist_entries (
+    waitlist_id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(user_id),
+    vehicle_id INTEGER REFERENCES vehicles(vehicle_id),
+    start_time TIMESTAMP NOT NULL,
+    end_time TIMESTAMP NOT NULL,
+    purpose VARCHAR(255) NOT NULL,
+    destination VARCHAR(255) NOT NULL,
+    number_of_passengers INTEGER,
+    fuel_type VARCHAR(50),
+    transmission_type VARCHAR(50),
+    user_notes TEXT,
+    status VARCHAR(50) NOT NULL DEFAULT 'Waiting',
+    reservation_id INTEGER REFERENCES reservations(reservation_id),
+    assigned_at TIMESTAMP,
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
@@ -115,12 +292,48 @@ CREATE INDEX IF NOT EXISTS idx_reservations_start_time ON reservations(start_tim
 CREATE INDEX IF NOT EXISTS idx_reservations_end_time ON reservations(end_time);
 CREATE INDEX IF NOT EXISTS idx_reservations_status ON reservations(status);
 
+CREATE INDEX IF NOT EXISTS ix_reservations_archive_vehicle_id ON reservations_archive(vehicle_id);
+CREATE INDEX IF NOT EXISTS ix_reservations_archive_user_id ON reservations_archive(user_id);
+CREATE INDEX IF NOT EXISTS ix_reservations_archive_start_time ON reservations_archive(start_time);
+CREATE INDEX IF NOT EXISTS ix_reservations_archive_end_time ON reservations_archive(end_time);
+
 CREATE INDEX IF NOT EXISTS idx_service_records_vehicle_id ON service_records(vehicle_id);
 CREATE INDEX IF NOT EXISTS idx_service_records_service_date ON service_records(service_date);
 
 CREATE INDEX IF NOT EXISTS idx_damage_records_vehicle_id ON damage_records(vehicle_id);
 CREATE INDEX IF NOT EXISTS idx_damage_records_date_of_damage ON damage_records(date_of_damage);
 
+CREATE INDEX IF NOT EXISTS idx_damage_photos_damage_id ON damage_photos(damage_id);
+CREATE INDEX IF NOT EXISTS idx_damage_photos_sha256 ON damage_photos(sha256);
+
+CREATE INDEX IF NOT EXISTS ix_vehicle_cost_totals_total_cost ON vehicle_cost_totals(total_cost);
+
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_user_id ON revoked_tokens(user_id);
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires_at ON revoked_tokens(expires_at);
+
+CREATE INDEX IF NOT EXISTS idx_change_events_created_at ON change_events(created_at);
+
+-- Indexy pro rozdílovou synchronizaci (?since=)
+CREATE INDEX IF NOT EXISTS ix_vehicles_updated_at ON vehicles(updated_at);
+CREATE INDEX IF NOT EXISTS ix_reservations_updated_at ON reservations(updated_at);
+CREATE INDEX IF NOT EXISTS ix_service_records_updated_at ON service_records(updated_at);
+CREATE INDEX IF NOT EXISTS ix_damage_records_updated_at ON damage_records(updated_at);
+CREATE INDEX IF NOT EXISTS ix_tombstones_entity_type_deleted_at ON tombstones(entity_type, deleted_at);
+
+CREATE INDEX IF NOT EXISTS ix_audit_log_entity ON audit_log(entity_type, entity_id, audit_id);
+CREATE INDEX IF NOT EXISTS ix_audit_log_actor_id ON audit_log(actor_id, audit_id);
+CREATE INDEX IF NOT EXISTS ix_audit_log_changed_at ON audit_log(changed_at);
+CREATE INDEX IF NOT EXISTS ix_mail_outbox_status_next_attempt_at ON mail_outbox(status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS ix_mail_outbox_claim_token ON mail_outbox(claim_token);
+CREATE INDEX IF NOT EXISTS ix_rate_limit_buckets_updated_at ON rate_limit_buckets(updated_at);
+CREATE INDEX IF NOT EXISTS ix_idempotency_keys_expires_at ON idempotency_keys(expires_at);
+CREATE INDEX IF NOT EXISTS ix_waitlist_entries_status_start_time ON waitlist_entries(status, start_time, end_time);
+CREATE INDEX IF NOT EXISTS ix_waitlist_entries_user_id ON waitlist_entries(user_id);
+CREATE INDEX IF NOT EXISTS ix_vehicles_location_id_status ON vehicles(location_id, status);
+CREATE INDEX IF NOT EXISTS ix_vehicles_location_id_updated_at ON vehicles(location_id, updated_at);
+CREATE INDEX IF NOT EXISTS ix_users_location_id ON users(location_id);
+CREATE INDEX IF NOT EXISTS ix_reservations_vehicle_id_start_time ON reservations(vehicle_id, start_time);
+
 -- Vytvoření funkce pro automatickou aktualizaci sloupce updated_at
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
@@ -134,6 +347,9 @@ $$ language 'plpgsql';
 CREATE TRIGGER update_roles_updated_at BEFORE UPDATE ON roles
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+CREATE TRIGGER update_locations_updated_at BEFORE UPDATE ON locations
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
 CREATE TRIGGER update_users_updated_at BEFORE UPDATE ON users
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
@@ -149,6 +365,12 @@ CREATE TRIGGER update_service_records_updated_at BEFORE UPDATE ON service_record
 CREATE TRIGGER update_damage_records_updated_at BEFORE UPDATE ON damage_records
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+CREATE TRIGGER update_damage_photos_updated_at BEFORE UPDATE ON damage_photos
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+CREATE TRIGGER update_waitlist_entries_updated_at BEFORE UPDATE ON waitlist_entries
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
 -- Udělení oprávnění aplikačnímu uživateli
 GRANT ALL PRIVILEGES ON ALL TABLES IN SCHEMA public TO car_reservation_user;
 GRANT ALL PRIVILEGES ON ALL SEQUENCES IN SCHEMA public TO car_reservation_user;
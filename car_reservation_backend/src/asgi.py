@@ -0,0 +1,443 @@
+import os
+import sys
+# NEMĚŇTE TOTO !!!
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+from asgiref.wsgi import WsgiToAsgi
+from flask_jwt_extended import decode_token
+from jwt import ExpiredSignatureError, InvalidTokenError
+from sqlalchemy import select, make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import selectinload
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import QueryParams
+from starlette.middleware import Middleware
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route, Mount
+
+from config import get_config
+from src.main import app as flask_app
+from src.models.app_user import AppUser
+from src.models.vehicle import Vehicle
+from src.models.reservation import Reservation
+from src.models.archived_reservation import ArchivedReservation
+from src.services.pool import build_engine_options
+from src.services.revocation import is_token_revoked, revocation_maintenance_due
+from src.services.event_stream import ChangeFeed, format_event, format_reset
+from src.services.archive import archive_boundary_query, reaches_archive
+from src.services.accounts import EMPLOYEE_ROLE
+from src.services.rate_limit import MemoryBucketStore, role_query
+from src.services.locations import resolve_location, location_vehicles, at_location, fleet_fingerprint_query
+
+# ASGI režim: čtecí endpointy s vysokou souběžností běží nativně nad async
+# SQLAlchemy, vše ostatní se předává beze změny do Flask aplikace.
+#
+# Spuštění: gunicorn src.asgi:app -k uvicorn.workers.UvicornWorker
+
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
+def get_async_database_url(database_url):
+    """Převod synchronní databázové URL na URL s async ovladačem"""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'Nepodporovaná databáze pro async režim: {backend}')
+
+    # asyncpg nezná libpq parametr sslmode, SSL se předává přes connect_args
+    return url.set(drivername=ASYNC_DRIVERS[backend]).difference_update_query(['sslmode'])
+
+
+def get_async_connect_args(database_url):
+    """Parametry připojení pro async ovladač odvozené z původní URL"""
+    if make_url(database_url).query.get('sslmode') in ('require', 'verify-ca', 'verify-full'):
+        return {'ssl': True}
+    return {}
+
+
+database_url = flask_app.config['SQLALCHEMY_DATABASE_URI']
+engine_options = build_engine_options(get_config(), database_url, async_mode=True)
+engine_options['connect_args'] = {
+    **engine_options.get('connect_args', {}),
+    **get_async_connect_args(database_url),
+}
+async_engine = create_async_engine(get_async_database_url(database_url), **engine_options)
+AsyncSession = async_sessionmaker(async_engine, expire_on_commit=False)
+flask_asgi = WsgiToAsgi(flask_app)
+
+change_feed = ChangeFeed(
+    AsyncSession,
+    poll_interval=flask_app.config['EVENT_POLL_INTERVAL'],
+    queue_size=flask_app.config['EVENT_STREAM_QUEUE_SIZE'],
+    retention_hours=flask_app.config['CHANGE_LOG_RETENTION_HOURS'],
+)
+
+# Kolik událostí lze doplnit z logu po obnovení spojení, jinak reset
+EVENT_REPLAY_LIMIT = 500
+EVENT_RETRY_MS = 3000
+
+
+def json_response(data, status_code=200):
+    # Stejná CORS politika jako CORS(app, origins="*") ve Flask aplikaci
+    return JSONResponse(data, status_code=status_code, headers={'Access-Control-Allow-Origin': '*'})
+
+
+def error_response(message, status_code):
+    return json_response({'error': message}, status_code)
+
+
+def check_revoked(decoded):
+    with flask_app.app_context():
+        return is_token_revoked(decoded)
+
+
+async def get_identity(request, allow_query_token=False):
+    """Ověření JWT tokenu se stejnou konfigurací jako ve Flask aplikaci
+
+    EventSource v prohlížeči neumí posílat hlavičky, proto SSE endpoint
+    přijímá token i v parametru access_token. Nativní endpointy jsou čtecí,
+    proto se zde kontroluje i limit požadavků třídy read.
+    """
+    auth_header = request.headers.get('Authorization', '')
+    if auth_header.startswith('Bearer '):
+        token = auth_header[len('Bearer '):]
+    elif allow_query_token and request.query_params.get('access_token'):
+        token = request.query_params['access_token']
+    else:
+        return None, error_response('Autorizační token je vyžadován', 401)
+
+    try:
+        with flask_app.app_context():
+            decoded = decode_token(token)
+            maintain = revocation_maintenance_due()
+            if not maintain:
+                revoked = is_token_revoked(decoded, maintain=False)
+        if maintain:
+            # Synchronizace seznamu zneplatněných tokenů jde do databáze, ne ve smyčce událostí
+            revoked = await run_in_threadpool(check_revoked, decoded)
+    except ExpiredSignatureError:
+        return None, error_response('Token vypršel', 401)
+    except InvalidTokenError as e:
+        return None, json_response({'error': 'Neplatný token', 'detail': str(e)}, 401)
+
+    if revoked:
+        return None, error_response('Token byl zneplatněn', 401)
+
+    limiter = flask_app.extensions.get('rate_limiter')
+    if limiter is not None:
+        key = f'user:{decoded["sub"]}'
+        async with AsyncSession() as session:
+            role = await session.scalar(role_query(decoded['sub'])) or EMPLOYEE_ROLE
+        if isinstance(limiter.store, MemoryBucketStore):
+            seconds = limiter.check(key, role, 'read')
+        else:
+            # Sdílené úložiště je dotaz do databáze, ten nesmí blokovat event loop
+            seconds = await run_in_threadpool(limiter.check, key, role, 'read')
+        if seconds is not None:
+            response = json_response({'error': 'Too many requests', 'retry_after': seconds}, 429)
+            response.headers['Retry-After'] = str(seconds)
+            return None, response
+
+    return int(decoded['sub']), None
+
+
+async def archived_reservations(session, build_query, start, include_archived=False):
+    """Archivované rezervace, pokud dotaz sahá před konec archivu (viz services.archive)"""
+    if not reaches_archive(await session.scalar(archive_boundary_query()), start, include_archived):
+        return []
+    return (await session.scalars(build_query(ArchivedReservation))).all()
+
+
+async def user_location(session, user_id):
+    """Domovská pobočka uživatele, výchozí filtr seznamů (viz services.locations)"""
+    return await session.scalar(select(AppUser.location_id).filter_by(user_id=user_id))
+
+
+def parse_iso_datetime(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+async def get_vehicles(request):
+    """Get all vehicles with optional filtering"""
+    user_id, error = await get_identity(request)
+    if error:
+        return error
+
+    status = request.query_params.get('status', 'Active')
+
+    async with AsyncSession() as session:
+        try:
+            location_id = resolve_location(request.query_params.get('location_id'), await user_location(session, user_id))
+        except ValueError:
+            return error_response('Invalid location_id', 400)
+
+        query = select(Vehicle)
+        if status and status != 'all':
+            query = query.filter_by(status=status)
+        if location_id is not None:
+            query = query.filter(location_vehicles(location_id))
+
+        # Stejná cache jako Flask endpoint, seznam se načte jen po změně vozidel pobočky
+        cache = flask_app.extensions['location_cache']
+        fingerprint = tuple((await session.execute(fleet_fingerprint_query(location_id))).one())
+        vehicles = cache.get((location_id, status), fingerprint)
+        if vehicles is None:
+            vehicles = [vehicle.to_dict() for vehicle in (await session.scalars(query)).all()]
+            cache.put((location_id, status), fingerprint, vehicles)
+        return json_response(vehicles)
+
+
+async def check_vehicle_availability(request):
+    """Check vehicle availability for given time period"""
+    user_id, error = await get_identity(request)
+    if error:
+        return error
+
+    vehicle_id = request.path_params['vehicle_id']
+    start_time_str = request.query_params.get('start_time')
+    end_time_str = request.query_params.get('end_time')
+
+    async with AsyncSession() as session:
+        vehicle = await session.get(Vehicle, vehicle_id)
+        if not vehicle:
+            return error_response('Vehicle not found', 404)
+
+        if not start_time_str or not end_time_str:
+            return error_response('start_time and end_time parameters are required', 400)
+
+        try:
+            start_time = parse_iso_datetime(start_time_str)
+            end_time = parse_iso_datetime(end_time_str)
+        except ValueError:
+            return error_response('Invalid datetime format. Use ISO format', 400)
+
+        is_available = vehicle.status == 'Active' and not vehicle.overlaps_service_window(start_time, end_time)
+        if is_available:
+            conflict = await session.scalar(
+                select(Reservation.reservation_id).where(
+                    Reservation.vehicle_id == vehicle_id,
+                    Reservation.status == 'Confirmed',
+                    Reservation.start_time < end_time,
+                    Reservation.end_time > start_time
+                ).limit(1)
+            )
+            is_available = conflict is None
+
+    return json_response({
+        'vehicle_id': vehicle_id,
+        'available': is_available,
+        'start_time': start_time_str,
+        'end_time': end_time_str
+    })
+
+
+async def get_reservations(request):
+    """Get reservations (all for admin, own for regular users)"""
+    user_id, error = await get_identity(request)
+    if error:
+        return error
+
+    async with AsyncSession() as session:
+        user = await session.scalar(
+            select(AppUser).options(selectinload(AppUser.role)).filter_by(user_id=user_id)
+        )
+        if not user:
+            return error_response('User not found', 404)
+
+        vehicle_id = request.query_params.get('vehicle_id')
+        status = request.query_params.get('status')
+        start_date = request.query_params.get('start_date')
+        end_date = request.query_params.get('end_date')
+        include_archived = request.query_params.get('include_archived', 'false').lower() == 'true'
+        start_dt = end_dt = None
+
+        try:
+            location_id = resolve_location(request.query_params.get('location_id'), user.location_id if user.is_admin() else None)
+        except ValueError:
+            return error_response('Invalid location_id', 400)
+
+        if start_date:
+            try:
+                start_dt = datetime.strptime(start_date, '%Y-%m-%d')
+            except ValueError:
+                return error_response('Invalid start_date format. Use YYYY-MM-DD', 400)
+
+        if end_date:
+            try:
+                end_dt = datetime.strptime(end_date, '%Y-%m-%d')
+            except ValueError:
+                return error_response('Invalid end_date format. Use YYYY-MM-DD', 400)
+
+        def build_query(model):
+            query = select(model).options(
+                selectinload(model.vehicle),
+                selectinload(model.user)
+            )
+
+            # If not admin, only show user's own reservations
+            if not user.is_admin():
+                query = query.filter_by(user_id=user_id)
+            if vehicle_id:
+                query = query.filter_by(vehicle_id=int(vehicle_id))
+            if location_id is not None:
+                query = query.filter(at_location(model, location_id))
+            if status:
+                query = query.filter_by(status=status)
+            if start_dt:
+                query = query.filter(model.start_time >= start_dt)
+            if end_dt:
+                query = query.filter(model.end_time <= end_dt)
+            return query
+
+        reservations = (await session.scalars(build_query(Reservation).order_by(Reservation.start_time.desc()))).all()
+        archived = await archived_reservations(session, build_query, start_dt, include_archived)
+        if archived:
+            reservations = sorted([*reservations, *archived], key=lambda reservation: reservation.start_time, reverse=True)
+        return json_response([reservation.to_dict() for reservation in reservations])
+
+
+async def get_calendar_data(request):
+    """Get calendar data for the vehicles of the user's location (?location_id=all for all)"""
+    user_id, error = await get_identity(request)
+    if error:
+        return error
+
+    start_date = request.query_params.get('start_date')
+    end_date = request.query_params.get('end_date')
+    vehicle_id = request.query_params.get('vehicle_id')
+
+    if not start_date or not end_date:
+        return error_response('start_date and end_date parameters are required', 400)
+
+    try:
+        start_dt = datetime.strptime(start_date, '%Y-%m-%d')
+        end_dt = datetime.strptime(end_date, '%Y-%m-%d')
+    except ValueError:
+        return error_response('Invalid date format. Use YYYY-MM-DD', 400)
+
+    def build_query(model):
+        query = select(model).options(
+            selectinload(model.vehicle),
+            selectinload(model.user)
+        ).filter(
+            model.status == 'Confirmed',
+            model.start_time <= end_dt,
+            model.end_time >= start_dt
+        )
+        if vehicle_id:
+            query = query.filter_by(vehicle_id=int(vehicle_id))
+        if location_id is not None:
+            query = query.filter(at_location(model, location_id))
+        return query
+
+    async with AsyncSession() as session:
+        try:
+            location_id = resolve_location(request.query_params.get('location_id'), await user_location(session, user_id))
+        except ValueError:
+            return error_response('Invalid location_id', 400)
+
+        reservations = [
+            *(await session.scalars(build_query(Reservation))).all(),
+            *await archived_reservations(session, build_query, start_dt)
+        ]
+        return json_response([reservation.to_calendar_event() for reservation in reservations])
+
+
+async def stream_events(request):
+    """Server-Sent Events stream of reservation and vehicle changes"""
+    user_id, error = await get_identity(request, allow_query_token=True)
+    if error:
+        return error
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.query_params.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return error_response('Last-Event-ID must be an integer', 400)
+
+    heartbeat = flask_app.config['EVENT_STREAM_HEARTBEAT_SECONDS']
+    # Odběr před doplněním z logu, aby se nic neztratilo mezi oběma kroky
+    subscriber = change_feed.subscribe()
+
+    async def events():
+        try:
+            yield f'retry: {EVENT_RETRY_MS}\n\n'
+
+            replayed = set()
+            if last_event_id is not None:
+                backlog, reset = await change_feed.backlog(last_event_id, EVENT_REPLAY_LIMIT)
+                if reset or len(backlog) >= EVENT_REPLAY_LIMIT:
+                    yield format_reset('expired')
+                    return
+                for event in backlog:
+                    replayed.add(event['event_id'])
+                    yield format_event(event)
+
+            while True:
+                if subscriber.overflowed:
+                    yield format_reset('overflow')
+                    return
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield ': heartbeat\n\n'
+                    continue
+                if event['event_id'] not in replayed:
+                    yield format_event(event)
+        finally:
+            change_feed.unsubscribe(subscriber)
+
+    return StreamingResponse(events(), media_type='text/event-stream', headers={
+        'Access-Control-Allow-Origin': '*',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+
+# Nativní seznamy, jejichž rozdílovou synchronizaci (?since=) obsluhuje Flask
+DELTA_SYNC_PATHS = {'/api/vehicles', '/api/reservations'}
+
+
+class DeltaSyncToFlask:
+    """Předání požadavků s ?since= na nativní seznamy přímo Flask aplikaci"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (scope['type'] == 'http' and scope['path'] in DELTA_SYNC_PATHS
+                and 'since' in QueryParams(scope['query_string'])):
+            await flask_asgi(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    await change_feed.start()
+    yield
+    await change_feed.stop()
+    await async_engine.dispose()
+
+
+app = Starlette(
+    routes=[
+        Route('/api/vehicles', get_vehicles, methods=['GET']),
+        Route('/api/vehicles/{vehicle_id:int}/availability', check_vehicle_availability, methods=['GET']),
+        Route('/api/reservations', get_reservations, methods=['GET']),
+        Route('/api/calendar', get_calendar_data, methods=['GET']),
+        Route('/api/events/stream', stream_events, methods=['GET']),
+        # Zápisy a ostatní endpointy obsluhuje beze změny Flask aplikace
+        Mount('/', app=flask_asgi),
+    ],
+    middleware=[Middleware(DeltaSyncToFlask)],
+    lifespan=lifespan,
+)
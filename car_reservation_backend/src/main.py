@@ -6,6 +6,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from flask import Flask, send_from_directory, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
+from werkzeug.middleware.proxy_fix import ProxyFix
 from datetime import timedelta
 import logging
 
@@ -19,6 +20,39 @@ from src.models.vehicle import Vehicle
 from src.models.reservation import Reservation
 from src.models.service_record import ServiceRecord
 from src.models.damage_record import DamageRecord
+from src.models.damage_photo import DamagePhoto, migrate_legacy_photos
+from src.models.revoked_token import RevokedToken
+from src.models.odometer_reading import OdometerReading
+from src.models.vehicle_cost import VehicleCostSummary, VehicleCostTotal
+from src.models.change_event import ChangeEvent
+from src.models.tombstone import Tombstone
+from src.models.calendar_feed import CalendarFeedVersion
+from src.models.archived_reservation import ArchivedReservation
+from src.models.audit_entry import AuditEntry
+from src.models.outbox_message import OutboxMessage
+from src.models.rate_limit_bucket import RateLimitBucket
+from src.models.idempotency_key import IdempotencyKey
+from src.models.waitlist_entry import WaitlistEntry
+from src.models.location import Location
+
+from config import get_config
+from src.services.replicas import get_replica_binds, init_replicas
+from src.services.pool import build_engine_options
+from src.services.search import init_search
+from src.services.suggest import init_suggest
+from src.services.revocation import init_revocation
+from src.services.costs import init_costs, ensure_cost_summary
+from src.services.service_schedule import init_service_schedule
+from src.services.change_log import init_change_log
+from src.services.sync import init_sync, ensure_sync_indexes
+from src.services.ical import init_ical
+from src.services.archive import init_archive
+from src.services.audit import init_audit
+from src.services.mail import init_mail
+from src.services.backup import init_backup
+from src.services.rate_limit import init_rate_limit
+from src.services.waitlist import init_waitlist
+from src.services.locations import init_locations, ensure_location_columns
 
 # Import blueprintů
 from src.routes.auth import auth_bp
@@ -27,6 +61,15 @@ from src.routes.reservations import reservations_bp
 from src.routes.users import users_bp
 from src.routes.service_records import service_records_bp
 from src.routes.damage_records import damage_records_bp
+from src.routes.admin import admin_bp
+from src.routes.search import search_bp
+from src.routes.imports import imports_bp
+from src.routes.telemetry import telemetry_bp
+from src.routes.costs import costs_bp
+from src.routes.ical import ical_bp
+from src.routes.audit import audit_bp
+from src.routes.waitlist import waitlist_bp
+from src.routes.locations import locations_bp
 
 def create_app():
     """Factory function pro vytvoření Flask aplikace"""
@@ -36,6 +79,8 @@ def create_app():
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'car-reservation-secret-key-change-in-production')
     app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-key-change-in-production')
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=8)
+    # Jak často worker načítá tokeny zneplatněné v jiných workerech
+    app.config['TOKEN_REVOCATION_SYNC_SECONDS'] = float(os.environ.get('TOKEN_REVOCATION_SYNC_SECONDS', 2))
 
     # Konfigurace databáze
     database_url = os.environ.get('DATABASE_URL')
@@ -50,10 +95,97 @@ def create_app():
         app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{db_path}"
 
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-        'pool_pre_ping': True,
-        'pool_recycle': 300,
-    }
+    # Connection pool podle prostředí (DB_POOL_* v config.py)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(
+        get_config(), app.config['SQLALCHEMY_DATABASE_URI']
+    )
+
+    # Volitelné read repliky pro čtecí endpointy
+    replica_urls = os.environ.get('DATABASE_REPLICA_URLS')
+    if replica_urls:
+        app.config['SQLALCHEMY_BINDS'] = get_replica_binds(replica_urls)
+    app.config['DATABASE_REPLICA_MAX_LAG'] = float(os.environ.get('DATABASE_REPLICA_MAX_LAG', 5))
+    app.config['DATABASE_REPLICA_CHECK_INTERVAL'] = float(os.environ.get('DATABASE_REPLICA_CHECK_INTERVAL', 10))
+    app.config['DATABASE_REPLICA_PIN_SECONDS'] = float(os.environ.get('DATABASE_REPLICA_PIN_SECONDS', 5))
+
+    # Nahrávání fotografií poškození
+    upload_folder = os.environ.get('UPLOAD_FOLDER', 'uploads')
+    if not os.path.isabs(upload_folder):
+        upload_folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), upload_folder)
+    app.config['UPLOAD_FOLDER'] = upload_folder
+    app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))
+    app.config['THUMBNAIL_WORKERS'] = int(os.environ.get('THUMBNAIL_WORKERS', 2))
+
+    # Konfigurace aplikace
+    app.config['PAGINATION_PER_PAGE'] = int(os.environ.get('PAGINATION_PER_PAGE', 20))
+    app.config['SUGGEST_REFRESH_SECONDS'] = float(os.environ.get('SUGGEST_REFRESH_SECONDS', 30))
+
+    # Telematika (odečty tachometru)
+    app.config['TELEMETRY_API_KEY'] = os.environ.get('TELEMETRY_API_KEY')
+    app.config['ODOMETER_RAW_RETENTION_DAYS'] = int(os.environ.get('ODOMETER_RAW_RETENTION_DAYS', 30))
+    app.config['ODOMETER_COMPACT_WINDOW_DAYS'] = int(os.environ.get('ODOMETER_COMPACT_WINDOW_DAYS', 7))
+
+    # Servisní intervaly pro plánování next_service_date
+    app.config['SERVICE_INTERVAL_KM'] = int(os.environ.get('SERVICE_INTERVAL_KM', 15000))
+    app.config['SERVICE_INTERVAL_DAYS'] = int(os.environ.get('SERVICE_INTERVAL_DAYS', 365))
+
+    # SSE stream změn (GET /api/events/stream v ASGI režimu)
+    app.config['EVENT_POLL_INTERVAL'] = float(os.environ.get('EVENT_POLL_INTERVAL', 1))
+    app.config['EVENT_STREAM_QUEUE_SIZE'] = int(os.environ.get('EVENT_STREAM_QUEUE_SIZE', 100))
+    app.config['EVENT_STREAM_HEARTBEAT_SECONDS'] = float(os.environ.get('EVENT_STREAM_HEARTBEAT_SECONDS', 15))
+    app.config['CHANGE_LOG_RETENTION_HOURS'] = int(os.environ.get('CHANGE_LOG_RETENTION_HOURS', 24))
+
+    # Rozdílová synchronizace seznamů (?since=)
+    app.config['SYNC_WATERMARK_LAG_SECONDS'] = float(os.environ.get('SYNC_WATERMARK_LAG_SECONDS', 10))
+
+    # iCalendar feedy rezervací
+    app.config['ICAL_CACHE_SIZE'] = int(os.environ.get('ICAL_CACHE_SIZE', 500))
+
+    # Archivace starých rezervací
+    app.config['RESERVATION_ARCHIVE_DAYS'] = int(os.environ.get('RESERVATION_ARCHIVE_DAYS', 365))
+    app.config['RESERVATION_ARCHIVE_BATCH_SIZE'] = int(os.environ.get('RESERVATION_ARCHIVE_BATCH_SIZE', 1000))
+
+    # Auditní log (zápis po dávkách na pozadí)
+    app.config['AUDIT_QUEUE_SIZE'] = int(os.environ.get('AUDIT_QUEUE_SIZE', 10000))
+    app.config['AUDIT_BATCH_SIZE'] = int(os.environ.get('AUDIT_BATCH_SIZE', 500))
+    app.config['AUDIT_FLUSH_INTERVAL'] = float(os.environ.get('AUDIT_FLUSH_INTERVAL', 1))
+
+    # E-mailová upozornění (outbox, odesílání po dávkách na pozadí)
+    app.config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER')
+    app.config['MAIL_PORT'] = int(os.environ.get('MAIL_PORT', 587))
+    app.config['MAIL_USE_TLS'] = os.environ.get('MAIL_USE_TLS', 'True').lower() == 'true'
+    app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME')
+    app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD')
+    app.config['MAIL_DEFAULT_SENDER'] = os.environ.get('MAIL_DEFAULT_SENDER') or app.config['MAIL_USERNAME']
+    app.config['MAIL_BATCH_SIZE'] = int(os.environ.get('MAIL_BATCH_SIZE', 50))
+    app.config['MAIL_MAX_ATTEMPTS'] = int(os.environ.get('MAIL_MAX_ATTEMPTS', 6))
+    app.config['MAIL_RETRY_BASE_SECONDS'] = float(os.environ.get('MAIL_RETRY_BASE_SECONDS', 60))
+    app.config['MAIL_POLL_INTERVAL'] = float(os.environ.get('MAIL_POLL_INTERVAL', 30))
+    app.config['COMPLIANCE_WARNING_DAYS'] = int(os.environ.get('COMPLIANCE_WARNING_DAYS', 30))
+
+    # Zálohování databáze (flask backup-database / restore-database)
+    app.config['BACKUP_ENABLED'] = os.environ.get('BACKUP_ENABLED', 'False').lower() == 'true'
+    app.config['BACKUP_RETENTION_DAYS'] = int(os.environ.get('BACKUP_RETENTION_DAYS', 30))
+    app.config['BACKUP_DIR'] = os.environ.get('BACKUP_DIR', '/var/backups/car-reservation')
+    app.config['BACKUP_JOBS'] = int(os.environ.get('BACKUP_JOBS', 0))
+
+    # Omezení počtu požadavků (token bucket na uživatele a třídu endpointu)
+    app.config['RATE_LIMIT_ENABLED'] = os.environ.get('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+    app.config['RATE_LIMIT_BACKEND'] = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+    app.config['RATE_LIMIT_EMPLOYEE'] = os.environ.get('RATE_LIMIT_EMPLOYEE', 'read=120/60,write=30/60,export=10/60')
+    app.config['RATE_LIMIT_ADMIN'] = os.environ.get('RATE_LIMIT_ADMIN', 'read=600/60,write=120/60,export=30/60')
+    app.config['RATE_LIMIT_ANONYMOUS'] = os.environ.get('RATE_LIMIT_ANONYMOUS', 'read=60/60,write=20/60,export=30/60,login=300/60,feed=30/60')
+    app.config['RATE_LIMIT_MAX_QUEUE_MS'] = float(os.environ.get('RATE_LIMIT_MAX_QUEUE_MS', 0))
+    # Počet reverzních proxy před aplikací (Render: 1); limit anonymních klientů podle jejich IP
+    app.config['PROXY_FIX_HOPS'] = int(os.environ.get('PROXY_FIX_HOPS', 0))
+
+    # Idempotency-Key u POST požadavků (opakování vrátí uloženou odpověď)
+    app.config['IDEMPOTENCY_TTL_HOURS'] = float(os.environ.get('IDEMPOTENCY_TTL_HOURS', 24))
+    app.config['IDEMPOTENCY_WAIT_SECONDS'] = float(os.environ.get('IDEMPOTENCY_WAIT_SECONDS', 10))
+
+    # Pobočky (cache seznamů vozidel po pobočkách)
+    app.config['LOCATION_CACHE_SIZE'] = int(os.environ.get('LOCATION_CACHE_SIZE', 200))
+    app.config['LOCATION_CACHE_TTL'] = float(os.environ.get('LOCATION_CACHE_TTL', 30))
 
     # Produkční nastavení
     if os.environ.get('FLASK_ENV') == 'production':
@@ -63,10 +195,29 @@ def create_app():
     else:
         app.config['DEBUG'] = True
 
+    # Adresa klienta a schéma z X-Forwarded-* důvěryhodných proxy
+    if app.config['PROXY_FIX_HOPS']:
+        hops = app.config['PROXY_FIX_HOPS']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops, x_host=hops)
+    
     # Inicializace rozšíření
     CORS(app, origins="*")  # Povolit všechny původy
     jwt = JWTManager(app)
     db.init_app(app)
+    init_revocation(app, jwt)
+    init_costs(app)
+    init_service_schedule(app)
+    init_change_log(app)
+    init_sync(app)
+    init_ical(app)
+    init_archive(app)
+    init_audit(app)
+    init_mail(app)
+    init_backup(app)
+    init_rate_limit(app)
+    init_waitlist(app)
+    init_locations(app)
+    init_replicas(app)
 
     # Registrace blueprintů
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
@@ -75,6 +226,15 @@ def create_app():
     app.register_blueprint(users_bp, url_prefix='/api')
     app.register_blueprint(service_records_bp, url_prefix='/api')
     app.register_blueprint(damage_records_bp, url_prefix='/api')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    app.register_blueprint(search_bp, url_prefix='/api')
+    app.register_blueprint(imports_bp, url_prefix='/api')
+    app.register_blueprint(telemetry_bp, url_prefix='/api')
+    app.register_blueprint(costs_bp, url_prefix='/api')
+    app.register_blueprint(ical_bp, url_prefix='/api')
+    app.register_blueprint(audit_bp, url_prefix='/api')
+    app.register_blueprint(waitlist_bp, url_prefix='/api')
+    app.register_blueprint(locations_bp, url_prefix='/api')
 
        # JWT error handlery
     @jwt.expired_token_loader
@@ -85,6 +245,10 @@ def create_app():
     def invalid_token_callback(error):
         return jsonify({'error': 'Neplatný token', 'detail': error}), 401
 
+    @jwt.revoked_token_loader
+    def revoked_token_callback(jwt_header, jwt_payload):
+        return jsonify({'error': 'Token byl zneplatněn'}), 401
+
     @jwt.unauthorized_loader
     def missing_token_callback(error):
         return jsonify({'error': 'Autorizační token je vyžadován'}), 401
@@ -139,6 +303,9 @@ def init_database(app):
         try:
             db.create_all()
             
+            # Sloupce location_id v databázích z doby před zavedením poboček
+            ensure_location_columns()
+            
             # Vytvoření výchozích rolí, pokud neexistují
             if not Role.query.filter_by(role_name='Employee').first():
                 employee_role = Role(
@@ -223,7 +390,25 @@ def init_database(app):
                     vehicle = Vehicle(**vehicle_data)
                     db.session.add(vehicle)
             
+            # Převod fotografií ze starého JSON sloupce do tabulky damage_photos
+            migrated_photos = migrate_legacy_photos(os.path.join(app.config['UPLOAD_FOLDER'], 'photos'))
+            if migrated_photos:
+                print(f"Převedeno {migrated_photos} fotografií do tabulky damage_photos")
+            
             db.session.commit()
+            
+            # Fulltextové indexy (tsvector/trigram na PostgreSQL, FTS5 na SQLite)
+            init_search(app)
+            
+            # Indexy updated_at pro rozdílovou synchronizaci (?since=)
+            ensure_sync_indexes()
+            
+            # Index pro našeptávání SPZ a uživatelů v paměti
+            init_suggest(app)
+            
+            # Naplnění agregátu nákladů vozidel při prvním nasazení
+            if ensure_cost_summary():
+                print("Agregát nákladů vozidel byl vytvořen z existujících záznamů")
             print("Databáze byla úspěšně inicializována")
             
         except Exception as e:
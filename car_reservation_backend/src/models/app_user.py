@@ -2,6 +2,9 @@ from src.models.database import db, BaseModel
 
 class AppUser(BaseModel):
     __tablename__ = 'users'
+    __table_args__ = (
+        db.Index('ix_users_location_id', 'location_id'),
+    )
     
     user_id = db.Column(db.Integer, primary_key=True)
     intranet_id = db.Column(db.String(255), unique=True, nullable=False)
@@ -11,6 +14,8 @@ class AppUser(BaseModel):
     phone_number = db.Column(db.String(50), nullable=True)
     role_id = db.Column(db.Integer, db.ForeignKey('roles.role_id'), nullable=False)
     is_active = db.Column(db.Boolean, nullable=False, default=True)
+    # Domovská pobočka; určuje výchozí filtr seznamů a rozsah správy administrátora
+    location_id = db.Column(db.Integer, db.ForeignKey('locations.location_id'), nullable=True)
     
     # Vztahy
     reservations = db.relationship('Reservation', backref='user', lazy=True)
@@ -29,6 +34,7 @@ class AppUser(BaseModel):
             'role_id': self.role_id,
             'role_name': self.role.role_name if self.role else None,
             'is_active': self.is_active,
+            'location_id': self.location_id,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -40,4 +46,9 @@ class AppUser(BaseModel):
     def is_admin(self):
         """Kontrola, zda je uživatel administrátor vozového parku"""
         return self.has_role('Fleet Administrator')
-
+    
+    def administers(self, location_id):
+        """Kontrola, zda administrátor spravuje pobočku (vozidla bez pobočky spravují všichni)"""
+        if not self.is_admin():
+            return False
+        return self.location_id is None or location_id is None or self.location_id == location_id
@@ -0,0 +1,44 @@
+from src.models.database import db
+from src.models.reservation import Reservation
+from datetime import datetime
+
+class ArchivedReservation(db.Model):
+    """Rezervace přesunuté z tabulky reservations po uplynutí archivačního horizontu
+
+    Sloupce odpovídají tabulce reservations (včetně původního reservation_id),
+    aby services.archive mohl řádky přesouvat jedním INSERT ... SELECT.
+    Tabulka slouží jen ke čtení historie, archivované rezervace nelze upravit.
+    """
+    __tablename__ = 'reservations_archive'
+
+    reservation_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicles.vehicle_id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False, index=True)
+    start_time = db.Column(db.DateTime, nullable=False, index=True)
+    end_time = db.Column(db.DateTime, nullable=False, index=True)
+    purpose = db.Column(db.String(255), nullable=False)
+    destination = db.Column(db.String(255), nullable=False)
+    number_of_passengers = db.Column(db.Integer, nullable=True)
+    status = db.Column(db.String(50), nullable=False)
+    user_notes = db.Column(db.Text, nullable=True)
+    admin_notes = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    vehicle = db.relationship('Vehicle', viewonly=True)
+    user = db.relationship('AppUser', viewonly=True)
+
+    def __repr__(self):
+        return f'<ArchivedReservation {self.reservation_id} ({self.start_time} - {self.end_time})>'
+
+    def to_dict(self):
+        data = Reservation.to_dict(self)
+        data['archived'] = True
+        return data
+
+    def to_calendar_event(self):
+        return Reservation.to_calendar_event(self)
+
+    def can_be_modified_by_user(self, hours_before=2):
+        return False
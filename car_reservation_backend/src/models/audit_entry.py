@@ -0,0 +1,38 @@
+from src.models.database import db
+from datetime import datetime
+import json
+
+class AuditEntry(db.Model):
+    """Auditní záznam změny rezervace, vozidla, servisního záznamu nebo poškození
+
+    changes obsahuje JSON {atribut: [stará hodnota, nová hodnota]}. Řádky
+    zapisuje na pozadí services.audit po potvrzení transakce; tabulka je
+    append-only, proto nemá updated_at.
+    """
+    __tablename__ = 'audit_log'
+    __table_args__ = (
+        db.Index('ix_audit_log_entity', 'entity_type', 'entity_id', 'audit_id'),
+        db.Index('ix_audit_log_actor_id', 'actor_id', 'audit_id'),
+    )
+
+    audit_id = db.Column(db.Integer, primary_key=True)
+    entity_type = db.Column(db.String(50), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    action = db.Column(db.String(20), nullable=False)
+    changes = db.Column(db.Text, nullable=False)
+    actor_id = db.Column(db.Integer, nullable=True)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<AuditEntry {self.audit_id}: {self.entity_type} {self.entity_id} {self.action}>'
+
+    def to_dict(self):
+        return {
+            'audit_id': self.audit_id,
+            'entity_type': self.entity_type,
+            'entity_id': self.entity_id,
+            'action': self.action,
+            'changes': json.loads(self.changes),
+            'actor_id': self.actor_id,
+            'changed_at': self.changed_at.isoformat() if self.changed_at else None
+        }
@@ -0,0 +1,24 @@
+from src.models.database import db
+
+class CalendarFeedVersion(db.Model):
+    """Verze iCalendar feedu uživatele nebo vozidla
+
+    Verzi zvyšuje services.ical při každé změně rezervace daného uživatele
+    nebo vozidla. Workery podle ní poznají, že jejich vykreslený feed
+    v paměti je zastaralý, a z verze se skládá ETag.
+    """
+    __tablename__ = 'calendar_feed_versions'
+
+    feed_type = db.Column(db.String(20), primary_key=True)
+    entity_id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<CalendarFeedVersion {self.feed_type} {self.entity_id}: {self.version}>'
+
+    def to_dict(self):
+        return {
+            'feed_type': self.feed_type,
+            'entity_id': self.entity_id,
+            'version': self.version
+        }
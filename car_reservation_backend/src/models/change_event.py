@@ -0,0 +1,35 @@
+from src.models.database import db
+from datetime import datetime
+import json
+
+class ChangeEvent(db.Model):
+    """Log změn rezervací a vozidel pro SSE stream a obnovení přes Last-Event-ID
+
+    Řádky zapisuje services.change_log v téže transakci jako samotnou změnu;
+    rostoucí event_id je zároveň ID události ve streamu. Starší záznamy se
+    mažou, log slouží jen k dohnání krátkého výpadku spojení.
+    """
+    __tablename__ = 'change_events'
+    # ID se po smazání starých řádků nesmí na SQLite znovu použít
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    event_id = db.Column(db.Integer, primary_key=True)
+    entity_type = db.Column(db.String(50), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    action = db.Column(db.String(20), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<ChangeEvent {self.event_id}: {self.entity_type}.{self.action} {self.entity_id}>'
+
+    def to_dict(self):
+        return {
+            'event_id': self.event_id,
+            'type': f'{self.entity_type}.{self.action}',
+            'entity_type': self.entity_type,
+            'entity_id': self.entity_id,
+            'action': self.action,
+            'data': json.loads(self.payload),
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
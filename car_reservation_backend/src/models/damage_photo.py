@@ -0,0 +1,75 @@
+from src.models.database import db, BaseModel
+import json
+import os
+import re
+
+SHA256_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+class DamagePhoto(BaseModel):
+    __tablename__ = 'damage_photos'
+    __table_args__ = (
+        db.UniqueConstraint('damage_id', 'path', name='uq_damage_photos_damage_id_path'),
+    )
+
+    photo_id = db.Column(db.Integer, primary_key=True)
+    damage_id = db.Column(db.Integer, db.ForeignKey('damage_records.damage_id', ondelete='CASCADE'), nullable=False, index=True)
+    path = db.Column(db.String(512), nullable=False)
+    sha256 = db.Column(db.String(64), nullable=True, index=True)
+    size = db.Column(db.Integer, nullable=True)
+
+    def __repr__(self):
+        return f'<DamagePhoto {self.photo_id}: {self.path}>'
+
+    def to_dict(self):
+        return {
+            'photo_id': self.photo_id,
+            'damage_id': self.damage_id,
+            'path': self.path,
+            'sha256': self.sha256,
+            'size': self.size,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+    @staticmethod
+    def sha256_from_path(path):
+        """Hash obsahu z content-addressed cesty (ab/cd/<sha256>.jpg), jinak None"""
+        name = os.path.splitext(os.path.basename(path))[0]
+        return name if SHA256_PATTERN.match(name) else None
+
+
+def migrate_legacy_photos(photos_dir=None):
+    """Jednorázový převod JSON sloupce damage_records.photos do tabulky damage_photos
+
+    Převedené záznamy mají sloupec vynulovaný, takže opakované spuštění nic nedělá.
+    """
+    columns = [column['name'] for column in db.inspect(db.engine).get_columns('damage_records')]
+    if 'photos' not in columns:
+        return 0
+
+    rows = db.session.execute(db.text(
+        'SELECT damage_id, photos FROM damage_records WHERE photos IS NOT NULL'
+    )).all()
+
+    migrated = 0
+    for damage_id, photos_json in rows:
+        try:
+            paths = json.loads(photos_json) or []
+        except (json.JSONDecodeError, TypeError):
+            paths = []
+
+        for path in dict.fromkeys(p for p in paths if isinstance(p, str)):
+            size = None
+            if photos_dir and os.path.isfile(os.path.join(photos_dir, path)):
+                size = os.path.getsize(os.path.join(photos_dir, path))
+            db.session.add(DamagePhoto(
+                damage_id=damage_id,
+                path=path,
+                sha256=DamagePhoto.sha256_from_path(path),
+                size=size
+            ))
+            migrated += 1
+
+    if rows:
+        db.session.execute(db.text('UPDATE damage_records SET photos = NULL WHERE photos IS NOT NULL'))
+
+    return migrated
@@ -1,8 +1,11 @@
 from src.models.database import db, BaseModel
-import json
+from src.models.damage_photo import DamagePhoto
 
 class DamageRecord(BaseModel):
     __tablename__ = 'damage_records'
+    __table_args__ = (
+        db.Index('ix_damage_records_updated_at', 'updated_at'),
+    )
     
     damage_id = db.Column(db.Integer, primary_key=True)
     vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicles.vehicle_id'), nullable=False)
@@ -11,19 +14,15 @@ class DamageRecord(BaseModel):
     estimated_cost = db.Column(db.Numeric(10, 2), nullable=True)
     actual_cost = db.Column(db.Numeric(10, 2), nullable=True)
     repair_status = db.Column(db.String(50), nullable=False, default='Pending')
-    photos = db.Column(db.Text, nullable=True)  # JSON string of photo paths
+    
+    # Vztahy
+    photos = db.relationship('DamagePhoto', backref='damage_record', lazy=True,
+                             order_by='DamagePhoto.photo_id', cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<DamageRecord {self.damage_id}: {self.description[:50]}... for {self.vehicle.license_plate if self.vehicle else "N/A"}>'
     
     def to_dict(self):
-        photos_list = []
-        if self.photos:
-            try:
-                photos_list = json.loads(self.photos)
-            except json.JSONDecodeError:
-                photos_list = []
-        
         return {
             'damage_id': self.damage_id,
             'vehicle_id': self.vehicle_id,
@@ -37,33 +36,37 @@ class DamageRecord(BaseModel):
             'estimated_cost': float(self.estimated_cost) if self.estimated_cost else None,
             'actual_cost': float(self.actual_cost) if self.actual_cost else None,
             'repair_status': self.repair_status,
-            'photos': photos_list,
+            'photos': [photo.path for photo in self.photos],
+            'photo_count': len(self.photos),
+            'first_photo': self.photos[0].path if self.photos else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
     
-    def add_photo(self, photo_path):
-        """Přidání cesty k fotografii do seznamu fotografií"""
-        photos_list = []
-        if self.photos:
-            try:
-                photos_list = json.loads(self.photos)
-            except json.JSONDecodeError:
-                photos_list = []
+    def add_photo(self, photo_path, sha256=None, size=None):
+        """Přidání fotografie k záznamu (duplicitní cesta se nepřidá)"""
+        if any(photo.path == photo_path for photo in self.photos):
+            return None
         
-        photos_list.append(photo_path)
-        self.photos = json.dumps(photos_list)
+        photo = DamagePhoto(
+            path=photo_path,
+            sha256=sha256 or DamagePhoto.sha256_from_path(photo_path),
+            size=size
+        )
+        self.photos.append(photo)
+        return photo
+    
+    def set_photos(self, photo_paths):
+        """Nahrazení všech fotografií záznamu seznamem cest"""
+        # Ponechané fotografie se znovu použijí, aby nevznikl konflikt unikátního indexu
+        existing = {photo.path: photo for photo in self.photos}
+        self.photos = [
+            existing.get(path) or DamagePhoto(path=path, sha256=DamagePhoto.sha256_from_path(path))
+            for path in dict.fromkeys(photo_paths)
+        ]
     
     def remove_photo(self, photo_path):
-        """Odstranění cesty k fotografii ze seznamu fotografií"""
-        photos_list = []
-        if self.photos:
-            try:
-                photos_list = json.loads(self.photos)
-            except json.JSONDecodeError:
-                photos_list = []
-        
-        if photo_path in photos_list:
-            photos_list.remove(photo_path)
-            self.photos = json.dumps(photos_list)
-
+        """Odstranění fotografie indexovaným dotazem podle (damage_id, path)"""
+        removed = DamagePhoto.query.filter_by(damage_id=self.damage_id, path=photo_path).delete()
+        db.session.expire(self, ['photos'])
+        return removed > 0
@@ -1,7 +1,73 @@
+from flask import current_app, g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
 from datetime import datetime
 
-db = SQLAlchemy()
+
+class RoutingSession(Session):
+    """Session směrující čtení označených endpointů na read repliky
+
+    Zápisy i vše, co v téže session následuje po zápisu, jdou vždy na primární
+    databázi (read-your-writes). Všechna čtení jednoho požadavku jdou na tutéž
+    repliku.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            if self._flushing or getattr(clause, 'is_dml', False):
+                self.info['pinned_to_primary'] = True
+                g.wrote_to_primary = True
+            elif g.get('use_replica') and not self.info.get('pinned_to_primary'):
+                # Replika se vybírá jednou za požadavek, jinak by seznam a jeho
+                # selectinload mohly číst z replik s různým zpožděním
+                if 'replica_engine' not in g:
+                    router = current_app.extensions.get('replica_router')
+                    g.replica_engine = router.choose_engine() if router else None
+                if g.replica_engine is not None:
+                    return g.replica_engine
+
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+# INSERT s podporou ON CONFLICT pro databáze, které ho umí
+INSERT_BY_DIALECT = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def dialect_insert(model):
+    """INSERT pro aktuální databázi s on_conflict_do_nothing(), jinak None"""
+    insert = INSERT_BY_DIALECT.get(db.engine.dialect.name)
+    return insert(model) if insert else None
+
+
+def apply_increments(connection, model, key_columns, value_columns, rows):
+    """Přičtení hodnot k existujícím řádkům agregátu, chybějící řádky se vloží"""
+    if not rows:
+        return
+
+    table = model.__table__
+    insert = dialect_insert(model)
+    if insert is not None:
+        statement = insert.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={column: table.c[column] + insert.excluded[column] for column in value_columns}
+        )
+        connection.execute(statement, rows)
+        return
+
+    for row in rows:
+        key = [table.c[column] == row[column] for column in key_columns]
+        result = connection.execute(
+            update(table).where(*key).values({column: table.c[column] + row[column] for column in value_columns})
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row))
 
 class BaseModel(db.Model):
     """Základní model se společnými poli"""
@@ -9,4 +75,3 @@ class BaseModel(db.Model):
     
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
-
@@ -0,0 +1,25 @@
+from src.models.database import db
+from datetime import datetime
+
+class IdempotencyKey(db.Model):
+    """Výsledek POST požadavku s hlavičkou Idempotency-Key
+
+    key_hash je SHA-256 z uživatele, cesty a klíče klienta, request_hash
+    z těla požadavku (stejný klíč s jiným tělem se odmítne). Řádek ve stavu
+    pending značí právě probíhající požadavek; po dokončení nese uloženou
+    odpověď, kterou services.idempotency vrací opakovaným pokusům do expires_at.
+    """
+    __tablename__ = 'idempotency_keys'
+
+    key_hash = db.Column(db.String(64), primary_key=True)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    response_status = db.Column(db.Integer, nullable=True)
+    response_body = db.Column(db.Text, nullable=True)
+    response_mimetype = db.Column(db.String(100), nullable=True)
+    locked_until = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<IdempotencyKey {self.key_hash[:12]}: {self.status}>'
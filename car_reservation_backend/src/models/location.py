@@ -0,0 +1,30 @@
+from src.models.database import db, BaseModel
+
+class Location(BaseModel):
+    """Pobočka (depo), ke které patří vozidla a uživatelé
+
+    Vozidla bez pobočky jsou sdílená celou firmou. Uživatel bez pobočky
+    vidí ve výchozím stavu celý vozový park a jako administrátor spravuje
+    všechny pobočky; administrátor pobočky jen tu svou.
+    """
+    __tablename__ = 'locations'
+
+    location_id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(255), unique=True, nullable=False)
+    address = db.Column(db.String(255), nullable=True)
+
+    # Vztahy
+    vehicles = db.relationship('Vehicle', backref='location', lazy=True)
+    users = db.relationship('AppUser', backref='location', lazy=True)
+
+    def __repr__(self):
+        return f'<Location {self.name}>'
+
+    def to_dict(self):
+        return {
+            'location_id': self.location_id,
+            'name': self.name,
+            'address': self.address,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -0,0 +1,32 @@
+from src.models.database import db
+from datetime import datetime
+
+class OdometerReading(db.Model):
+    """Historie stavu tachometru z telematiky
+
+    Tabulka je append-only, proto nemá updated_at. Unikátní dvojice
+    (vozidlo, čas) dělá opakované odeslání téhož odečtu neškodným a slouží
+    zároveň jako index pro dotazy na vývoj v čase. Starší odečty se
+    zhušťují na jeden za den (viz services.telemetry).
+    """
+    __tablename__ = 'odometer_readings'
+    __table_args__ = (
+        db.UniqueConstraint('vehicle_id', 'recorded_at', name='uq_odometer_readings_vehicle_id_recorded_at'),
+    )
+
+    reading_id = db.Column(db.Integer, primary_key=True)
+    vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicles.vehicle_id', ondelete='CASCADE'), nullable=False)
+    recorded_at = db.Column(db.DateTime, nullable=False)
+    odometer = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<OdometerReading {self.vehicle_id}: {self.odometer} @ {self.recorded_at}>'
+
+    def to_dict(self):
+        return {
+            'reading_id': self.reading_id,
+            'vehicle_id': self.vehicle_id,
+            'recorded_at': self.recorded_at.isoformat() if self.recorded_at else None,
+            'odometer': self.odometer
+        }
@@ -0,0 +1,47 @@
+from src.models.database import db
+from datetime import datetime
+
+class OutboxMessage(db.Model):
+    """E-mail čekající na odeslání (outbox)
+
+    Řádek vzniká v téže transakci jako změna, která ho vyvolala, odesílá ho
+    až services.mail na pozadí. claim_token a claimed_until brání tomu, aby
+    stejnou zprávu odeslaly dva workery; dedupe_key zabrání opakovanému
+    zařazení téhož souhrnu.
+    """
+    __tablename__ = 'mail_outbox'
+    __table_args__ = (
+        db.Index('ix_mail_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
+
+    message_id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    recipient = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    dedupe_key = db.Column(db.String(255), unique=True, nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claim_token = db.Column(db.String(36), nullable=True, index=True)
+    claimed_until = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<OutboxMessage {self.message_id}: {self.kind} -> {self.recipient} ({self.status})>'
+
+    def to_dict(self):
+        return {
+            'message_id': self.message_id,
+            'kind': self.kind,
+            'recipient': self.recipient,
+            'subject': self.subject,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None
+        }
@@ -0,0 +1,18 @@
+from src.models.database import db
+
+class RateLimitBucket(db.Model):
+    """Sdílený token bucket pro omezení počtu požadavků (RATE_LIMIT_BACKEND=database)
+
+    Jeden řádek na uživatele (nebo IP) a třídu endpointu. updated_at je unixový
+    čas v sekundách, aby se doplnění tokenů dalo spočítat v jednom UPDATE na
+    PostgreSQL i SQLite; allowed nese výsledek posledního odběru.
+    """
+    __tablename__ = 'rate_limit_buckets'
+
+    bucket_key = db.Column(db.String(200), primary_key=True)
+    tokens = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.Float, nullable=False, index=True)
+    allowed = db.Column(db.Boolean, nullable=False)
+
+    def __repr__(self):
+        return f'<RateLimitBucket {self.bucket_key}: {self.tokens:.1f}>'
@@ -3,6 +3,14 @@ from datetime import datetime
 
 class Reservation(BaseModel):
     __tablename__ = 'reservations'
+    __table_args__ = (
+        db.Index('ix_reservations_updated_at', 'updated_at'),
+        # Kalendář a seznamy pobočky filtrují přes vozidla pobočky
+        db.Index('ix_reservations_vehicle_id_start_time', 'vehicle_id', 'start_time'),
+        # Bez AUTOINCREMENT by SQLite po archivaci nejnovějších řádků znovu přidělil
+        # jejich reservation_id, které už leží v reservations_archive
+        {'sqlite_autoincrement': True},
+    )
     
     reservation_id = db.Column(db.Integer, primary_key=True)
     vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicles.vehicle_id'), nullable=False)
@@ -46,6 +54,19 @@ class Reservation(BaseModel):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
     
+    def to_calendar_event(self):
+        """Serializace rezervace do formátu událostí kalendáře"""
+        return {
+            'id': self.reservation_id,
+            'title': f'{self.vehicle.license_plate} - {self.user.first_name} {self.user.last_name}',
+            'start': self.start_time.isoformat(),
+            'end': self.end_time.isoformat(),
+            'vehicle_id': self.vehicle_id,
+            'user_id': self.user_id,
+            'purpose': self.purpose,
+            'destination': self.destination
+        }
+    
     def is_active(self):
         """Kontrola, zda je rezervace aktuálně aktivní (potvrzená a neprošlá)"""
         return self.status == 'Confirmed' and self.end_time > datetime.utcnow()
@@ -0,0 +1,28 @@
+from src.models.database import db, BaseModel
+
+class RevokedToken(BaseModel):
+    """Zneplatněné JWT tokeny
+
+    Záznam s jti zneplatní jeden token (odhlášení). Záznam bez jti zneplatní
+    všechny tokeny uživatele vydané do revoked_at (deaktivace účtu). Řádky po
+    expires_at už nic neblokují a mažou se.
+    """
+    __tablename__ = 'revoked_tokens'
+
+    revocation_id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(64), unique=True, nullable=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id', ondelete='CASCADE'), nullable=True, index=True)
+    revoked_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<RevokedToken {self.jti or "user:" + str(self.user_id)}>'
+
+    def to_dict(self):
+        return {
+            'revocation_id': self.revocation_id,
+            'jti': self.jti,
+            'user_id': self.user_id,
+            'revoked_at': self.revoked_at.isoformat() if self.revoked_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None
+        }
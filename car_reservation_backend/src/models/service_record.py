@@ -2,6 +2,9 @@ from src.models.database import db, BaseModel
 
 class ServiceRecord(BaseModel):
     __tablename__ = 'service_records'
+    __table_args__ = (
+        db.Index('ix_service_records_updated_at', 'updated_at'),
+    )
     
     service_id = db.Column(db.Integer, primary_key=True)
     vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicles.vehicle_id'), nullable=False)
@@ -0,0 +1,29 @@
+from src.models.database import db
+from datetime import datetime
+
+class Tombstone(db.Model):
+    """Záznam o smazaném řádku pro rozdílovou synchronizaci (?since=)
+
+    Smazaný řádek už nemá updated_at, podle kterého by se klient dozvěděl
+    o změně, proto se při mazání zapíše sem. Zapisuje services.sync v téže
+    transakci jako samotné smazání.
+    """
+    __tablename__ = 'tombstones'
+    __table_args__ = (
+        db.Index('ix_tombstones_entity_type_deleted_at', 'entity_type', 'deleted_at'),
+    )
+
+    tombstone_id = db.Column(db.Integer, primary_key=True)
+    entity_type = db.Column(db.String(50), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<Tombstone {self.entity_type} {self.entity_id}>'
+
+    def to_dict(self):
+        return {
+            'id': self.entity_id,
+            'reason': 'deleted',
+            'deleted_at': self.deleted_at.isoformat() if self.deleted_at else None
+        }
@@ -1,7 +1,14 @@
 from src.models.database import db, BaseModel
+from datetime import datetime, time, timedelta
 
 class Vehicle(BaseModel):
     __tablename__ = 'vehicles'
+    __table_args__ = (
+        db.Index('ix_vehicles_updated_at', 'updated_at'),
+        # Seznamy a dostupnost v rámci pobočky, otisk pro cache seznamu vozidel pobočky
+        db.Index('ix_vehicles_location_id_status', 'location_id', 'status'),
+        db.Index('ix_vehicles_location_id_updated_at', 'location_id', 'updated_at'),
+    )
     
     vehicle_id = db.Column(db.Integer, primary_key=True)
     make = db.Column(db.String(100), nullable=False)
@@ -20,6 +27,10 @@ class Vehicle(BaseModel):
     highway_vignette_expiry_date = db.Column(db.Date, nullable=True)
     emission_inspection_expiry_date = db.Column(db.Date, nullable=True)
     entry_permissions_notes = db.Column(db.Text, nullable=True)
+    location_id = db.Column(db.Integer, db.ForeignKey('locations.location_id'), nullable=True)
+    
+    # Počet dní blokovaných pro plánovaný servis od next_service_date
+    SERVICE_WINDOW_DAYS = 1
     
     # Vztahy
     reservations = db.relationship('Reservation', backref='vehicle', lazy=True)
@@ -48,16 +59,44 @@ class Vehicle(BaseModel):
             'highway_vignette_expiry_date': self.highway_vignette_expiry_date.isoformat() if self.highway_vignette_expiry_date else None,
             'emission_inspection_expiry_date': self.emission_inspection_expiry_date.isoformat() if self.emission_inspection_expiry_date else None,
             'entry_permissions_notes': self.entry_permissions_notes,
+            'location_id': self.location_id,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
     
+    def service_window(self):
+        """Blokovaný termín plánovaného servisu (celý den next_service_date)
+        
+        Servis po termínu blokuje okno SERVICE_WINDOW_DAYS od dneška, dokud se
+        nezapíše servisní záznam a plán se nepřepočítá; vzdálenější termíny
+        zůstávají rezervovatelné.
+        """
+        if not self.next_service_date:
+            return None
+        start = datetime.combine(self.next_service_date, time.min)
+        today = datetime.combine(datetime.utcnow().date(), time.min)
+        if start + timedelta(days=self.SERVICE_WINDOW_DAYS) <= today:
+            start = today
+        return start, start + timedelta(days=self.SERVICE_WINDOW_DAYS)
+    
+    def overlaps_service_window(self, start_time, end_time):
+        window = self.service_window()
+        if not window:
+            return False
+        start_time = start_time.replace(tzinfo=None)
+        end_time = end_time.replace(tzinfo=None)
+        return window[0] < end_time and window[1] > start_time
+    
     def is_available(self, start_time, end_time, exclude_reservation_id=None):
         """Kontrola dostupnosti vozidla pro zadané časové období"""
         from src.models.reservation import Reservation
         
         if self.status != 'Active':
             return False
+        
+        # Vozidlo je v termínu plánovaného servisu
+        if self.overlaps_service_window(start_time, end_time):
+            return False
             
         # Kontrola překrývajících se rezervací
         query = Reservation.query.filter(
@@ -0,0 +1,55 @@
+from src.models.database import db
+
+class VehicleCostSummary(db.Model):
+    """Náklady vozidla za měsíc (servis a poškození)
+
+    Agregát udržuje services.costs v téže transakci jako zápisy servisních
+    záznamů a poškození; month je první den měsíce. U poškození se počítá
+    actual_cost, a dokud není známa, estimated_cost.
+    """
+    __tablename__ = 'vehicle_cost_summary'
+
+    vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicles.vehicle_id', ondelete='CASCADE'), primary_key=True)
+    month = db.Column(db.Date, primary_key=True)
+    service_cost = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    damage_cost = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    service_count = db.Column(db.Integer, nullable=False, default=0)
+    damage_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<VehicleCostSummary {self.vehicle_id} {self.month}>'
+
+    def to_dict(self):
+        return {
+            'month': self.month.isoformat() if self.month else None,
+            'service_cost': float(self.service_cost or 0),
+            'damage_cost': float(self.damage_cost or 0),
+            'total_cost': float((self.service_cost or 0) + (self.damage_cost or 0)),
+            'service_count': self.service_count,
+            'damage_count': self.damage_count
+        }
+
+
+class VehicleCostTotal(db.Model):
+    """Celkové náklady vozidla za celou dobu (jeden řádek na vozidlo pro žebříček)"""
+    __tablename__ = 'vehicle_cost_totals'
+
+    vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicles.vehicle_id', ondelete='CASCADE'), primary_key=True)
+    service_cost = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    damage_cost = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    total_cost = db.Column(db.Numeric(12, 2), nullable=False, default=0, index=True)
+    service_count = db.Column(db.Integer, nullable=False, default=0)
+    damage_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<VehicleCostTotal {self.vehicle_id}: {self.total_cost}>'
+
+    def to_dict(self):
+        return {
+            'vehicle_id': self.vehicle_id,
+            'service_cost': float(self.service_cost or 0),
+            'damage_cost': float(self.damage_cost or 0),
+            'total_cost': float(self.total_cost or 0),
+            'service_count': self.service_count,
+            'damage_count': self.damage_count
+        }
@@ -0,0 +1,54 @@
+from src.models.database import db, BaseModel
+
+class WaitlistEntry(BaseModel):
+    """Čekatel na vozidlo pro termín, který byl při rezervaci obsazený
+
+    vehicle_id je volitelný; bez něj stačí libovolné vozidlo splňující
+    požadavky (palivo, převodovka, počet cestujících). Po uvolnění kapacity
+    services.waitlist vytvoří rezervaci prvnímu vhodnému čekateli a záznam
+    přejde do stavu Assigned.
+    """
+    __tablename__ = 'waitlist_entries'
+    __table_args__ = (
+        # Hledání čekatelů s termínem překrývajícím uvolněné okno
+        db.Index('ix_waitlist_entries_status_start_time', 'status', 'start_time', 'end_time'),
+        db.Index('ix_waitlist_entries_user_id', 'user_id'),
+    )
+    
+    waitlist_id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
+    vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicles.vehicle_id'), nullable=True)
+    start_time = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime, nullable=False)
+    purpose = db.Column(db.String(255), nullable=False)
+    destination = db.Column(db.String(255), nullable=False)
+    number_of_passengers = db.Column(db.Integer, nullable=True)
+    fuel_type = db.Column(db.String(50), nullable=True)
+    transmission_type = db.Column(db.String(50), nullable=True)
+    user_notes = db.Column(db.Text, nullable=True)
+    status = db.Column(db.String(50), nullable=False, default='Waiting')
+    reservation_id = db.Column(db.Integer, db.ForeignKey('reservations.reservation_id'), nullable=True)
+    assigned_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<WaitlistEntry {self.waitlist_id}: {self.start_time} - {self.end_time} ({self.status})>'
+    
+    def to_dict(self):
+        return {
+            'waitlist_id': self.waitlist_id,
+            'user_id': self.user_id,
+            'vehicle_id': self.vehicle_id,
+            'start_time': self.start_time.isoformat() if self.start_time else None,
+            'end_time': self.end_time.isoformat() if self.end_time else None,
+            'purpose': self.purpose,
+            'destination': self.destination,
+            'number_of_passengers': self.number_of_passengers,
+            'fuel_type': self.fuel_type,
+            'transmission_type': self.transmission_type,
+            'user_notes': self.user_notes,
+            'status': self.status,
+            'reservation_id': self.reservation_id,
+            'assigned_at': self.assigned_at.isoformat() if self.assigned_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -0,0 +1,30 @@
+import os
+
+from flask import Blueprint, jsonify, current_app
+from flask_jwt_extended import jwt_required
+from src.models.database import db
+from src.services.locations import require_admin
+from src.services.pool import get_pool_status
+
+admin_bp = Blueprint('admin', __name__)
+
+@admin_bp.route('/pool', methods=['GET'])
+@jwt_required()
+def get_pool_stats():
+    """Live connection pool stats of this worker process (admin only)"""
+    admin_check = require_admin(all_locations=True)
+    if admin_check:
+        return admin_check
+    
+    options = current_app.config['SQLALCHEMY_ENGINE_OPTIONS']
+    configured = {key: value for key, value in options.items() if key not in ('poolclass', 'connect_args')}
+    
+    engines = {}
+    for bind_key, engine in db.engines.items():
+        engines[bind_key or 'primary'] = get_pool_status(engine)
+    
+    return jsonify({
+        'pid': os.getpid(),
+        'configured': configured,
+        'engines': engines
+    }), 200
@@ -0,0 +1,58 @@
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required
+from src.models.audit_entry import AuditEntry
+from src.services.locations import require_admin
+from src.services.replicas import use_replica
+from src.services.telemetry import parse_timestamp
+
+audit_bp = Blueprint('audit', __name__)
+
+@audit_bp.route('/audit', methods=['GET'])
+@jwt_required()
+@use_replica
+def get_audit_log():
+    """Audit trail of changes, newest first (admin only)
+
+    Filters: entity_type, entity_id, actor_id, action, from, to (ISO datetime).
+    Paging is keyset-based: pass the returned next_before_id as before_id.
+    """
+    admin_check = require_admin(all_locations=True)
+    if admin_check:
+        return admin_check
+
+    try:
+        entity_id, actor_id, before_id = (
+            int(request.args[name]) if request.args.get(name) else None
+            for name in ('entity_id', 'actor_id', 'before_id')
+        )
+        limit = min(max(int(request.args.get('limit', 100)), 1), 500)
+        changed_from = parse_timestamp(request.args['from']) if request.args.get('from') else None
+        changed_to = parse_timestamp(request.args['to']) if request.args.get('to') else None
+    except ValueError:
+        return jsonify({'error': 'Invalid filter value'}), 400
+
+    query = AuditEntry.query
+
+    entity_type = request.args.get('entity_type')
+    if entity_type:
+        query = query.filter(AuditEntry.entity_type == entity_type)
+    if entity_id is not None:
+        query = query.filter(AuditEntry.entity_id == entity_id)
+    if actor_id is not None:
+        query = query.filter(AuditEntry.actor_id == actor_id)
+
+    action = request.args.get('action')
+    if action:
+        query = query.filter(AuditEntry.action == action)
+    if changed_from:
+        query = query.filter(AuditEntry.changed_at >= changed_from)
+    if changed_to:
+        query = query.filter(AuditEntry.changed_at < changed_to)
+    if before_id:
+        query = query.filter(AuditEntry.audit_id < before_id)
+
+    entries = query.order_by(AuditEntry.audit_id.desc()).limit(limit).all()
+    return jsonify({
+        'entries': [entry.to_dict() for entry in entries],
+        'next_before_id': entries[-1].audit_id if len(entries) == limit else None
+    }), 200
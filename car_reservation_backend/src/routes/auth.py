@@ -1,8 +1,11 @@
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt
 from src.models.database import db
 from src.models.app_user import AppUser
-from src.models.role import Role
+from src.services.accounts import get_or_create_user
+from src.services.suggest import index_user
+from src.services.revocation import revoke_token
+import time
 from datetime import timedelta
 
 auth_bp = Blueprint('auth', __name__)
@@ -20,51 +23,26 @@ def login():
     
     intranet_id = data['intranet_id']
     
-    # Pokus o nalezení existujícího uživatele
-    user = AppUser.query.filter_by(intranet_id=intranet_id).first()
-    
-    # Pokud uživatel neexistuje, vytvoří se mock uživatel (v reálné implementaci by přišel z LDAP)
+    # Nalezení uživatele, případně vytvoření mock uživatele jedním INSERT ... ON CONFLICT
+    # (v reálné implementaci by údaje přišly z LDAP)
+    user, created = get_or_create_user(intranet_id)
     if not user:
-        # Získání nebo vytvoření výchozí role Employee
-        employee_role = Role.query.filter_by(role_name='Employee').first()
-        if not employee_role:
-            employee_role = Role(role_name='Employee', description='Standardní zaměstnanec se základními oprávněními pro rezervace')
-            db.session.add(employee_role)
-            db.session.commit()
-        
-        # Vytvoření mock uživatelských dat na základě intranet_id
-        if intranet_id == 'admin':
-            # Vytvoření admin uživatele
-            admin_role = Role.query.filter_by(role_name='Fleet Administrator').first()
-            if not admin_role:
-                admin_role = Role(role_name='Fleet Administrator', description='Administrátor s plným přístupem ke správě vozového parku')
-                db.session.add(admin_role)
-                db.session.commit()
-            
-            user = AppUser(
-                intranet_id=intranet_id,
-                first_name='Admin',
-                last_name='Uživatel',
-                email='admin@company.com',
-                role_id=admin_role.role_id
-            )
-        else:
-            # Vytvoření běžného zaměstnance
-            user = AppUser(
-                intranet_id=intranet_id,
-                first_name='Jan',
-                last_name='Novák',
-                email=f'{intranet_id}@company.com',
-                role_id=employee_role.role_id
-            )
-        
-        db.session.add(user)
-        db.session.commit()
+        return jsonify({'error': 'Uživatele nelze vytvořit, e-mail je již použit jiným účtem'}), 409
+    
+    if created:
+        index_user(user)
+    
+    # Deaktivovaný účet nesmí získat nový token
+    if not user.is_active:
+        return jsonify({'error': 'Uživatelský účet je deaktivován'}), 403
     
     # Vytvoření JWT tokenu
     access_token = create_access_token(
         identity=str(user.user_id),
-        expires_delta=timedelta(hours=8)
+        expires_delta=timedelta(hours=8),
+        # iat má jen celé sekundy; přesný čas vydání rozliší token vydaný
+        # ve stejné sekundě jako zneplatnění tokenů uživatele
+        additional_claims={'issued_at': time.time()}
     )
     
     return jsonify({
@@ -87,6 +65,9 @@ def get_current_user():
 @auth_bp.route('/logout', methods=['POST'])
 @jwt_required()
 def logout():
-    """Odhlašovací endpoint (v reálné implementaci by zneplatnil token)"""
+    """Odhlašovací endpoint - zneplatní použitý token"""
+    revoke_token(get_jwt())
+    db.session.commit()
+    
     return jsonify({'message': 'Úspěšně odhlášen'}), 200
 
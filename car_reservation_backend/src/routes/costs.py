@@ -0,0 +1,41 @@
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required
+from src.models.vehicle import Vehicle
+from src.services.costs import vehicle_costs, cost_ranking
+from src.services.replicas import use_replica
+
+costs_bp = Blueprint('costs', __name__)
+
+def get_year_arg():
+    year = request.args.get('year')
+    return int(year) if year else None
+
+@costs_bp.route('/vehicles/<int:vehicle_id>/costs', methods=['GET'])
+@jwt_required()
+@use_replica
+def get_vehicle_costs(vehicle_id):
+    """Cost of ownership of a vehicle: totals and monthly breakdown (optionally for one year)"""
+    Vehicle.query.get_or_404(vehicle_id)
+
+    try:
+        year = get_year_arg()
+    except ValueError:
+        return jsonify({'error': 'year must be an integer'}), 400
+
+    return jsonify(vehicle_costs(vehicle_id, year)), 200
+
+@costs_bp.route('/costs/ranking', methods=['GET'])
+@jwt_required()
+@use_replica
+def get_cost_ranking():
+    """Fleet-wide ranking of vehicles by total cost (optionally for one year)"""
+    try:
+        year = get_year_arg()
+        limit = min(max(int(request.args.get('limit', 20)), 1), 500)
+    except ValueError:
+        return jsonify({'error': 'year and limit must be integers'}), 400
+
+    return jsonify({
+        'year': year,
+        'ranking': cost_ranking(limit, year)
+    }), 200
@@ -1,29 +1,44 @@
-from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+import os
+
+from flask import Blueprint, jsonify, request, send_from_directory, current_app
+from flask_jwt_extended import jwt_required
+from sqlalchemy.orm import selectinload
 from src.models.database import db
 from src.models.damage_record import DamageRecord
 from src.models.vehicle import Vehicle
-from src.models.app_user import AppUser
+from src.services.locations import require_admin
+from src.services.replicas import use_replica
+from src.services.sync import delta_response
+from src.services.telemetry import parse_timestamp
+from src.services.photo_storage import (
+    InvalidPhotoError, store_multipart, store_stream, get_photos_dir, get_thumbnails_dir,
+    thumbnail_path, thumbnail_relative_path
+)
+from src.services.idempotency import idempotent
 from datetime import datetime
 
 damage_records_bp = Blueprint('damage_records', __name__)
 
-def require_admin():
-    """Helper function to check if current user is admin"""
-    user_id = get_jwt_identity()
-    user = AppUser.query.get(user_id)
-    if not user or not user.is_admin():
-        return jsonify({'error': 'Admin access required'}), 403
-    return None
+PHOTO_MAX_AGE = 365 * 24 * 3600
 
 @damage_records_bp.route('/damage-records', methods=['GET'])
 @jwt_required()
+@use_replica
 def get_damage_records():
-    """Get damage records with optional filtering"""
+    """Get damage records with optional filtering
+
+    With ?since=<watermark> only records changed after the watermark are
+    returned, together with tombstones for deleted ones.
+    """
     vehicle_id = request.args.get('vehicle_id')
     repair_status = request.args.get('repair_status')
+    since = request.args.get('since')
     
-    query = DamageRecord.query
+    # Fotografie a vozidla všech záznamů se načtou hromadně, ne po jednom řádku
+    query = DamageRecord.query.options(
+        selectinload(DamageRecord.photos),
+        selectinload(DamageRecord.vehicle)
+    )
     
     if vehicle_id:
         query = query.filter_by(vehicle_id=int(vehicle_id))
@@ -31,6 +46,14 @@ def get_damage_records():
     if repair_status:
         query = query.filter_by(repair_status=repair_status)
     
+    if since:
+        try:
+            since = parse_timestamp(since)
+        except ValueError:
+            return jsonify({'error': 'Invalid since format. Use ISO datetime'}), 400
+        lag = current_app.config['SYNC_WATERMARK_LAG_SECONDS']
+        return jsonify(delta_response(DamageRecord, query, DamageRecord.query, since, lag)), 200
+    
     damage_records = query.order_by(DamageRecord.date_of_damage.desc()).all()
     return jsonify([record.to_dict() for record in damage_records]), 200
 
@@ -43,6 +66,7 @@ def get_damage_record(damage_id):
 
 @damage_records_bp.route('/damage-records', methods=['POST'])
 @jwt_required()
+@idempotent
 def create_damage_record():
     """Create new damage record (admin only)"""
     admin_check = require_admin()
@@ -62,6 +86,10 @@ def create_damage_record():
     if not vehicle:
         return jsonify({'error': 'Vehicle not found'}), 404
     
+    admin_check = require_admin(vehicle.location_id)
+    if admin_check:
+        return admin_check
+    
     try:
         # Parse damage date
         damage_date = datetime.strptime(data['date_of_damage'], '%Y-%m-%d').date()
@@ -77,8 +105,7 @@ def create_damage_record():
         
         # Handle photos if provided
         if data.get('photos') and isinstance(data['photos'], list):
-            import json
-            damage_record.photos = json.dumps(data['photos'])
+            damage_record.set_photos(data['photos'])
         
         db.session.add(damage_record)
         db.session.commit()
@@ -100,6 +127,10 @@ def update_damage_record(damage_id):
         return admin_check
     
     damage_record = DamageRecord.query.get_or_404(damage_id)
+    admin_check = require_admin(damage_record.vehicle.location_id)
+    if admin_check:
+        return admin_check
+    
     data = request.get_json()
     
     try:
@@ -121,10 +152,9 @@ def update_damage_record(damage_id):
         # Handle photos update
         if 'photos' in data:
             if data['photos'] and isinstance(data['photos'], list):
-                import json
-                damage_record.photos = json.dumps(data['photos'])
+                damage_record.set_photos(data['photos'])
             else:
-                damage_record.photos = None
+                damage_record.set_photos([])
         
         db.session.commit()
         return jsonify(damage_record.to_dict()), 200
@@ -144,6 +174,10 @@ def delete_damage_record(damage_id):
         return admin_check
     
     damage_record = DamageRecord.query.get_or_404(damage_id)
+    admin_check = require_admin(damage_record.vehicle.location_id)
+    if admin_check:
+        return admin_check
+    
     db.session.delete(damage_record)
     db.session.commit()
     
@@ -151,9 +185,76 @@ def delete_damage_record(damage_id):
 
 @damage_records_bp.route('/vehicles/<int:vehicle_id>/damage-records', methods=['GET'])
 @jwt_required()
+@use_replica
 def get_vehicle_damage_records(vehicle_id):
     """Get all damage records for a specific vehicle"""
     vehicle = Vehicle.query.get_or_404(vehicle_id)
-    damage_records = DamageRecord.query.filter_by(vehicle_id=vehicle_id).order_by(DamageRecord.date_of_damage.desc()).all()
+    damage_records = DamageRecord.query.options(selectinload(DamageRecord.photos)).filter_by(vehicle_id=vehicle_id).order_by(DamageRecord.date_of_damage.desc()).all()
     return jsonify([record.to_dict() for record in damage_records]), 200
 
+@damage_records_bp.route('/damage-records/<int:damage_id>/photos', methods=['POST'])
+@jwt_required()
+def upload_damage_photos(damage_id):
+    """Upload damage photos (admin only)
+
+    Accepts either multipart/form-data with one or more files or a single
+    image as the raw request body (Content-Type: image/*). Files are streamed
+    to disk and stored under their SHA-256 hash, so re-uploads are deduplicated.
+    """
+    admin_check = require_admin()
+    if admin_check:
+        return admin_check
+    
+    damage_record = DamageRecord.query.get_or_404(damage_id)
+    admin_check = require_admin(damage_record.vehicle.location_id)
+    if admin_check:
+        return admin_check
+    
+    try:
+        if request.mimetype == 'multipart/form-data':
+            stored_photos = store_multipart(request)
+        elif request.mimetype.startswith('image/'):
+            stored_photos = [store_stream(request.stream)]
+        else:
+            return jsonify({'error': 'Use multipart/form-data or an image/* request body'}), 415
+    except InvalidPhotoError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if not stored_photos:
+        return jsonify({'error': 'No photos uploaded'}), 400
+    
+    for stored_photo in stored_photos:
+        damage_record.add_photo(stored_photo.path, sha256=stored_photo.sha256, size=stored_photo.size)
+    # Nové fotografie mění to_dict() záznamu, změna se musí projevit i v ?since=
+    damage_record.updated_at = datetime.utcnow()
+    
+    db.session.commit()
+    
+    return jsonify({
+        'uploaded': [{
+            'path': stored_photo.path,
+            'sha256': stored_photo.sha256,
+            'size': stored_photo.size,
+            'content_type': stored_photo.content_type,
+            'deduplicated': not stored_photo.created
+        } for stored_photo in stored_photos],
+        'damage_record': damage_record.to_dict()
+    }), 201
+
+@damage_records_bp.route('/damage-photos/<path:photo_path>', methods=['GET'])
+@jwt_required()
+def get_damage_photo(photo_path):
+    """Serve a stored damage photo or its thumbnail (?thumbnail=1)
+
+    Supports Range requests and conditional GET; the file body is passed to
+    the server's file wrapper (sendfile) instead of being read in Python.
+    """
+    # Obsah pod hashem se nikdy nemění, může se cachovat natrvalo
+    if request.args.get('thumbnail'):
+        sha256 = os.path.splitext(os.path.basename(photo_path))[0]
+        if os.path.exists(thumbnail_path(sha256)):
+            return send_from_directory(get_thumbnails_dir(), thumbnail_relative_path(sha256), max_age=PHOTO_MAX_AGE)
+        # Náhled se ještě generuje, vrací se originál bez dlouhodobé cache
+        return send_from_directory(get_photos_dir(), photo_path)
+    
+    return send_from_directory(get_photos_dir(), photo_path, max_age=PHOTO_MAX_AGE)
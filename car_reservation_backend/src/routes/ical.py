@@ -0,0 +1,75 @@
+from flask import Blueprint, Response, jsonify, request, url_for
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from src.models.vehicle import Vehicle
+from src.models.app_user import AppUser
+from src.services.replicas import use_replica
+from src.services.ical import feed_token, load_feed_token, feed_etag, cached_feed
+
+ical_bp = Blueprint('ical', __name__)
+
+FEED_CACHE_CONTROL = 'private, max-age=300'
+
+@ical_bp.route('/ical/feeds', methods=['GET'])
+@jwt_required()
+def get_feed_urls():
+    """Subscription URLs for the current user's feed and optionally a vehicle feed"""
+    user_id = int(get_jwt_identity())
+    feeds = {
+        'user_feed': url_for('ical.get_user_feed', token=feed_token('user', user_id, user_id), _external=True)
+    }
+
+    vehicle_id = request.args.get('vehicle_id')
+    if vehicle_id:
+        try:
+            vehicle = Vehicle.query.get(int(vehicle_id))
+        except ValueError:
+            return jsonify({'error': 'vehicle_id must be an integer'}), 400
+        if not vehicle:
+            return jsonify({'error': 'Vehicle not found'}), 404
+        token = feed_token('vehicle', vehicle.vehicle_id, user_id)
+        feeds['vehicle_feed'] = url_for('ical.get_vehicle_feed', token=token, _external=True)
+
+    return jsonify(feeds), 200
+
+def feed_response(feed_type, token):
+    """Serve a feed for a signed token, answering 304 while its version is unchanged"""
+    payload = load_feed_token(token)
+    if not payload or payload[0] != feed_type:
+        return jsonify({'error': 'Calendar feed not found'}), 404
+
+    _, entity_id, owner_id = payload
+    owner = AppUser.query.get(owner_id)
+    if not owner or not owner.is_active:
+        return jsonify({'error': 'Calendar feed not found'}), 404
+
+    etag = feed_etag(feed_type, entity_id)
+    if etag in request.if_none_match:
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = FEED_CACHE_CONTROL
+        return response
+
+    if feed_type == 'user':
+        name = f'Rezervace vozidel - {owner.first_name} {owner.last_name}'
+    else:
+        vehicle = Vehicle.query.get(entity_id)
+        if not vehicle:
+            return jsonify({'error': 'Calendar feed not found'}), 404
+        name = f'{vehicle.license_plate} - {vehicle.make} {vehicle.model}'
+
+    response = Response(cached_feed(feed_type, entity_id, name, etag), mimetype='text/calendar')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = FEED_CACHE_CONTROL
+    return response
+
+@ical_bp.route('/ical/users/<token>.ics', methods=['GET'])
+@use_replica
+def get_user_feed(token):
+    """iCalendar feed of a user's reservations (authenticated by the signed token)"""
+    return feed_response('user', token)
+
+@ical_bp.route('/ical/vehicles/<token>.ics', methods=['GET'])
+@use_replica
+def get_vehicle_feed(token):
+    """iCalendar feed of a vehicle's reservations (authenticated by the signed token)"""
+    return feed_response('vehicle', token)
@@ -0,0 +1,54 @@
+import csv
+
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from src.models.database import db
+from src.models.app_user import AppUser
+from src.services.importer import import_vehicles, import_users
+from src.services.locations import require_admin
+from src.services.suggest import get_suggest_index
+
+imports_bp = Blueprint('imports', __name__)
+
+def get_csv_stream():
+    """CSV either as the raw request body (text/csv) or as the 'file' field of a multipart upload"""
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('file')
+        return upload.stream if upload else None
+    return request.stream
+
+def run_import(importer):
+    # Each row is checked against the admin's locations (see check_admin_scope)
+    admin_check = require_admin()
+    if admin_check:
+        return admin_check
+    admin = AppUser.query.get(get_jwt_identity())
+
+    stream = get_csv_stream()
+    if stream is None:
+        return jsonify({'error': 'CSV file is required'}), 400
+
+    try:
+        report = importer(stream, admin)
+    except (UnicodeDecodeError, ValueError, csv.Error) as e:
+        db.session.rollback()
+        return jsonify({'error': f'Invalid CSV: {e}'}), 400
+
+    # Imported rows bypass the per-row index updates
+    index = get_suggest_index()
+    if index and report.created:
+        index.rebuild()
+
+    return jsonify(report.to_dict()), 200
+
+@imports_bp.route('/import/vehicles', methods=['POST'])
+@jwt_required()
+def import_vehicles_csv():
+    """Bulk import vehicles from CSV (admin of each row's location_id, default the admin's own)"""
+    return run_import(import_vehicles)
+
+@imports_bp.route('/import/users', methods=['POST'])
+@jwt_required()
+def import_users_csv():
+    """Bulk import users from CSV (admin of each row's location_id; a role column needs an admin of all locations)"""
+    return run_import(import_users)
@@ -0,0 +1,58 @@
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required
+from src.models.database import db
+from src.models.location import Location
+from src.services.locations import require_admin
+
+locations_bp = Blueprint('locations', __name__)
+
+@locations_bp.route('/locations', methods=['GET'])
+@jwt_required()
+def get_locations():
+    """Get all locations"""
+    locations = Location.query.order_by(Location.name).all()
+    return jsonify([location.to_dict() for location in locations]), 200
+
+@locations_bp.route('/locations', methods=['POST'])
+@jwt_required()
+def create_location():
+    """Create new location (admin of all locations only)"""
+    admin_check = require_admin(all_locations=True)
+    if admin_check:
+        return admin_check
+
+    data = request.get_json() or {}
+
+    if not data.get('name'):
+        return jsonify({'error': 'name is required'}), 400
+
+    if Location.query.filter_by(name=data['name']).first():
+        return jsonify({'error': 'Location with this name already exists'}), 400
+
+    location = Location(name=data['name'], address=data.get('address'))
+    db.session.add(location)
+    db.session.commit()
+
+    return jsonify(location.to_dict()), 201
+
+@locations_bp.route('/locations/<int:location_id>', methods=['PUT'])
+@jwt_required()
+def update_location(location_id):
+    """Update location (admin of the location)"""
+    admin_check = require_admin(location_id)
+    if admin_check:
+        return admin_check
+
+    location = Location.query.get_or_404(location_id)
+    data = request.get_json() or {}
+
+    if data.get('name') and data['name'] != location.name:
+        if Location.query.filter_by(name=data['name']).first():
+            return jsonify({'error': 'Location with this name already exists'}), 400
+        location.name = data['name']
+
+    if 'address' in data:
+        location.address = data['address']
+
+    db.session.commit()
+    return jsonify(location.to_dict()), 200
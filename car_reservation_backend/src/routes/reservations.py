@@ -1,56 +1,103 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.database import db
 from src.models.reservation import Reservation
 from src.models.vehicle import Vehicle
 from src.models.app_user import AppUser
+from src.services.replicas import use_replica
+from src.services.sync import delta_response
+from src.services.telemetry import parse_timestamp
+from src.services.archive import archived_reservations
+from src.models.archived_reservation import ArchivedReservation
+from src.services.idempotency import idempotent
+from src.services.slots import suggest_slots
+from src.services.locations import resolve_location, at_location
 from datetime import datetime
 
 reservations_bp = Blueprint('reservations', __name__)
 
 @reservations_bp.route('/reservations', methods=['GET'])
 @jwt_required()
+@use_replica
 def get_reservations():
-    """Get reservations (all for admin, own for regular users)"""
+    """Get reservations (all for admin, own for regular users)
+
+    With ?since=<watermark> only reservations changed after the watermark are
+    returned, together with tombstones for cancelled ones. Without it, rows
+    moved to the archive are included when start_date reaches back into the
+    archive or ?include_archived=true is given. Admins see their home
+    location's reservations unless ?location_id= says otherwise.
+    """
     user_id = get_jwt_identity()
     user = AppUser.query.get(user_id)
     
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
-    query = Reservation.query
-    
-    # If not admin, only show user's own reservations
-    if not user.is_admin():
-        query = query.filter_by(user_id=user_id)
-    
     # Optional filtering
     vehicle_id = request.args.get('vehicle_id')
     status = request.args.get('status')
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
+    since = request.args.get('since')
+    include_archived = request.args.get('include_archived', 'false').lower() == 'true'
+    start_dt = end_dt = None
     
-    if vehicle_id:
-        query = query.filter_by(vehicle_id=int(vehicle_id))
-    
-    if status:
-        query = query.filter_by(status=status)
+    # Own reservations are few, the default location filter only narrows the admin view
+    try:
+        location_id = resolve_location(request.args.get('location_id'), user.location_id if user.is_admin() else None)
+    except ValueError:
+        return jsonify({'error': 'Invalid location_id'}), 400
     
     if start_date:
         try:
             start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-            query = query.filter(Reservation.start_time >= start_dt)
         except ValueError:
             return jsonify({'error': 'Invalid start_date format. Use YYYY-MM-DD'}), 400
     
     if end_date:
         try:
             end_dt = datetime.strptime(end_date, '%Y-%m-%d')
-            query = query.filter(Reservation.end_time <= end_dt)
         except ValueError:
             return jsonify({'error': 'Invalid end_date format. Use YYYY-MM-DD'}), 400
     
-    reservations = query.order_by(Reservation.start_time.desc()).all()
+    def scoped_query(model):
+        query = model.query
+        # If not admin, only show user's own reservations
+        if not user.is_admin():
+            query = query.filter_by(user_id=user_id)
+        return query
+    
+    def filtered_query(model):
+        query = scoped_query(model)
+        if vehicle_id:
+            query = query.filter_by(vehicle_id=int(vehicle_id))
+        if location_id is not None:
+            query = query.filter(at_location(model, location_id))
+        if status:
+            query = query.filter_by(status=status)
+        if start_dt:
+            query = query.filter(model.start_time >= start_dt)
+        if end_dt:
+            query = query.filter(model.end_time <= end_dt)
+        return query
+    
+    if since:
+        try:
+            since = parse_timestamp(since)
+        except ValueError:
+            return jsonify({'error': 'Invalid since format. Use ISO datetime'}), 400
+        lag = current_app.config['SYNC_WATERMARK_LAG_SECONDS']
+        return jsonify(delta_response(
+            Reservation, filtered_query(Reservation), scoped_query(Reservation), since, lag
+        )), 200
+    
+    reservations = filtered_query(Reservation).order_by(Reservation.start_time.desc()).all()
+    
+    # Historie starší než archivační horizont je v reservations_archive
+    archived = archived_reservations(filtered_query, start_dt, include_archived)
+    if archived:
+        reservations = sorted(reservations + archived, key=lambda reservation: reservation.start_time, reverse=True)
     return jsonify([reservation.to_dict() for reservation in reservations]), 200
 
 @reservations_bp.route('/reservations/<int:reservation_id>', methods=['GET'])
@@ -60,7 +107,7 @@ def get_reservation(reservation_id):
     user_id = get_jwt_identity()
     user = AppUser.query.get(user_id)
     
-    reservation = Reservation.query.get_or_404(reservation_id)
+    reservation = Reservation.query.get(reservation_id) or ArchivedReservation.query.get_or_404(reservation_id)
     
     # Check if user can access this reservation
     if not user.is_admin() and reservation.user_id != user_id:
@@ -70,6 +117,7 @@ def get_reservation(reservation_id):
 
 @reservations_bp.route('/reservations', methods=['POST'])
 @jwt_required()
+@idempotent
 def create_reservation():
     """Create new reservation"""
     user_id = get_jwt_identity()
@@ -104,11 +152,16 @@ def create_reservation():
             return jsonify({'error': 'Vehicle not found'}), 404
         
         if not vehicle.is_available(start_time, end_time):
-            return jsonify({'error': 'Vehicle is not available for the selected time period'}), 400
+            # Nejbližší volné termíny ušetří klientovi opakované dotazy na dostupnost
+            return jsonify({
+                'error': 'Vehicle is not available for the selected time period',
+                'suggestions': suggest_slots(vehicle, start_time, end_time)
+            }), 400
         
-        # Create reservation (admin can create for other users)
+        # Create reservation (admin of the vehicle's location can create for other users)
+        is_admin = user.administers(vehicle.location_id)
         target_user_id = user_id
-        if user.is_admin() and 'user_id' in data:
+        if is_admin and 'user_id' in data:
             target_user_id = data['user_id']
             # Verify target user exists
             target_user = AppUser.query.get(target_user_id)
@@ -124,7 +177,7 @@ def create_reservation():
             destination=data['destination'],
             number_of_passengers=data.get('number_of_passengers'),
             user_notes=data.get('user_notes'),
-            admin_notes=data.get('admin_notes') if user.is_admin() else None
+            admin_notes=data.get('admin_notes') if is_admin else None
         )
         
         db.session.add(reservation)
@@ -146,13 +199,14 @@ def update_reservation(reservation_id):
     user = AppUser.query.get(user_id)
     
     reservation = Reservation.query.get_or_404(reservation_id)
+    is_admin = user.administers(reservation.vehicle.location_id)
     
     # Check permissions
-    if not user.is_admin() and reservation.user_id != user_id:
+    if not is_admin and reservation.user_id != user_id:
         return jsonify({'error': 'Access denied'}), 403
     
     # Check if user can modify (time limit check for non-admins)
-    if not user.is_admin() and not reservation.can_be_modified_by_user():
+    if not is_admin and not reservation.can_be_modified_by_user():
         return jsonify({'error': 'Reservation cannot be modified less than 2 hours before start time'}), 403
     
     data = request.get_json()
@@ -179,7 +233,10 @@ def update_reservation(reservation_id):
             # Check availability (excluding current reservation)
             vehicle = Vehicle.query.get(reservation.vehicle_id)
             if not vehicle.is_available(start_time, end_time, exclude_reservation_id=reservation_id):
-                return jsonify({'error': 'Vehicle is not available for the selected time period'}), 400
+                return jsonify({
+                    'error': 'Vehicle is not available for the selected time period',
+                    'suggestions': suggest_slots(vehicle, start_time, end_time, exclude_reservation_id=reservation_id)
+                }), 400
             
             reservation.start_time = start_time
             reservation.end_time = end_time
@@ -191,7 +248,7 @@ def update_reservation(reservation_id):
                 setattr(reservation, field, data[field])
         
         # Admin can update admin_notes and status
-        if user.is_admin():
+        if is_admin:
             if 'admin_notes' in data:
                 reservation.admin_notes = data['admin_notes']
             if 'status' in data:
@@ -214,13 +271,14 @@ def cancel_reservation(reservation_id):
     user = AppUser.query.get(user_id)
     
     reservation = Reservation.query.get_or_404(reservation_id)
+    is_admin = user.administers(reservation.vehicle.location_id)
     
     # Check permissions
-    if not user.is_admin() and reservation.user_id != user_id:
+    if not is_admin and reservation.user_id != user_id:
         return jsonify({'error': 'Access denied'}), 403
     
     # Check if user can cancel (time limit check for non-admins)
-    if not user.is_admin() and not reservation.can_be_modified_by_user():
+    if not is_admin and not reservation.can_be_modified_by_user():
         return jsonify({'error': 'Reservation cannot be cancelled less than 2 hours before start time'}), 403
     
     # Update status instead of deleting
@@ -231,11 +289,18 @@ def cancel_reservation(reservation_id):
 
 @reservations_bp.route('/calendar', methods=['GET'])
 @jwt_required()
+@use_replica
 def get_calendar_data():
-    """Get calendar data for all vehicles"""
+    """Get calendar data for the vehicles of the user's location (?location_id=all for all)"""
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     vehicle_id = request.args.get('vehicle_id')
+    user = AppUser.query.get(get_jwt_identity())
+    
+    try:
+        location_id = resolve_location(request.args.get('location_id'), user.location_id if user else None)
+    except ValueError:
+        return jsonify({'error': 'Invalid location_id'}), 400
     
     if not start_date or not end_date:
         return jsonify({'error': 'start_date and end_date parameters are required'}), 400
@@ -246,30 +311,22 @@ def get_calendar_data():
     except ValueError:
         return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
     
-    query = Reservation.query.filter(
-        Reservation.status == 'Confirmed',
-        Reservation.start_time <= end_dt,
-        Reservation.end_time >= start_dt
-    )
-    
-    if vehicle_id:
-        query = query.filter_by(vehicle_id=int(vehicle_id))
+    def calendar_query(model):
+        query = model.query.filter(
+            model.status == 'Confirmed',
+            model.start_time <= end_dt,
+            model.end_time >= start_dt
+        )
+        if vehicle_id:
+            query = query.filter_by(vehicle_id=int(vehicle_id))
+        if location_id is not None:
+            query = query.filter(at_location(model, location_id))
+        return query
     
-    reservations = query.all()
+    reservations = calendar_query(Reservation).all() + archived_reservations(calendar_query, start_dt)
     
     # Format for calendar display
-    calendar_events = []
-    for reservation in reservations:
-        calendar_events.append({
-            'id': reservation.reservation_id,
-            'title': f'{reservation.vehicle.license_plate} - {reservation.user.first_name} {reservation.user.last_name}',
-            'start': reservation.start_time.isoformat(),
-            'end': reservation.end_time.isoformat(),
-            'vehicle_id': reservation.vehicle_id,
-            'user_id': reservation.user_id,
-            'purpose': reservation.purpose,
-            'destination': reservation.destination
-        })
+    calendar_events = [reservation.to_calendar_event() for reservation in reservations]
     
     return jsonify(calendar_events), 200
 
@@ -0,0 +1,78 @@
+from flask import Blueprint, jsonify, request, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from src.models.app_user import AppUser
+from src.services.replicas import use_replica
+from src.services.search import search
+from src.services.suggest import get_suggest_index
+
+search_bp = Blueprint('search', __name__)
+
+@search_bp.route('/search', methods=['GET'])
+@jwt_required()
+@use_replica
+def search_all():
+    """Ranked full-text search across vehicles, reservations, service and damage records"""
+    user_id = get_jwt_identity()
+    user = AppUser.query.get(user_id)
+    
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'q parameter is required'}), 400
+    
+    try:
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', current_app.config['PAGINATION_PER_PAGE'])), 1), 100)
+    except ValueError:
+        return jsonify({'error': 'page and per_page must be integers'}), 400
+    
+    # Non-admins only see their own reservations
+    owner_id = None if user.is_admin() else user.user_id
+    
+    try:
+        results, has_more = search(query, owner_id=owner_id, page=page, per_page=per_page)
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 503
+    
+    return jsonify({
+        'query': query,
+        'page': page,
+        'per_page': per_page,
+        'has_more': has_more,
+        'results': results
+    }), 200
+
+@search_bp.route('/suggest', methods=['GET'])
+@jwt_required()
+def suggest():
+    """Typeahead for license plates and (admin only) users from the in-memory prefix index"""
+    user_id = get_jwt_identity()
+    user = AppUser.query.get(user_id)
+    
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    index = get_suggest_index()
+    if index is None:
+        return jsonify({'error': 'Suggest index is not available'}), 503
+    
+    query = request.args.get('q', '')
+    kinds = request.args.get('type', 'vehicles,users').split(',')
+    
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 50)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    
+    index.refresh_if_stale()
+    
+    result = {'query': query}
+    if 'vehicles' in kinds:
+        result['vehicles'] = index.suggest('vehicles', query, limit)
+    # User lookup is only needed for the admin "book on behalf of" flow
+    if 'users' in kinds and user.is_admin():
+        result['users'] = index.suggest('users', query, limit)
+    
+    return jsonify(result), 200
@@ -1,32 +1,43 @@
-from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, jsonify, request, current_app
+from flask_jwt_extended import jwt_required
 from src.models.database import db
 from src.models.service_record import ServiceRecord
 from src.models.vehicle import Vehicle
-from src.models.app_user import AppUser
+from src.services.locations import require_admin
+from src.services.replicas import use_replica
+from src.services.service_schedule import ServiceIntervals, schedule_services
+from src.services.sync import delta_response
+from src.services.telemetry import parse_timestamp
+from src.services.idempotency import idempotent
 from datetime import datetime
 
 service_records_bp = Blueprint('service_records', __name__)
 
-def require_admin():
-    """Helper function to check if current user is admin"""
-    user_id = get_jwt_identity()
-    user = AppUser.query.get(user_id)
-    if not user or not user.is_admin():
-        return jsonify({'error': 'Admin access required'}), 403
-    return None
-
 @service_records_bp.route('/service-records', methods=['GET'])
 @jwt_required()
+@use_replica
 def get_service_records():
-    """Get service records with optional filtering"""
+    """Get service records with optional filtering
+
+    With ?since=<watermark> only records changed after the watermark are
+    returned, together with tombstones for deleted ones.
+    """
     vehicle_id = request.args.get('vehicle_id')
+    since = request.args.get('since')
     
     query = ServiceRecord.query
     
     if vehicle_id:
         query = query.filter_by(vehicle_id=int(vehicle_id))
     
+    if since:
+        try:
+            since = parse_timestamp(since)
+        except ValueError:
+            return jsonify({'error': 'Invalid since format. Use ISO datetime'}), 400
+        lag = current_app.config['SYNC_WATERMARK_LAG_SECONDS']
+        return jsonify(delta_response(ServiceRecord, query, ServiceRecord.query, since, lag)), 200
+    
     service_records = query.order_by(ServiceRecord.service_date.desc()).all()
     return jsonify([record.to_dict() for record in service_records]), 200
 
@@ -39,6 +50,7 @@ def get_service_record(service_id):
 
 @service_records_bp.route('/service-records', methods=['POST'])
 @jwt_required()
+@idempotent
 def create_service_record():
     """Create new service record (admin only)"""
     admin_check = require_admin()
@@ -58,6 +70,10 @@ def create_service_record():
     if not vehicle:
         return jsonify({'error': 'Vehicle not found'}), 404
     
+    admin_check = require_admin(vehicle.location_id)
+    if admin_check:
+        return admin_check
+    
     try:
         # Parse service date
         service_date = datetime.strptime(data['service_date'], '%Y-%m-%d').date()
@@ -79,13 +95,21 @@ def create_service_record():
         
         db.session.commit()
         
-        return jsonify(service_record.to_dict()), 201
-        
     except ValueError:
         return jsonify({'error': 'Invalid date format for service_date. Use YYYY-MM-DD'}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 400
+    
+    # New service record restarts the interval for this vehicle; the record is
+    # already saved, so a failed projection must not turn into an error response
+    try:
+        schedule_services(ServiceIntervals.from_config(current_app.config), vehicle_ids=[vehicle.vehicle_id])
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.warning('Přepočet servisního plánu vozidla %s selhal: %s', vehicle.vehicle_id, e)
+    
+    return jsonify(service_record.to_dict()), 201
 
 @service_records_bp.route('/service-records/<int:service_id>', methods=['PUT'])
 @jwt_required()
@@ -96,6 +120,10 @@ def update_service_record(service_id):
         return admin_check
     
     service_record = ServiceRecord.query.get_or_404(service_id)
+    admin_check = require_admin(service_record.vehicle.location_id)
+    if admin_check:
+        return admin_check
+    
     data = request.get_json()
     
     try:
@@ -129,6 +157,10 @@ def delete_service_record(service_id):
         return admin_check
     
     service_record = ServiceRecord.query.get_or_404(service_id)
+    admin_check = require_admin(service_record.vehicle.location_id)
+    if admin_check:
+        return admin_check
+    
     db.session.delete(service_record)
     db.session.commit()
     
@@ -136,6 +168,7 @@ def delete_service_record(service_id):
 
 @service_records_bp.route('/vehicles/<int:vehicle_id>/service-records', methods=['GET'])
 @jwt_required()
+@use_replica
 def get_vehicle_service_records(vehicle_id):
     """Get all service records for a specific vehicle"""
     vehicle = Vehicle.query.get_or_404(vehicle_id)
@@ -0,0 +1,77 @@
+import hmac
+from datetime import datetime, timedelta
+
+from flask import Blueprint, jsonify, request, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from src.models.app_user import AppUser
+from src.models.vehicle import Vehicle
+from src.services.replicas import use_replica
+from src.services.telemetry import (
+    BUCKETS, compact_history_if_due, ingest_odometer_readings, odometer_history, parse_timestamp
+)
+
+telemetry_bp = Blueprint('telemetry', __name__)
+
+MAX_READINGS_PER_REQUEST = 10000
+
+def require_telemetry_access():
+    """Telematics gateway authenticates with X-API-Key, people with an admin JWT"""
+    api_key = current_app.config.get('TELEMETRY_API_KEY')
+    provided = request.headers.get('X-API-Key')
+    if api_key and provided and hmac.compare_digest(provided, api_key):
+        return None
+
+    user_id = get_jwt_identity()
+    user = AppUser.query.get(user_id) if user_id else None
+    if not user or not user.is_admin():
+        return jsonify({'error': 'Admin access or telemetry API key required'}), 403
+    return None
+
+@telemetry_bp.route('/telemetry/odometer', methods=['POST'])
+@jwt_required(optional=True)
+def ingest_odometer():
+    """Bulk odometer readings from telematics; idempotent per (vehicle, recorded_at)"""
+    access_check = require_telemetry_access()
+    if access_check:
+        return access_check
+
+    data = request.get_json(silent=True)
+    readings = data.get('readings') if isinstance(data, dict) else data
+    if not isinstance(readings, list):
+        return jsonify({'error': 'readings must be a list'}), 400
+
+    if len(readings) > MAX_READINGS_PER_REQUEST:
+        return jsonify({'error': f'At most {MAX_READINGS_PER_REQUEST} readings per request'}), 400
+
+    report = ingest_odometer_readings(readings)
+    compact_history_if_due(
+        current_app.config['ODOMETER_RAW_RETENTION_DAYS'],
+        current_app.config['ODOMETER_COMPACT_WINDOW_DAYS']
+    )
+
+    return jsonify(report.to_dict()), 200
+
+@telemetry_bp.route('/vehicles/<int:vehicle_id>/odometer', methods=['GET'])
+@jwt_required()
+@use_replica
+def get_odometer_history(vehicle_id):
+    """Odometer trend of a vehicle, downsampled to the last reading per bucket"""
+    Vehicle.query.get_or_404(vehicle_id)
+
+    bucket = request.args.get('bucket', 'day')
+    if bucket not in BUCKETS:
+        return jsonify({'error': f'bucket must be one of: {", ".join(BUCKETS)}'}), 400
+
+    try:
+        end = parse_timestamp(request.args['end']) if request.args.get('end') else datetime.utcnow()
+        start = parse_timestamp(request.args['start']) if request.args.get('start') else end - timedelta(days=90)
+    except ValueError:
+        return jsonify({'error': 'Invalid datetime format. Use ISO format'}), 400
+
+    return jsonify({
+        'vehicle_id': vehicle_id,
+        'bucket': bucket,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'history': odometer_history(vehicle_id, start, end, bucket)
+    }), 200
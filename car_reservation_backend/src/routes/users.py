@@ -2,20 +2,26 @@ from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.database import db
 from src.models.app_user import AppUser
+from src.services.locations import require_admin
 from src.models.role import Role
+from src.models.location import Location
+from src.services.replicas import use_replica
+from src.services.suggest import index_user
+from src.services.revocation import revoke_user_tokens
 
 users_bp = Blueprint('users', __name__)
 
-def require_admin():
-    """Helper function to check if current user is admin"""
-    user_id = get_jwt_identity()
-    user = AppUser.query.get(user_id)
-    if not user or not user.is_admin():
-        return jsonify({'error': 'Admin access required'}), 403
-    return None
+def require_admin_of(location_id):
+    """Helper function to check if current user may manage users of the location
+
+    A user without a location has access to all locations, so only admins
+    of all locations may manage such users or move a user there.
+    """
+    return require_admin(location_id, all_locations=location_id is None)
 
 @users_bp.route('/users', methods=['GET'])
 @jwt_required()
+@use_replica
 def get_users():
     """Get all users (admin only)"""
     admin_check = require_admin()
@@ -42,12 +48,12 @@ def get_user(user_id):
 @users_bp.route('/users/<int:user_id>/role', methods=['PUT'])
 @jwt_required()
 def update_user_role(user_id):
-    """Update user role (admin only)"""
-    admin_check = require_admin()
+    """Update user role (admin of the user's location)"""
+    user = AppUser.query.get_or_404(user_id)
+    admin_check = require_admin_of(user.location_id)
     if admin_check:
         return admin_check
     
-    user = AppUser.query.get_or_404(user_id)
     data = request.get_json()
     
     if 'role_id' not in data:
@@ -66,18 +72,46 @@ def update_user_role(user_id):
 @users_bp.route('/users/<int:user_id>/status', methods=['PUT'])
 @jwt_required()
 def update_user_status(user_id):
-    """Update user active status (admin only)"""
-    admin_check = require_admin()
+    """Update user active status (admin of the user's location)"""
+    user = AppUser.query.get_or_404(user_id)
+    admin_check = require_admin_of(user.location_id)
     if admin_check:
         return admin_check
     
-    user = AppUser.query.get_or_404(user_id)
     data = request.get_json()
     
     if 'is_active' not in data:
         return jsonify({'error': 'is_active is required'}), 400
     
     user.is_active = bool(data['is_active'])
+    if not user.is_active:
+        # Již vydané tokeny přestanou platit okamžitě, ne až po expiraci
+        revoke_user_tokens(user.user_id)
+    db.session.commit()
+    index_user(user)
+    
+    return jsonify(user.to_dict()), 200
+
+@users_bp.route('/users/<int:user_id>/location', methods=['PUT'])
+@jwt_required()
+def update_user_location(user_id):
+    """Update user's home location (admin of both the old and the new location)"""
+    user = AppUser.query.get_or_404(user_id)
+    data = request.get_json()
+    
+    if 'location_id' not in data:
+        return jsonify({'error': 'location_id is required'}), 400
+    
+    for location_id in (user.location_id, data['location_id']):
+        admin_check = require_admin_of(location_id)
+        if admin_check:
+            return admin_check
+    
+    # Verify location exists (None = all locations)
+    if data['location_id'] is not None and not Location.query.get(data['location_id']):
+        return jsonify({'error': 'Location not found'}), 404
+    
+    user.location_id = data['location_id']
     db.session.commit()
     
     return jsonify(user.to_dict()), 200
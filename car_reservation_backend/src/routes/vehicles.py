@@ -1,32 +1,56 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.database import db
 from src.models.vehicle import Vehicle
 from src.models.app_user import AppUser
+from src.models.location import Location
+from src.services.replicas import use_replica
+from src.services.suggest import index_vehicle
+from src.services.importer import vehicle_values
+from src.services.sync import delta_response
+from src.services.telemetry import parse_timestamp
+from src.services.idempotency import idempotent
+from src.services.locations import require_admin, resolve_location, location_vehicles, cached_vehicle_list
 from datetime import datetime, date
 
 vehicles_bp = Blueprint('vehicles', __name__)
 
-def require_admin():
-    """Helper function to check if current user is admin"""
-    user_id = get_jwt_identity()
-    user = AppUser.query.get(user_id)
-    if not user or not user.is_admin():
-        return jsonify({'error': 'Admin access required'}), 403
-    return None
-
 @vehicles_bp.route('/vehicles', methods=['GET'])
 @jwt_required()
+@use_replica
 def get_vehicles():
-    """Get all vehicles with optional filtering"""
+    """Get all vehicles with optional filtering
+
+    With ?since=<watermark> only vehicles changed after the watermark are
+    returned, together with tombstones for archived ones. Without
+    ?location_id= only vehicles of the user's home location and shared
+    vehicles are listed (?location_id=all for the whole fleet).
+    """
     status = request.args.get('status', 'Active')
+    since = request.args.get('since')
+    user = AppUser.query.get(get_jwt_identity())
+    
+    try:
+        location_id = resolve_location(request.args.get('location_id'), user.location_id if user else None)
+    except ValueError:
+        return jsonify({'error': 'Invalid location_id'}), 400
     
     query = Vehicle.query
     if status and status != 'all':
         query = query.filter_by(status=status)
-    
-    vehicles = query.all()
-    return jsonify([vehicle.to_dict() for vehicle in vehicles]), 200
+    if location_id is not None:
+        query = query.filter(location_vehicles(location_id))
+    
+    if since:
+        try:
+            since = parse_timestamp(since)
+        except ValueError:
+            return jsonify({'error': 'Invalid since format. Use ISO datetime'}), 400
+        lag = current_app.config['SYNC_WATERMARK_LAG_SECONDS']
+        return jsonify(delta_response(Vehicle, query, Vehicle.query, since, lag)), 200
+    
+    # Seznam pobočky se znovu načte, jen když se změnilo některé z jejích vozidel
+    return jsonify(cached_vehicle_list(location_id, status, query.all)), 200
 
 @vehicles_bp.route('/vehicles/<int:vehicle_id>', methods=['GET'])
 @jwt_required()
@@ -37,19 +61,27 @@ def get_vehicle(vehicle_id):
 
 @vehicles_bp.route('/vehicles', methods=['POST'])
 @jwt_required()
+@idempotent
 def create_vehicle():
-    """Create new vehicle (admin only)"""
-    admin_check = require_admin()
+    """Create new vehicle (admin only, at the admin's location by default)"""
+    data = request.get_json()
+    admin = AppUser.query.get(get_jwt_identity())
+    location_id = data.get('location_id', admin.location_id if admin else None)
+    
+    # Shared vehicle (no location) is available to all locations
+    admin_check = require_admin(location_id, all_locations=location_id is None)
     if admin_check:
         return admin_check
     
-    data = request.get_json()
+    # Validate fields (same rules as the CSV import)
+    try:
+        values = vehicle_values(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    # Validate required fields
-    required_fields = ['make', 'model', 'license_plate', 'fuel_type', 'seating_capacity', 'transmission_type']
-    for field in required_fields:
-        if field not in data:
-            return jsonify({'error': f'{field} is required'}), 400
+    if location_id is not None and not Location.query.get(location_id):
+        return jsonify({'error': 'Location not found'}), 404
+    values['location_id'] = location_id
     
     # Check if license plate already exists
     existing_vehicle = Vehicle.query.filter_by(license_plate=data['license_plate']).first()
@@ -57,35 +89,11 @@ def create_vehicle():
         return jsonify({'error': 'Vehicle with this license plate already exists'}), 400
     
     try:
-        vehicle = Vehicle(
-            make=data['make'],
-            model=data['model'],
-            license_plate=data['license_plate'],
-            color=data.get('color'),
-            fuel_type=data['fuel_type'],
-            seating_capacity=int(data['seating_capacity']),
-            transmission_type=data['transmission_type'],
-            status=data.get('status', 'Active'),
-            description=data.get('description'),
-            odometer_reading=int(data.get('odometer_reading', 0)),
-            entry_permissions_notes=data.get('entry_permissions_notes')
-        )
-        
-        # Handle date fields
-        date_fields = [
-            'last_service_date', 'next_service_date', 'technical_inspection_expiry_date',
-            'highway_vignette_expiry_date', 'emission_inspection_expiry_date'
-        ]
-        
-        for field in date_fields:
-            if data.get(field):
-                try:
-                    setattr(vehicle, field, datetime.strptime(data[field], '%Y-%m-%d').date())
-                except ValueError:
-                    return jsonify({'error': f'Invalid date format for {field}. Use YYYY-MM-DD'}), 400
+        vehicle = Vehicle(**values)
         
         db.session.add(vehicle)
         db.session.commit()
+        index_vehicle(vehicle)
         
         return jsonify(vehicle.to_dict()), 201
         
@@ -97,13 +105,24 @@ def create_vehicle():
 @jwt_required()
 def update_vehicle(vehicle_id):
     """Update vehicle (admin only)"""
-    admin_check = require_admin()
+    vehicle = Vehicle.query.get_or_404(vehicle_id)
+    admin_check = require_admin(vehicle.location_id)
     if admin_check:
         return admin_check
     
-    vehicle = Vehicle.query.get_or_404(vehicle_id)
     data = request.get_json()
     
+    # Moving a vehicle requires admin access to the target location as well;
+    # shared vehicles may only be moved in or out by admins of all locations
+    if 'location_id' in data and data['location_id'] != vehicle.location_id:
+        for location_id in (vehicle.location_id, data['location_id']):
+            admin_check = require_admin(location_id, all_locations=location_id is None)
+            if admin_check:
+                return admin_check
+        if data['location_id'] is not None and not Location.query.get(data['location_id']):
+            return jsonify({'error': 'Location not found'}), 404
+        vehicle.location_id = data['location_id']
+    
     try:
         # Update basic fields
         updatable_fields = [
@@ -136,6 +155,7 @@ def update_vehicle(vehicle_id):
                     setattr(vehicle, field, None)
         
         db.session.commit()
+        index_vehicle(vehicle)
         return jsonify(vehicle.to_dict()), 200
         
     except Exception as e:
@@ -146,15 +166,15 @@ def update_vehicle(vehicle_id):
 @jwt_required()
 def delete_vehicle(vehicle_id):
     """Delete/Archive vehicle (admin only)"""
-    admin_check = require_admin()
+    vehicle = Vehicle.query.get_or_404(vehicle_id)
+    admin_check = require_admin(vehicle.location_id)
     if admin_check:
         return admin_check
     
-    vehicle = Vehicle.query.get_or_404(vehicle_id)
-    
     # Instead of deleting, archive the vehicle
     vehicle.status = 'Archived'
     db.session.commit()
+    index_vehicle(vehicle)
     
     return jsonify({'message': 'Vehicle archived successfully'}), 200
 
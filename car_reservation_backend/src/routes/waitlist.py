@@ -0,0 +1,106 @@
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from src.models.database import db
+from src.models.vehicle import Vehicle
+from src.models.app_user import AppUser
+from src.models.waitlist_entry import WaitlistEntry
+from src.services.idempotency import idempotent
+from src.services.telemetry import parse_timestamp
+from src.services.waitlist import match_entry
+from datetime import datetime
+
+waitlist_bp = Blueprint('waitlist', __name__)
+
+@waitlist_bp.route('/waitlist', methods=['GET'])
+@jwt_required()
+def get_waitlist():
+    """Waitlist entries (all for admin, own for regular users)"""
+    user_id = int(get_jwt_identity())
+    user = AppUser.query.get(user_id)
+
+    query = WaitlistEntry.query
+    if not user.is_admin():
+        query = query.filter(WaitlistEntry.user_id == user_id)
+
+    status = request.args.get('status')
+    if status:
+        query = query.filter(WaitlistEntry.status == status)
+
+    entries = query.order_by(WaitlistEntry.start_time, WaitlistEntry.waitlist_id).all()
+    return jsonify([entry.to_dict() for entry in entries]), 200
+
+@waitlist_bp.route('/waitlist', methods=['POST'])
+@jwt_required()
+@idempotent
+def join_waitlist():
+    """Join the waitlist for a time window
+
+    Optional requirements: vehicle_id, fuel_type, transmission_type and
+    number_of_passengers. When a matching vehicle is already free the
+    reservation is created immediately, otherwise it is created as soon as
+    a cancellation or a vehicle coming back to service frees one.
+    """
+    user_id = int(get_jwt_identity())
+    data = request.get_json() or {}
+
+    required_fields = ['start_time', 'end_time', 'purpose', 'destination']
+    for field in required_fields:
+        if field not in data:
+            return jsonify({'error': f'{field} is required'}), 400
+
+    try:
+        start_time = parse_timestamp(data['start_time'])
+        end_time = parse_timestamp(data['end_time'])
+    except ValueError as e:
+        return jsonify({'error': f'Invalid datetime format: {str(e)}'}), 400
+
+    if start_time >= end_time:
+        return jsonify({'error': 'End time must be after start time'}), 400
+
+    if start_time < datetime.utcnow():
+        return jsonify({'error': 'Cannot join the waitlist for a time in the past'}), 400
+
+    vehicle_id = data.get('vehicle_id')
+    if vehicle_id is not None and not Vehicle.query.get(vehicle_id):
+        return jsonify({'error': 'Vehicle not found'}), 404
+
+    entry = WaitlistEntry(
+        user_id=user_id,
+        vehicle_id=vehicle_id,
+        start_time=start_time,
+        end_time=end_time,
+        purpose=data['purpose'],
+        destination=data['destination'],
+        number_of_passengers=data.get('number_of_passengers'),
+        fuel_type=data.get('fuel_type'),
+        transmission_type=data.get('transmission_type'),
+        user_notes=data.get('user_notes')
+    )
+    db.session.add(entry)
+    db.session.flush()
+
+    # Vozidlo se mohlo uvolnit mezi odmítnutou rezervací a zápisem do pořadníku
+    match_entry(entry)
+    db.session.commit()
+
+    return jsonify(entry.to_dict()), 201
+
+@waitlist_bp.route('/waitlist/<int:waitlist_id>', methods=['DELETE'])
+@jwt_required()
+def leave_waitlist(waitlist_id):
+    """Leave the waitlist"""
+    user_id = int(get_jwt_identity())
+    user = AppUser.query.get(user_id)
+
+    entry = WaitlistEntry.query.get_or_404(waitlist_id)
+
+    if not user.is_admin() and entry.user_id != user_id:
+        return jsonify({'error': 'Access denied'}), 403
+
+    if entry.status != 'Waiting':
+        return jsonify({'error': f'Waitlist entry is already {entry.status.lower()}'}), 400
+
+    entry.status = 'Cancelled'
+    db.session.commit()
+
+    return jsonify({'message': 'Left the waitlist successfully'}), 200
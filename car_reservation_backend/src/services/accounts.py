@@ -0,0 +1,95 @@
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+
+from src.models.database import db, dialect_insert
+from src.models.app_user import AppUser
+from src.models.role import Role
+
+EMPLOYEE_ROLE = 'Employee'
+ADMIN_ROLE = 'Fleet Administrator'
+
+ROLE_DESCRIPTIONS = {
+    EMPLOYEE_ROLE: 'Standardní zaměstnanec se základními oprávněními pro rezervace',
+    ADMIN_ROLE: 'Administrátor s plným přístupem ke správě vozového parku',
+}
+
+
+def _insert_ignoring_conflicts(model, values):
+    """INSERT ... ON CONFLICT DO NOTHING; vrací nový řádek, nebo None při konfliktu
+
+    Souběžné vložení téhož klíče tak nekončí chybou unikátního omezení.
+    """
+    insert = dialect_insert(model)
+    if insert is None:
+        try:
+            with db.session.begin_nested():
+                instance = model(**values)
+                db.session.add(instance)
+            return instance
+        except IntegrityError:
+            return None
+
+    statement = insert.values(**values).on_conflict_do_nothing().returning(model)
+    return db.session.scalars(statement).first()
+
+
+def get_role_id(role_name):
+    """ID role z cache workeru; chybějící role se založí"""
+    role_ids = current_app.extensions.setdefault('role_ids', {})
+    role_id = role_ids.get(role_name)
+    if role_id is None:
+        role_id = db.session.scalar(select(Role.role_id).where(Role.role_name == role_name))
+        if role_id is None:
+            role = _insert_ignoring_conflicts(Role, {
+                'role_name': role_name,
+                'description': ROLE_DESCRIPTIONS.get(role_name)
+            })
+            db.session.commit()
+            role_id = role.role_id if role else db.session.scalar(
+                select(Role.role_id).where(Role.role_name == role_name)
+            )
+        role_ids[role_name] = role_id
+    return role_id
+
+
+def mock_user_values(intranet_id):
+    """Údaje mock uživatele (v reálné implementaci by přišly z LDAP)"""
+    if intranet_id == 'admin':
+        return {
+            'intranet_id': intranet_id,
+            'first_name': 'Admin',
+            'last_name': 'Uživatel',
+            'email': 'admin@company.com',
+            'role_id': get_role_id(ADMIN_ROLE)
+        }
+    return {
+        'intranet_id': intranet_id,
+        'first_name': 'Jan',
+        'last_name': 'Novák',
+        'email': f'{intranet_id}@company.com',
+        'role_id': get_role_id(EMPLOYEE_ROLE)
+    }
+
+
+def get_or_create_user(intranet_id, values_factory=mock_user_values):
+    """Uživatel podle intranet_id včetně role, případně nově vložený
+
+    Existující uživatel = jeden SELECT bez transakce pro zápis. Nový uživatel
+    = jeden INSERT ... ON CONFLICT DO NOTHING RETURNING a jeden commit. Vrací
+    (uživatel, vytvořen); uživatel je None, pokud vložení blokuje jiný účet
+    (např. stejný e-mail).
+    """
+    query = select(AppUser).options(joinedload(AppUser.role)).where(AppUser.intranet_id == intranet_id)
+    user = db.session.scalars(query).first()
+    if user:
+        return user, False
+
+    user = _insert_ignoring_conflicts(AppUser, values_factory(intranet_id))
+    db.session.commit()
+    if user:
+        return user, True
+
+    # Uživatele mezitím vložil souběžný požadavek
+    return db.session.scalars(query).first(), False
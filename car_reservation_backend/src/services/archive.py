@@ -0,0 +1,96 @@
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, literal, select, update
+
+from src.models.database import db
+from src.models.reservation import Reservation
+from src.models.archived_reservation import ArchivedReservation
+from src.models.waitlist_entry import WaitlistEntry
+
+logger = logging.getLogger(__name__)
+
+RESERVATION_COLUMNS = [column.name for column in Reservation.__table__.columns]
+
+
+def archive_reservations(horizon_days, batch_size=1000, max_batches=None, now=None):
+    """Přesun rezervací ukončených před horizon_days do reservations_archive
+
+    Každá dávka je samostatná krátká transakce (výběr ID, INSERT ... SELECT,
+    DELETE), takže přerušený běh lze kdykoli spustit znovu a pokračuje tam,
+    kde skončil. Na PostgreSQL se řádky zamykají FOR UPDATE SKIP LOCKED, aby
+    archivace nečekala na právě upravované rezervace. Odkaz z pořadníku
+    (waitlist_entries.reservation_id, cizí klíč na reservations) se ve stejné
+    dávce vynuluje, jinak by DELETE narazil na cizí klíč. Vrací počet řádků.
+    """
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=horizon_days)
+    source = Reservation.__table__
+    archive = ArchivedReservation.__table__
+
+    archived = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = db.session.scalars(
+            select(source.c.reservation_id)
+            .where(source.c.end_time < cutoff)
+            .order_by(source.c.reservation_id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not ids:
+            break
+
+        db.session.execute(archive.insert().from_select(
+            RESERVATION_COLUMNS + ['archived_at'],
+            select(*(source.c[name] for name in RESERVATION_COLUMNS), literal(now))
+            .where(source.c.reservation_id.in_(ids))
+        ))
+        db.session.execute(
+            update(WaitlistEntry.__table__)
+            .where(WaitlistEntry.__table__.c.reservation_id.in_(ids))
+            .values(reservation_id=None)
+        )
+        db.session.execute(delete(source).where(source.c.reservation_id.in_(ids)))
+        db.session.commit()
+
+        archived += len(ids)
+        batches += 1
+        logger.info('Archivováno %d rezervací (celkem %d)', len(ids), archived)
+
+    return archived
+
+
+def init_archive(app):
+    @app.cli.command('archive-reservations')
+    def archive_reservations_command():
+        """Přesun starých rezervací do archivu (flask --app src.main archive-reservations)"""
+        archived = archive_reservations(
+            app.config['RESERVATION_ARCHIVE_DAYS'],
+            app.config['RESERVATION_ARCHIVE_BATCH_SIZE']
+        )
+        print(f'Archivováno {archived} rezervací')
+
+
+def archive_boundary_query():
+    """Konec nejpozdější archivované rezervace; starší data leží jen v archivu"""
+    return select(func.max(ArchivedReservation.end_time))
+
+
+def reaches_archive(boundary, start, include_archived=False):
+    """Zda se mají k dotazu na rezervace od start přidat archivované
+
+    Rozsah začínající před koncem archivu ho zasáhne vždy; seznam bez
+    začátku jen na výslovnou žádost (include_archived), jinak by se ke
+    každému běžnému seznamu načetla celá historie.
+    """
+    if boundary is None:
+        return False
+    return include_archived if start is None else start <= boundary
+
+
+def archived_reservations(build_query, start=None, include_archived=False):
+    """Archivované rezervace pro historii; build_query dostane model a vrátí filtrovaný dotaz"""
+    if not reaches_archive(db.session.scalar(archive_boundary_query()), start, include_archived):
+        return []
+    return build_query(ArchivedReservation).all()
@@ -0,0 +1,236 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import current_app, has_request_context
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event, inspect
+
+from src.models.database import db, RoutingSession
+from src.models.audit_entry import AuditEntry
+from src.models.reservation import Reservation
+from src.models.vehicle import Vehicle
+from src.models.service_record import ServiceRecord
+from src.models.damage_record import DamageRecord
+
+logger = logging.getLogger(__name__)
+
+# Auditované entity: (typ, primární klíč)
+AUDITED = {
+    Reservation: ('reservation', 'reservation_id'),
+    Vehicle: ('vehicle', 'vehicle_id'),
+    ServiceRecord: ('service_record', 'service_id'),
+    DamageRecord: ('damage_record', 'damage_id'),
+}
+IGNORED_ATTRIBUTES = {'created_at', 'updated_at'}
+PENDING_KEY = 'audit_pending'
+
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _actor_id():
+    if not has_request_context():
+        return None
+    try:
+        identity = get_jwt_identity()
+    except Exception:
+        return None
+    return int(identity) if identity is not None else None
+
+
+def _column_changes(instance, action):
+    """{atribut: [stará, nová]} pro sloupce entity"""
+    state = inspect(instance)
+    changes = {}
+    for attribute in state.mapper.column_attrs:
+        name = attribute.key
+        if name in IGNORED_ATTRIBUTES:
+            continue
+        history = state.attrs[name].history
+        if action == 'created':
+            value = getattr(instance, name)
+            if value is not None:
+                changes[name] = [None, _json_value(value)]
+        elif action == 'deleted':
+            old = (history.deleted or history.unchanged or [None])[0]
+            if old is not None:
+                changes[name] = [_json_value(old), None]
+        elif history.has_changes():
+            old = history.deleted[0] if history.deleted else None
+            new = history.added[0] if history.added else None
+            if _json_value(old) != _json_value(new):
+                changes[name] = [_json_value(old), _json_value(new)]
+    return changes
+
+
+def _collect_changes(session, flush_context):
+    actor_id = _actor_id()
+    changed_at = datetime.utcnow()
+    pending = session.info.setdefault(PENDING_KEY, [])
+    # Řádek si pamatuje savepoint, ve kterém vznikl, aby ho rollback savepointu mohl zahodit
+    savepoint = session.get_nested_transaction()
+    for action, instances in (('created', session.new), ('updated', session.dirty), ('deleted', session.deleted)):
+        for instance in instances:
+            if type(instance) not in AUDITED:
+                continue
+            if action == 'updated' and not session.is_modified(instance):
+                continue
+            changes = _column_changes(instance, action)
+            if not changes:
+                continue
+            entity_type, primary_key = AUDITED[type(instance)]
+            pending.append((savepoint, {
+                'entity_type': entity_type,
+                'entity_id': getattr(instance, primary_key),
+                'action': action,
+                'changes': json.dumps(changes, default=str),
+                'actor_id': actor_id,
+                'changed_at': changed_at
+            }))
+
+
+def _publish_changes(session):
+    # Do auditu jde jen to, co bylo skutečně potvrzeno
+    pending = session.info.pop(PENDING_KEY, None)
+    writer = current_app.extensions.get('audit_writer')
+    if pending and writer is not None:
+        writer.submit([row for _, row in pending])
+
+
+def _within(transaction, savepoint):
+    while transaction is not None:
+        if transaction is savepoint:
+            return True
+        transaction = transaction.parent
+    return False
+
+
+def _discard_changes(session, previous_transaction=None):
+    """Zahození změn po rollbacku
+
+    Rollback savepointu (begin_nested) zahodí jen řádky zapsané uvnitř něj,
+    změny vnější transakce se auditují při jejím commitu; vše se zahodí až
+    s rollbackem nejvnější transakce.
+    """
+    if previous_transaction is not None:
+        savepoint = previous_transaction if previous_transaction.nested else None
+    else:
+        savepoint = session.get_nested_transaction()
+    if savepoint is None:
+        session.info.pop(PENDING_KEY, None)
+    elif PENDING_KEY in session.info:
+        session.info[PENDING_KEY] = [
+            (origin, row) for origin, row in session.info[PENDING_KEY] if not _within(origin, savepoint)
+        ]
+
+
+class AuditWriter:
+    """Zápis auditních záznamů po dávkách z vlákna na pozadí
+
+    Požadavky jen vloží řádky do omezené fronty. Vlákno je vybírá a zapisuje
+    jedním hromadným INSERT až po batch_size řádcích, nejpozději po
+    flush_interval sekundách. Když je fronta plná, zapíše požadavek své
+    řádky synchronně sám, takže paměť je omezená a nic se neztratí.
+    """
+
+    def __init__(self, app, queue_size=10000, batch_size=500, flush_interval=1.0):
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stopping = threading.Event()
+
+    def _ensure_started(self):
+        # Vlákno se spouští až ve workeru (po fork), ne v master procesu gunicornu
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._thread.start()
+
+    def submit(self, rows):
+        self._ensure_started()
+        for index, row in enumerate(rows):
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                logger.warning('Fronta auditu je plná, %d záznamů se zapíše synchronně', len(rows) - index)
+                self._write(rows[index:])
+                return
+
+    def _drain(self, first=None):
+        batch = [first] if first is not None else []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, rows):
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as connection:
+                    connection.execute(AuditEntry.__table__.insert(), rows)
+        except Exception as e:
+            logger.error('Zápis %d auditních záznamů selhal: %s', len(rows), e)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            self._write(self._drain(first))
+
+    def flush(self):
+        """Zapsání všeho, co čeká ve frontě (ukončení workeru, testy, CLI)"""
+        while True:
+            batch = self._drain()
+            if not batch:
+                return
+            self._write(batch)
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=self.flush_interval + 1)
+        self.flush()
+
+
+def init_audit(app):
+    """Zachytávání změn auditovaných entit a jejich zápis na pozadí"""
+    writer = AuditWriter(
+        app,
+        queue_size=app.config['AUDIT_QUEUE_SIZE'],
+        batch_size=app.config['AUDIT_BATCH_SIZE'],
+        flush_interval=app.config['AUDIT_FLUSH_INTERVAL']
+    )
+    app.extensions['audit_writer'] = writer
+    atexit.register(writer.stop)
+
+    for name, listener in (
+        ('after_flush', _collect_changes),
+        ('after_commit', _publish_changes),
+        ('after_rollback', _discard_changes),
+        ('after_soft_rollback', _discard_changes),
+    ):
+        if not event.contains(RoutingSession, name, listener):
+            event.listen(RoutingSession, name, listener)
@@ -0,0 +1,251 @@
+import gzip
+import os
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import click
+from sqlalchemy.engine import make_url
+
+from src.models.database import db
+
+BACKUP_PREFIX = 'car_reservation_'
+TIMESTAMP_FORMAT = '%Y%m%d_%H%M%S'
+# Přípony záloh: adresářový formát pg_dump a gzipovaná kopie SQLite
+POSTGRES_SUFFIX = '.pgdump'
+SQLITE_SUFFIX = '.sqlite3.gz'
+# gzip 1 je na dumpech několikrát rychlejší než výchozí 6 a soubory jsou jen o málo větší
+COMPRESS_LEVEL = 1
+SQLITE_PAGES_PER_STEP = 4096
+COPY_BUFFER_SIZE = 1024 * 1024
+RESTORE_SESSION_OPTIONS = '-c synchronous_commit=off -c maintenance_work_mem=256MB'
+
+
+class BackupError(Exception):
+    pass
+
+
+def _postgres_target(database_url):
+    """URL pro pg_dump/pg_restore (bez ovladače SQLAlchemy) a prostředí s heslem
+
+    Heslo jde přes PGPASSWORD, aby nebylo vidět v seznamu procesů.
+    """
+    url = make_url(database_url)
+    env = dict(os.environ)
+    if url.password:
+        env['PGPASSWORD'] = url.password
+    target = url.set(drivername='postgresql', password=None).render_as_string(hide_password=False)
+    return target, env
+
+
+def _sqlite_path(database_url):
+    path = make_url(database_url).database
+    if not path or path == ':memory:':
+        raise BackupError('SQLite databáze v paměti se nedá zálohovat')
+    return path
+
+
+def _run(command, env=None):
+    result = subprocess.run(command, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise BackupError(f'{os.path.basename(command[0])} selhal: {result.stderr.strip()}')
+
+
+def backup_timestamp(name):
+    """Čas vytvoření zálohy podle názvu, u cizích souborů None"""
+    for suffix in (POSTGRES_SUFFIX, SQLITE_SUFFIX):
+        if name.startswith(BACKUP_PREFIX) and name.endswith(suffix):
+            try:
+                return datetime.strptime(name[len(BACKUP_PREFIX):-len(suffix)], TIMESTAMP_FORMAT)
+            except ValueError:
+                return None
+    return None
+
+
+def backup_postgres(database_url, destination, jobs):
+    """Paralelní dump v adresářovém formátu (každá tabulka zvlášť, gzip při zápisu)"""
+    target, env = _postgres_target(database_url)
+    _run([
+        'pg_dump', '--format=directory', f'--jobs={jobs}', f'--compress={COMPRESS_LEVEL}',
+        '--no-owner', '--no-privileges', f'--file={destination}', f'--dbname={target}'
+    ], env)
+
+
+def backup_sqlite(database_url, destination):
+    """Online záloha přes SQLite backup API, komprimovaná při kopírování
+
+    Kopie po SQLITE_PAGES_PER_STEP stránkách nedrží zámek databáze po celou
+    dobu zálohy, takže aplikace může dál zapisovat.
+    """
+    source = sqlite3.connect(_sqlite_path(database_url))
+    fd, snapshot = tempfile.mkstemp(suffix='.sqlite3', dir=os.path.dirname(destination))
+    os.close(fd)
+    try:
+        target = sqlite3.connect(snapshot)
+        try:
+            source.backup(target, pages=SQLITE_PAGES_PER_STEP)
+        finally:
+            target.close()
+        with open(snapshot, 'rb') as raw, gzip.open(destination, 'wb', compresslevel=COMPRESS_LEVEL) as compressed:
+            shutil.copyfileobj(raw, compressed, COPY_BUFFER_SIZE)
+    finally:
+        source.close()
+        os.unlink(snapshot)
+
+
+def create_backup(database_url, backup_dir, jobs=1, now=None):
+    """Vytvoření zálohy databáze v backup_dir; vrací cestu k záloze
+
+    Záloha vzniká pod dočasným názvem a přejmenuje se až kompletní, takže
+    přerušená záloha nikdy nevypadá jako platná.
+    """
+    os.makedirs(backup_dir, exist_ok=True)
+    stamp = (now or datetime.now()).strftime(TIMESTAMP_FORMAT)
+    backend = make_url(database_url).get_backend_name()
+    suffix = POSTGRES_SUFFIX if backend == 'postgresql' else SQLITE_SUFFIX
+    path = os.path.join(backup_dir, f'{BACKUP_PREFIX}{stamp}{suffix}')
+    partial = os.path.join(backup_dir, f'.partial-{BACKUP_PREFIX}{stamp}{suffix}')
+
+    try:
+        if backend == 'postgresql':
+            backup_postgres(database_url, partial, jobs)
+        elif backend == 'sqlite':
+            backup_sqlite(database_url, partial)
+        else:
+            raise BackupError(f'Zálohování databáze {backend} není podporováno')
+        os.replace(partial, path)
+    finally:
+        if os.path.isdir(partial):
+            shutil.rmtree(partial)
+        elif os.path.exists(partial):
+            os.unlink(partial)
+    return path
+
+
+def prune_backups(backup_dir, retention_days, now=None):
+    """Smazání záloh starších než retention_days; nejnovější záloha zůstane vždy"""
+    if not os.path.isdir(backup_dir):
+        return []
+    cutoff = (now or datetime.now()) - timedelta(days=retention_days)
+    backups = sorted(
+        (timestamp, name) for name in os.listdir(backup_dir)
+        if (timestamp := backup_timestamp(name)) is not None
+    )
+    removed = []
+    for timestamp, name in backups[:-1]:
+        if timestamp < cutoff:
+            path = os.path.join(backup_dir, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.unlink(path)
+            removed.append(path)
+    return removed
+
+
+def restore_postgres(database_url, path, jobs):
+    """Paralelní obnova adresářového dumpu (tabulky, data i indexy v jobs procesech)
+
+    Obnovovaná data jsou už jednou uložená v záloze, proto sezení obnovy
+    nečekají na fsync každého commitu a indexy stavějí s větší pamětí.
+    """
+    target, env = _postgres_target(database_url)
+    env['PGOPTIONS'] = f"{env.get('PGOPTIONS', '')} {RESTORE_SESSION_OPTIONS}".strip()
+    _run([
+        'pg_restore', f'--jobs={jobs}', '--clean', '--if-exists', '--no-owner', '--no-privileges',
+        f'--dbname={target}', path
+    ], env)
+
+
+def restore_sqlite(database_url, path):
+    """Rozbalení zálohy vedle databáze a atomická záměna souboru"""
+    database = _sqlite_path(database_url)
+    fd, restored = tempfile.mkstemp(suffix='.sqlite3', dir=os.path.dirname(os.path.abspath(database)))
+    try:
+        with gzip.open(path, 'rb') as compressed, os.fdopen(fd, 'wb') as raw:
+            shutil.copyfileobj(compressed, raw, COPY_BUFFER_SIZE)
+        check = sqlite3.connect(restored)
+        try:
+            result = check.execute('PRAGMA quick_check').fetchone()[0]
+        finally:
+            check.close()
+        if result != 'ok':
+            raise BackupError(f'Záloha {path} je poškozená: {result}')
+        # Zbylý WAL staré databáze by se jinak přehrál přes obnovený soubor
+        for stale in (database + '-wal', database + '-shm'):
+            if os.path.exists(stale):
+                os.unlink(stale)
+        os.replace(restored, database)
+    finally:
+        if os.path.exists(restored):
+            os.unlink(restored)
+
+
+def restore_backup(database_url, path, jobs=1):
+    """Obnova databáze ze zálohy; vrací dobu obnovy v sekundách"""
+    if not os.path.exists(path):
+        raise BackupError(f'Záloha {path} neexistuje')
+    started = time.perf_counter()
+    backend = make_url(database_url).get_backend_name()
+    if backend == 'postgresql' and os.path.isdir(path):
+        restore_postgres(database_url, path, jobs)
+    elif backend == 'sqlite' and path.endswith(SQLITE_SUFFIX):
+        restore_sqlite(database_url, path)
+    else:
+        raise BackupError(f'Záloha {path} neodpovídá databázi {backend}')
+    return time.perf_counter() - started
+
+
+def backup_jobs(app):
+    return app.config['BACKUP_JOBS'] or os.cpu_count() or 1
+
+
+def init_backup(app):
+    """Příkazy pro zálohu a obnovu databáze (cron podle BACKUP_SCHEDULE)"""
+
+    @app.cli.command('backup-database')
+    @click.option('--force', is_flag=True, help='Zálohovat i při BACKUP_ENABLED=false')
+    def backup_database_command(force):
+        """Záloha databáze a smazání starých záloh (flask --app src.main backup-database)"""
+        if not app.config['BACKUP_ENABLED'] and not force:
+            print('Zálohování je vypnuto (BACKUP_ENABLED)')
+            return
+        started = time.perf_counter()
+        try:
+            path = create_backup(app.config['SQLALCHEMY_DATABASE_URI'], app.config['BACKUP_DIR'], backup_jobs(app))
+        except BackupError as e:
+            raise click.ClickException(str(e))
+        print(f'Záloha vytvořena za {time.perf_counter() - started:.1f} s: {path}')
+        removed = prune_backups(app.config['BACKUP_DIR'], app.config['BACKUP_RETENTION_DAYS'])
+        print(f'Smazáno {len(removed)} záloh starších než {app.config["BACKUP_RETENTION_DAYS"]} dní')
+
+    @app.cli.command('restore-database')
+    @click.argument('path', required=False)
+    @click.option('--jobs', type=int, default=None, help='Počet paralelních procesů pg_restore')
+    @click.option('--yes', is_flag=True, help='Bez potvrzení')
+    def restore_database_command(path, jobs, yes):
+        """Obnova databáze ze zálohy, bez PATH z nejnovější (flask --app src.main restore-database)"""
+        if path is None:
+            backups = sorted(
+                name for name in os.listdir(app.config['BACKUP_DIR'])
+                if backup_timestamp(name) is not None
+            ) if os.path.isdir(app.config['BACKUP_DIR']) else []
+            if not backups:
+                print(f'V {app.config["BACKUP_DIR"]} není žádná záloha')
+                return
+            path = os.path.join(app.config['BACKUP_DIR'], max(backups, key=backup_timestamp))
+        print('VAROVÁNÍ: Toto kompletně nahradí současnou databázi!')
+        print(f'Záložní soubor: {path}')
+        if not yes and click.prompt('Jste si jisti, že chcete pokračovat? (ano/ne)') != 'ano':
+            print('Obnovení bylo zrušeno.')
+            return
+        # Otevřená spojení aplikace by držela starou databázi
+        db.engine.dispose()
+        try:
+            elapsed = restore_backup(app.config['SQLALCHEMY_DATABASE_URI'], path, jobs or backup_jobs(app))
+        except BackupError as e:
+            raise click.ClickException(str(e))
+        print(f'Obnovení databáze dokončeno za {elapsed:.1f} s')
@@ -0,0 +1,89 @@
+import json
+
+from sqlalchemy import event, inspect
+
+from src.models.database import RoutingSession
+from src.models.change_event import ChangeEvent
+from src.models.reservation import Reservation
+from src.models.vehicle import Vehicle
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def reservation_payload(reservation):
+    return {
+        'reservation_id': reservation.reservation_id,
+        'vehicle_id': reservation.vehicle_id,
+        'user_id': int(reservation.user_id),
+        'start': _isoformat(reservation.start_time),
+        'end': _isoformat(reservation.end_time),
+        'status': reservation.status,
+        'purpose': reservation.purpose,
+        'destination': reservation.destination,
+        'number_of_passengers': reservation.number_of_passengers
+    }
+
+
+def vehicle_payload(vehicle):
+    return {
+        'vehicle_id': vehicle.vehicle_id,
+        'make': vehicle.make,
+        'model': vehicle.model,
+        'license_plate': vehicle.license_plate,
+        'status': vehicle.status,
+        'fuel_type': vehicle.fuel_type,
+        'seating_capacity': vehicle.seating_capacity,
+        'transmission_type': vehicle.transmission_type,
+        'next_service_date': _isoformat(vehicle.next_service_date)
+    }
+
+
+# Sledované entity: (typ, primární klíč, payload, stav znamenající zrušení, název akce)
+TRACKED = {
+    Reservation: ('reservation', 'reservation_id', reservation_payload, 'Cancelled', 'cancelled'),
+    Vehicle: ('vehicle', 'vehicle_id', vehicle_payload, 'Archived', 'archived'),
+}
+
+
+def _update_action(instance, closed_status, closed_action):
+    history = inspect(instance).attrs.status.history
+    if history.has_changes() and instance.status == closed_status:
+        return closed_action
+    return 'updated'
+
+
+def _event_row(instance, action):
+    entity_type, primary_key, payload, _, _ = TRACKED[type(instance)]
+    data = payload(instance) if action != 'deleted' else {primary_key: getattr(instance, primary_key)}
+    return {
+        'entity_type': entity_type,
+        'entity_id': getattr(instance, primary_key),
+        'action': action,
+        'payload': json.dumps(data)
+    }
+
+
+def _record_changes(session, flush_context):
+    rows = []
+    for instance in session.new:
+        if type(instance) in TRACKED:
+            rows.append(_event_row(instance, 'created'))
+    for instance in session.dirty:
+        if type(instance) in TRACKED and session.is_modified(instance):
+            _, _, _, closed_status, closed_action = TRACKED[type(instance)]
+            rows.append(_event_row(instance, _update_action(instance, closed_status, closed_action)))
+    for instance in session.deleted:
+        if type(instance) in TRACKED:
+            rows.append(_event_row(instance, 'deleted'))
+
+    if rows:
+        session.connection().execute(ChangeEvent.__table__.insert(), rows)
+
+
+def init_change_log(app):
+    """Zápis změn rezervací a vozidel do change_events při každém flush"""
+    if not event.contains(RoutingSession, 'after_flush', _record_changes):
+        event.listen(RoutingSession, 'after_flush', _record_changes)
+
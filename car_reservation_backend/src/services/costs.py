@@ -0,0 +1,252 @@
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import delete, event, func, inspect, select
+
+from src.models.database import db, apply_increments, RoutingSession
+from src.models.service_record import ServiceRecord
+from src.models.damage_record import DamageRecord
+from src.models.vehicle import Vehicle
+from src.models.vehicle_cost import VehicleCostSummary, VehicleCostTotal
+
+SUMMARY_COLUMNS = ('service_cost', 'damage_cost', 'service_count', 'damage_count')
+TOTAL_COLUMNS = ('service_cost', 'damage_cost', 'total_cost', 'service_count', 'damage_count')
+
+ZERO = Decimal('0')
+
+
+def _money(value):
+    return Decimal(str(value)) if value is not None else ZERO
+
+
+def _service_contribution(vehicle_id, service_date, cost):
+    return vehicle_id, service_date, {'service_cost': _money(cost), 'service_count': 1}
+
+
+def _damage_contribution(vehicle_id, date_of_damage, estimated_cost, actual_cost):
+    cost = actual_cost if actual_cost is not None else estimated_cost
+    return vehicle_id, date_of_damage, {'damage_cost': _money(cost), 'damage_count': 1}
+
+
+# Atributy záznamu, které ovlivňují agregát, a výpočet jeho příspěvku
+TRACKED = {
+    ServiceRecord: (('vehicle_id', 'service_date', 'cost'), _service_contribution),
+    DamageRecord: (('vehicle_id', 'date_of_damage', 'estimated_cost', 'actual_cost'), _damage_contribution),
+}
+
+
+class CostDeltas:
+    """Změny agregátů po (vozidlo, měsíc) a po vozidle"""
+
+    def __init__(self):
+        self.months = defaultdict(lambda: dict.fromkeys(SUMMARY_COLUMNS, 0))
+        self.totals = defaultdict(lambda: dict.fromkeys(TOTAL_COLUMNS, 0))
+
+    def add(self, contribution, sign):
+        vehicle_id, record_date, values = contribution
+        if vehicle_id is None or record_date is None:
+            return
+        month = self.months[(vehicle_id, record_date.replace(day=1))]
+        total = self.totals[vehicle_id]
+        for column, value in values.items():
+            month[column] += sign * value
+            total[column] += sign * value
+            if column.endswith('_cost'):
+                total['total_cost'] += sign * value
+
+    def month_rows(self):
+        return [
+            {'vehicle_id': vehicle_id, 'month': month, **values}
+            for (vehicle_id, month), values in self.months.items()
+            if any(values.values())
+        ]
+
+    def total_rows(self):
+        return [
+            {'vehicle_id': vehicle_id, **values}
+            for vehicle_id, values in self.totals.items()
+            if any(values.values())
+        ]
+
+
+def _old_values(instance, attributes):
+    state = inspect(instance)
+    values = []
+    for name in attributes:
+        history = state.attrs[name].history
+        if history.deleted:
+            values.append(history.deleted[0])
+        elif history.unchanged:
+            values.append(history.unchanged[0])
+        else:
+            values.append(getattr(instance, name))
+    return values
+
+
+def collect_deltas(session):
+    deltas = CostDeltas()
+    for instance in session.new:
+        if type(instance) in TRACKED:
+            attributes, contribution = TRACKED[type(instance)]
+            deltas.add(contribution(*(getattr(instance, name) for name in attributes)), 1)
+
+    for instance in session.deleted:
+        if type(instance) in TRACKED:
+            attributes, contribution = TRACKED[type(instance)]
+            deltas.add(contribution(*_old_values(instance, attributes)), -1)
+
+    for instance in session.dirty:
+        if type(instance) in TRACKED and session.is_modified(instance):
+            attributes, contribution = TRACKED[type(instance)]
+            state = inspect(instance)
+            if not any(state.attrs[name].history.has_changes() for name in attributes):
+                continue
+            deltas.add(contribution(*_old_values(instance, attributes)), -1)
+            deltas.add(contribution(*(getattr(instance, name) for name in attributes)), 1)
+    return deltas
+
+
+def _track_cost_changes(session, flush_context, instances):
+    deltas = collect_deltas(session)
+    month_rows = deltas.month_rows()
+    if not month_rows:
+        return
+
+    connection = session.connection()
+    apply_increments(connection, VehicleCostSummary, ('vehicle_id', 'month'), SUMMARY_COLUMNS, month_rows)
+    apply_increments(connection, VehicleCostTotal, ('vehicle_id',), TOTAL_COLUMNS, deltas.total_rows())
+
+    # Měsíce, ze kterých všechny záznamy odešly, se odstraní (stejně jako při přepočtu)
+    vehicle_ids = [row['vehicle_id'] for row in month_rows if row['service_count'] < 0 or row['damage_count'] < 0]
+    if vehicle_ids:
+        for model in (VehicleCostSummary, VehicleCostTotal):
+            connection.execute(delete(model).where(
+                model.vehicle_id.in_(vehicle_ids), model.service_count == 0, model.damage_count == 0
+            ))
+
+
+def rebuild_cost_summary():
+    """Kompletní přepočet agregátů ze servisních záznamů a poškození; vrací počet řádků"""
+    deltas = CostDeltas()
+    for row in db.session.execute(select(ServiceRecord.vehicle_id, ServiceRecord.service_date, ServiceRecord.cost)):
+        deltas.add(_service_contribution(*row), 1)
+    for row in db.session.execute(select(
+        DamageRecord.vehicle_id, DamageRecord.date_of_damage, DamageRecord.estimated_cost, DamageRecord.actual_cost
+    )):
+        deltas.add(_damage_contribution(*row), 1)
+
+    db.session.execute(delete(VehicleCostSummary))
+    db.session.execute(delete(VehicleCostTotal))
+    month_rows = deltas.month_rows()
+    if month_rows:
+        db.session.execute(VehicleCostSummary.__table__.insert(), month_rows)
+        db.session.execute(VehicleCostTotal.__table__.insert(), deltas.total_rows())
+    db.session.commit()
+    return len(month_rows)
+
+
+def init_costs(app):
+    """Průběžná údržba agregátů při každém flush a příkaz pro úplný přepočet"""
+    if not event.contains(RoutingSession, 'before_flush', _track_cost_changes):
+        event.listen(RoutingSession, 'before_flush', _track_cost_changes)
+
+    @app.cli.command('rebuild-cost-summary')
+    def rebuild_cost_summary_command():
+        """Přepočet agregátu nákladů vozidel (flask --app src.main rebuild-cost-summary)"""
+        rows = rebuild_cost_summary()
+        print(f'Agregát nákladů přepočítán: {rows} řádků (vozidlo, měsíc)')
+
+
+def ensure_cost_summary():
+    """Naplnění prázdného agregátu při prvním nasazení nad existujícími daty"""
+    if db.session.query(VehicleCostTotal.vehicle_id).first():
+        return 0
+    if not (db.session.query(ServiceRecord.service_id).first() or db.session.query(DamageRecord.damage_id).first()):
+        return 0
+    return rebuild_cost_summary()
+
+
+def _year_range(year):
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def vehicle_costs(vehicle_id, year=None):
+    query = select(VehicleCostSummary).where(VehicleCostSummary.vehicle_id == vehicle_id)
+    if year:
+        start, end = _year_range(year)
+        query = query.where(VehicleCostSummary.month >= start, VehicleCostSummary.month < end)
+    months = db.session.scalars(query.order_by(VehicleCostSummary.month)).all()
+
+    if year:
+        totals = {column: sum((getattr(month, column) for month in months), 0) for column in SUMMARY_COLUMNS}
+        totals['total_cost'] = totals['service_cost'] + totals['damage_cost']
+        summary = {
+            column: float(value) if column.endswith('_cost') else value
+            for column, value in totals.items()
+        }
+    else:
+        total = db.session.get(VehicleCostTotal, vehicle_id)
+        summary = total.to_dict() if total else VehicleCostTotal(
+            vehicle_id=vehicle_id, **dict.fromkeys(TOTAL_COLUMNS, 0)
+        ).to_dict()
+        summary.pop('vehicle_id')
+
+    return {'vehicle_id': vehicle_id, 'year': year, **summary, 'months': [month.to_dict() for month in months]}
+
+
+def cost_ranking(limit=20, year=None):
+    """Vozidla seřazená podle celkových nákladů (bez roku z vehicle_cost_totals)"""
+    if year:
+        start, end = _year_range(year)
+        total_cost = func.sum(VehicleCostSummary.service_cost + VehicleCostSummary.damage_cost)
+        query = (
+            select(
+                VehicleCostSummary.vehicle_id,
+                func.sum(VehicleCostSummary.service_cost),
+                func.sum(VehicleCostSummary.damage_cost),
+                total_cost,
+                func.sum(VehicleCostSummary.service_count),
+                func.sum(VehicleCostSummary.damage_count),
+            )
+            .where(VehicleCostSummary.month >= start, VehicleCostSummary.month < end)
+            .group_by(VehicleCostSummary.vehicle_id)
+            .order_by(total_cost.desc(), VehicleCostSummary.vehicle_id)
+            .limit(limit)
+        )
+    else:
+        query = (
+            select(
+                VehicleCostTotal.vehicle_id,
+                VehicleCostTotal.service_cost,
+                VehicleCostTotal.damage_cost,
+                VehicleCostTotal.total_cost,
+                VehicleCostTotal.service_count,
+                VehicleCostTotal.damage_count,
+            )
+            .order_by(VehicleCostTotal.total_cost.desc(), VehicleCostTotal.vehicle_id)
+            .limit(limit)
+        )
+
+    rows = db.session.execute(query).all()
+    vehicles = {
+        vehicle.vehicle_id: vehicle
+        for vehicle in Vehicle.query.filter(Vehicle.vehicle_id.in_([row[0] for row in rows])).all()
+    }
+
+    ranking = []
+    for position, (vehicle_id, service_cost, damage_cost, total, service_count, damage_count) in enumerate(rows, 1):
+        vehicle = vehicles.get(vehicle_id)
+        ranking.append({
+            'rank': position,
+            'vehicle_id': vehicle_id,
+            'license_plate': vehicle.license_plate if vehicle else None,
+            'make': vehicle.make if vehicle else None,
+            'model': vehicle.model if vehicle else None,
+            'service_cost': float(service_cost or 0),
+            'damage_cost': float(damage_cost or 0),
+            'total_cost': float(total or 0),
+            'service_count': int(service_count or 0),
+            'damage_count': int(damage_count or 0)
+        })
+    return ranking
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select
+
+from src.models.change_event import ChangeEvent
+
+logger = logging.getLogger(__name__)
+
+POLL_BATCH_SIZE = 1000
+PRUNE_INTERVAL_SECONDS = 600
+# Jak dlouho čekat na dosud nepotvrzené ID (transakce s nižším ID může skončit později)
+GAP_TIMEOUT_SECONDS = 10
+
+
+def format_event(event):
+    """Serializace události do formátu text/event-stream"""
+    return f"id: {event['event_id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+def format_reset(reason):
+    return f"event: reset\ndata: {json.dumps({'reason': reason})}\n\n"
+
+
+class Subscriber:
+    """Omezená fronta jednoho SSE spojení; při přeplnění se klient pošle znovu načíst data"""
+
+    def __init__(self, queue_size):
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+
+class ChangeFeed:
+    """Jediný dotazovač change_events na proces, události rozesílá všem odběratelům
+
+    Místo dotazu na každé spojení se log čte jednou za poll_interval a nové
+    řádky se rozdělí do front odběratelů. ID vynechaná kvůli dosud běžícím
+    transakcím se hlídají ještě GAP_TIMEOUT_SECONDS, aby se neztratily.
+    """
+
+    def __init__(self, session_factory, poll_interval=1.0, queue_size=100, retention_hours=24):
+        self.session_factory = session_factory
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self.retention_hours = retention_hours
+        self._subscribers = set()
+        self._last_id = 0
+        self._gaps = {}
+        self._last_prune = 0
+        self._task = None
+
+    async def start(self):
+        async with self.session_factory() as session:
+            self._last_id = await session.scalar(select(func.max(ChangeEvent.event_id))) or 0
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def subscribe(self):
+        subscriber = Subscriber(self.queue_size)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self._subscribers.discard(subscriber)
+
+    async def backlog(self, after_id, limit):
+        """Události novější než after_id; reset=True, pokud část mezitím vypršela z logu"""
+        async with self.session_factory() as session:
+            oldest = await session.scalar(select(func.min(ChangeEvent.event_id)))
+            events = (await session.scalars(
+                select(ChangeEvent).where(ChangeEvent.event_id > after_id).order_by(ChangeEvent.event_id).limit(limit)
+            )).all()
+        reset = oldest is not None and after_id + 1 < oldest
+        return [event.to_dict() for event in events], reset
+
+    def _publish(self, event):
+        for subscriber in self._subscribers:
+            if subscriber.overflowed:
+                continue
+            try:
+                subscriber.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                subscriber.overflowed = True
+
+    async def poll(self):
+        now = time.monotonic()
+        floor = min(self._gaps) - 1 if self._gaps else self._last_id
+
+        async with self.session_factory() as session:
+            events = (await session.scalars(
+                select(ChangeEvent).where(ChangeEvent.event_id > floor)
+                .order_by(ChangeEvent.event_id).limit(POLL_BATCH_SIZE)
+            )).all()
+
+        for event in events:
+            event_id = event.event_id
+            if event_id <= self._last_id:
+                if self._gaps.pop(event_id, None) is None:
+                    continue
+            else:
+                for missing in range(self._last_id + 1, event_id):
+                    self._gaps[missing] = now
+                self._last_id = event_id
+            self._publish(event.to_dict())
+
+        for event_id, seen_at in list(self._gaps.items()):
+            if now - seen_at > GAP_TIMEOUT_SECONDS:
+                del self._gaps[event_id]
+
+    async def prune(self):
+        cutoff = datetime.utcnow() - timedelta(hours=self.retention_hours)
+        async with self.session_factory() as session:
+            result = await session.execute(delete(ChangeEvent).where(ChangeEvent.created_at < cutoff))
+            await session.commit()
+        return result.rowcount
+
+    async def _run(self):
+        while True:
+            try:
+                await self.poll()
+                if time.monotonic() - self._last_prune > PRUNE_INTERVAL_SECONDS:
+                    self._last_prune = time.monotonic()
+                    removed = await self.prune()
+                    if removed:
+                        logger.info('Smazáno %d starých záznamů change_events', removed)
+            except Exception as e:
+                logger.warning('Čtení change_events selhalo: %s', e)
+            await asyncio.sleep(self.poll_interval)
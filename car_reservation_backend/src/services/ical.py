@@ -0,0 +1,191 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import selectinload
+
+from src.models.database import db, apply_increments, RoutingSession
+from src.models.calendar_feed import CalendarFeedVersion
+from src.models.reservation import Reservation
+from src.models.vehicle import Vehicle
+
+TOKEN_SALT = 'ical-feed'
+PAST_DAYS = 30
+FUTURE_DAYS = 365
+REFRESH_INTERVAL = 'PT15M'
+# Atributy vozidla, které se objevují v událostech feedu
+VEHICLE_FEED_ATTRIBUTES = ('license_plate', 'make', 'model')
+
+
+def _serializer():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt=TOKEN_SALT)
+
+
+def feed_token(feed_type, entity_id, owner_id):
+    """Podepsaný token feedu; platí, dokud je vlastník aktivní a nezmění se SECRET_KEY"""
+    return _serializer().dumps([feed_type, entity_id, owner_id])
+
+
+def load_feed_token(token):
+    """(feed_type, entity_id, owner_id) z tokenu, None pro neplatný podpis"""
+    try:
+        feed_type, entity_id, owner_id = _serializer().loads(token)
+    except (BadSignature, TypeError, ValueError):
+        return None
+    return feed_type, entity_id, owner_id
+
+
+def _attribute_values(instance, name):
+    history = inspect(instance).attrs[name].history
+    return {value for value in (*history.added, *history.unchanged, *history.deleted) if value is not None}
+
+
+def _changed_feeds(session):
+    feeds = set()
+    for instances in (session.new, session.dirty, session.deleted):
+        for instance in instances:
+            if isinstance(instance, Reservation):
+                feeds.update(('user', int(user_id)) for user_id in _attribute_values(instance, 'user_id'))
+                feeds.update(('vehicle', int(vehicle_id)) for vehicle_id in _attribute_values(instance, 'vehicle_id'))
+            elif isinstance(instance, Vehicle) and instance in session.dirty:
+                state = inspect(instance)
+                if any(state.attrs[name].history.has_changes() for name in VEHICLE_FEED_ATTRIBUTES):
+                    feeds.add(('vehicle', instance.vehicle_id))
+    return feeds
+
+
+def _bump_feed_versions(session, flush_context):
+    feeds = _changed_feeds(session)
+    if feeds:
+        rows = [{'feed_type': feed_type, 'entity_id': entity_id, 'version': 1} for feed_type, entity_id in feeds]
+        apply_increments(session.connection(), CalendarFeedVersion, ('feed_type', 'entity_id'), ('version',), rows)
+
+
+class FeedCache:
+    """Vykreslené feedy v paměti workeru (LRU), platné jen pro danou verzi"""
+
+    def __init__(self, max_size=500):
+        self.max_size = max_size
+        self._feeds = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, etag):
+        with self._lock:
+            cached = self._feeds.get(key)
+            if cached is None or cached[0] != etag:
+                return None
+            self._feeds.move_to_end(key)
+            return cached[1]
+
+    def put(self, key, etag, body):
+        with self._lock:
+            self._feeds[key] = (etag, body)
+            self._feeds.move_to_end(key)
+            while len(self._feeds) > self.max_size:
+                self._feeds.popitem(last=False)
+
+
+def init_ical(app):
+    """Zvyšování verzí feedů při změnách rezervací a cache vykreslených feedů"""
+    if not event.contains(RoutingSession, 'after_flush', _bump_feed_versions):
+        event.listen(RoutingSession, 'after_flush', _bump_feed_versions)
+    app.extensions['ical_cache'] = FeedCache(app.config['ICAL_CACHE_SIZE'])
+
+
+def feed_etag(feed_type, entity_id):
+    """ETag z verze feedu a dnešního data (okno událostí se posouvá denně)"""
+    feed = db.session.get(CalendarFeedVersion, (feed_type, entity_id))
+    version = feed.version if feed else 0
+    return f'{feed_type}-{entity_id}-{version}-{datetime.utcnow():%Y%m%d}'
+
+
+def _escape(value):
+    return (
+        str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def _fold(line):
+    """Zalomení řádku po 75 oktetech podle RFC 5545"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    while encoded:
+        limit = 75 if not parts else 74
+        chunk = encoded[:limit]
+        # Nedělit vícebajtový znak UTF-8
+        while chunk and len(chunk) < len(encoded) and (encoded[len(chunk)] & 0xC0) == 0x80:
+            chunk = chunk[:-1]
+        parts.append(chunk.decode('utf-8'))
+        encoded = encoded[len(chunk):]
+    return '\r\n '.join(parts)
+
+
+def _timestamp(value):
+    return value.strftime('%Y%m%dT%H%M%SZ')
+
+
+def _event_lines(reservation):
+    calendar_event = reservation.to_calendar_event()
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:reservation-{reservation.reservation_id}@car-reservation',
+        f'DTSTAMP:{_timestamp(reservation.updated_at or reservation.created_at)}',
+        f'LAST-MODIFIED:{_timestamp(reservation.updated_at or reservation.created_at)}',
+        f'DTSTART:{_timestamp(reservation.start_time)}',
+        f'DTEND:{_timestamp(reservation.end_time)}',
+        f'SUMMARY:{_escape(calendar_event["title"])}',
+        'STATUS:CONFIRMED',
+    ]
+    if reservation.destination:
+        lines.append(f'LOCATION:{_escape(reservation.destination)}')
+    if reservation.purpose:
+        lines.append(f'DESCRIPTION:{_escape(reservation.purpose)}')
+    lines.append('END:VEVENT')
+    return lines
+
+
+def render_feed(feed_type, entity_id, name):
+    """iCalendar s nezrušenými rezervacemi uživatele nebo vozidla"""
+    now = datetime.utcnow()
+    query = Reservation.query.options(
+        selectinload(Reservation.vehicle),
+        selectinload(Reservation.user)
+    ).filter(
+        Reservation.status != 'Cancelled',
+        Reservation.end_time >= now - timedelta(days=PAST_DAYS),
+        Reservation.start_time <= now + timedelta(days=FUTURE_DAYS)
+    )
+    if feed_type == 'user':
+        query = query.filter(Reservation.user_id == entity_id)
+    else:
+        query = query.filter(Reservation.vehicle_id == entity_id)
+
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Car Reservation//Rezervace vozidel//CS',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{_escape(name)}',
+        f'REFRESH-INTERVAL;VALUE=DURATION:{REFRESH_INTERVAL}',
+        f'X-PUBLISHED-TTL:{REFRESH_INTERVAL}',
+    ]
+    for reservation in query.order_by(Reservation.start_time).all():
+        lines.extend(_event_lines(reservation))
+    lines.append('END:VCALENDAR')
+    return ''.join(_fold(line) + '\r\n' for line in lines)
+
+
+def cached_feed(feed_type, entity_id, name, etag):
+    cache = current_app.extensions['ical_cache']
+    body = cache.get((feed_type, entity_id), etag)
+    if body is None:
+        body = render_feed(feed_type, entity_id, name)
+        cache.put((feed_type, entity_id), etag, body)
+    return body
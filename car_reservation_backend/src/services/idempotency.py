@@ -0,0 +1,161 @@
+import hashlib
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import current_app, jsonify, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+
+from src.models.database import db
+from src.models.idempotency_key import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+# Po této době se rozpracovaný požadavek (spadlý worker) smí provést znovu
+LOCK_SECONDS = 60
+POLL_SECONDS = 0.05
+PRUNE_INTERVAL_SECONDS = 300
+
+_pruned_at = 0.0
+
+
+def _hash(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _claim(key_hash, request_hash, now):
+    """Založení rozpracovaného záznamu; True, pokud požadavek provádí tento worker"""
+    global _pruned_at
+    table = IdempotencyKey.__table__
+    try:
+        with db.engine.begin() as connection:
+            if time.time() - _pruned_at > PRUNE_INTERVAL_SECONDS:
+                _pruned_at = time.time()
+                connection.execute(delete(table).where(table.c.expires_at < now))
+            connection.execute(table.insert().values(
+                key_hash=key_hash,
+                request_hash=request_hash,
+                status='pending',
+                locked_until=now + timedelta(seconds=LOCK_SECONDS),
+                created_at=now,
+                expires_at=now + timedelta(hours=current_app.config['IDEMPOTENCY_TTL_HOURS'])
+            ))
+        return True
+    except IntegrityError:
+        return False
+
+
+def _take_over(key_hash, now):
+    """Převzetí prošlého nebo opuštěného záznamu; uspěje jen jeden z workerů"""
+    table = IdempotencyKey.__table__
+    with db.engine.begin() as connection:
+        result = connection.execute(
+            delete(table).where(
+                table.c.key_hash == key_hash,
+                (table.c.expires_at < now) | ((table.c.status == 'pending') & (table.c.locked_until < now))
+            )
+        )
+    return result.rowcount > 0
+
+
+def _load(key_hash):
+    with db.engine.connect() as connection:
+        return connection.execute(
+            select(IdempotencyKey.__table__).where(IdempotencyKey.key_hash == key_hash)
+        ).first()
+
+
+def _store(key_hash, response):
+    table = IdempotencyKey.__table__
+    with db.engine.begin() as connection:
+        connection.execute(update(table).where(table.c.key_hash == key_hash).values(
+            status='completed',
+            response_status=response.status_code,
+            response_body=response.get_data(as_text=True),
+            response_mimetype=response.mimetype
+        ))
+
+
+def _release(key_hash):
+    # Bez uložené odpovědi může klient požadavek zopakovat naostro
+    with db.engine.begin() as connection:
+        connection.execute(delete(IdempotencyKey.__table__).where(IdempotencyKey.key_hash == key_hash))
+
+
+def _replay(record):
+    response = current_app.response_class(
+        record.response_body, status=record.response_status, mimetype=record.response_mimetype
+    )
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _in_progress():
+    response = jsonify({'error': f'A request with this {HEADER} is still in progress'})
+    response.status_code = 409
+    response.headers['Retry-After'] = '1'
+    return response
+
+
+def _wait_for_result(key_hash, request_hash):
+    """Výsledek dřívějšího požadavku se stejným klíčem
+
+    Souběžný duplikát počká na výsledek prvního požadavku místo druhého
+    provedení. Vrací None, pokud záznam zmizel nebo propadl a požadavek se
+    má provést.
+    """
+    deadline = time.monotonic() + current_app.config['IDEMPOTENCY_WAIT_SECONDS']
+    while True:
+        record = _load(key_hash)
+        now = datetime.utcnow()
+        if record is None:
+            return None
+        if record.expires_at < now or (record.status == 'pending' and record.locked_until < now):
+            if _take_over(key_hash, now):
+                return None
+            continue
+        if record.request_hash != request_hash:
+            return jsonify({'error': f'{HEADER} was already used for a different request'}), 422
+        if record.status == 'completed':
+            return _replay(record)
+        if time.monotonic() > deadline:
+            return _in_progress()
+        time.sleep(POLL_SECONDS)
+
+
+def idempotent(f):
+    """Dekorátor pro POST endpointy: opakování se stejným Idempotency-Key vrátí
+    uloženou odpověď místo nového provedení (musí být pod @jwt_required)"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        client_key = request.headers.get(HEADER)
+        if not client_key:
+            return f(*args, **kwargs)
+        if len(client_key) > MAX_KEY_LENGTH:
+            return jsonify({'error': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'}), 400
+
+        key_hash = _hash(get_jwt_identity(), request.path, client_key)
+        request_hash = _hash(request.method, request.path, request.get_data())
+
+        while not _claim(key_hash, request_hash, datetime.utcnow()):
+            result = _wait_for_result(key_hash, request_hash)
+            if result is not None:
+                return result
+
+        try:
+            response = current_app.make_response(f(*args, **kwargs))
+        except Exception:
+            _release(key_hash)
+            raise
+        if response.status_code >= 500:
+            _release(key_hash)
+        else:
+            _store(key_hash, response)
+        return response
+    return decorated
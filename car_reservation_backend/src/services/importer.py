@@ -0,0 +1,254 @@
+import csv
+import io
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+
+from src.models.database import db, dialect_insert
+from src.models.vehicle import Vehicle
+from src.models.app_user import AppUser
+from src.models.location import Location
+from src.models.role import Role
+from src.services.accounts import EMPLOYEE_ROLE
+
+BATCH_SIZE = 500
+
+VEHICLE_REQUIRED_FIELDS = ['make', 'model', 'license_plate', 'fuel_type', 'seating_capacity', 'transmission_type']
+VEHICLE_DATE_FIELDS = [
+    'last_service_date', 'next_service_date', 'technical_inspection_expiry_date',
+    'highway_vignette_expiry_date', 'emission_inspection_expiry_date'
+]
+USER_REQUIRED_FIELDS = ['intranet_id', 'first_name', 'last_name', 'email']
+
+
+def _to_int(data, field, default=None):
+    value = data.get(field, default)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{field} must be an integer')
+
+
+def vehicle_values(data):
+    """Validace dat nového vozidla (stejná pravidla pro POST /vehicles i import)
+
+    Vrací slovník hodnot sloupců, při chybě vyhodí ValueError se zprávou pro API.
+    """
+    for field in VEHICLE_REQUIRED_FIELDS:
+        if field not in data:
+            raise ValueError(f'{field} is required')
+
+    values = {
+        'make': data['make'],
+        'model': data['model'],
+        'license_plate': data['license_plate'],
+        'color': data.get('color'),
+        'fuel_type': data['fuel_type'],
+        'seating_capacity': _to_int(data, 'seating_capacity'),
+        'transmission_type': data['transmission_type'],
+        'status': data.get('status', 'Active'),
+        'description': data.get('description'),
+        'odometer_reading': _to_int(data, 'odometer_reading', 0),
+        'entry_permissions_notes': data.get('entry_permissions_notes')
+    }
+
+    for field in VEHICLE_DATE_FIELDS:
+        if data.get(field):
+            try:
+                values[field] = datetime.strptime(data[field], '%Y-%m-%d').date()
+            except ValueError:
+                raise ValueError(f'Invalid date format for {field}. Use YYYY-MM-DD')
+
+    return values
+
+
+def user_values(data, role_ids):
+    for field in USER_REQUIRED_FIELDS:
+        if field not in data:
+            raise ValueError(f'{field} is required')
+
+    role_name = data.get('role', EMPLOYEE_ROLE)
+    if role_name not in role_ids:
+        raise ValueError(f'Unknown role {role_name}')
+
+    is_active = data.get('is_active', 'true').strip().lower()
+    if is_active not in ('true', 'false', '1', '0'):
+        raise ValueError('is_active must be true or false')
+
+    return {
+        'intranet_id': data['intranet_id'],
+        'first_name': data['first_name'],
+        'last_name': data['last_name'],
+        'email': data['email'],
+        'phone_number': data.get('phone_number'),
+        'role_id': role_ids[role_name],
+        'is_active': is_active in ('true', '1')
+    }
+
+
+def location_value(data, default, location_ids):
+    """Pobočka řádku importu; bez sloupce location_id výchozí pobočka admina"""
+    if 'location_id' not in data:
+        return default
+    location_id = _to_int(data, 'location_id')
+    if location_id not in location_ids:
+        raise ValueError('Location not found')
+    return location_id
+
+
+def check_admin_scope(admin, location_id, all_locations=False):
+    """Pravidla services.locations.require_admin pro jeden řádek importu (ValueError)
+
+    Bez pobočky (sdílené vozidlo, uživatel se všemi pobočkami) smí řádek
+    vložit jen admin všech poboček.
+    """
+    if (all_locations or location_id is None) and admin.location_id is not None:
+        raise ValueError('Admin access to all locations required')
+    if not admin.administers(location_id):
+        raise ValueError('Admin access to this location required')
+
+
+def read_csv(stream):
+    """Postupné čtení CSV z binárního streamu; prázdné buňky se berou jako chybějící
+
+    Vrací dvojice (číslo řádku v souboru, data).
+    """
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    for data in reader:
+        yield reader.line_num, {
+            key.strip(): value.strip()
+            for key, value in data.items()
+            if key and value is not None and value.strip() != ''
+        }
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def add_error(self, row, message):
+        self.errors.append({'row': row, 'error': message})
+
+    def to_dict(self):
+        return {
+            'created': self.created,
+            'failed': len(self.errors),
+            'errors': self.errors
+        }
+
+
+def _insert_batch(model, key_field, batch):
+    """Vložení dávky jedním INSERT ... ON CONFLICT DO NOTHING RETURNING
+
+    Vrací množinu klíčů skutečně vložených řádků; chybějící klíče narazily na
+    existující záznam (unikátní omezení).
+    """
+    insert = dialect_insert(model)
+    key_column = getattr(model, key_field)
+
+    if insert is None:
+        inserted = set()
+        for values in batch:
+            try:
+                with db.session.begin_nested():
+                    db.session.add(model(**values))
+                inserted.add(values[key_field])
+            except IntegrityError:
+                pass
+        return inserted
+
+    statement = insert.on_conflict_do_nothing().returning(key_column)
+    return set(db.session.scalars(statement, batch).all())
+
+
+def _import(rows, model, unique_fields, parse, duplicate_message):
+    report = ImportReport()
+    key_field = unique_fields[0]
+    seen = {field: set() for field in unique_fields}
+    batch = []
+
+    def flush(batch):
+        pending = batch
+        # Existující záznamy se odfiltrují jedním IN dotazem na dávku
+        for field in unique_fields:
+            column = getattr(model, field)
+            existing = set(db.session.scalars(
+                db.select(column).where(column.in_([values[field] for _, values in pending]))
+            ).all())
+            kept = []
+            for row, values in pending:
+                if values[field] in existing:
+                    report.add_error(row, duplicate_message)
+                else:
+                    kept.append((row, values))
+            pending = kept
+
+        if pending:
+            # Souběžně vložené záznamy zachytí ON CONFLICT DO NOTHING
+            inserted = _insert_batch(model, key_field, [values for _, values in pending])
+            for row, values in pending:
+                if values[key_field] not in inserted:
+                    report.add_error(row, duplicate_message)
+            report.created += len(inserted)
+            db.session.commit()
+
+    for row, data in rows:
+        try:
+            values = parse(data)
+        except ValueError as e:
+            report.add_error(row, str(e))
+            continue
+
+        duplicate = next((field for field in unique_fields if values[field] in seen[field]), None)
+        if duplicate:
+            report.add_error(row, f'Duplicate {duplicate} in file')
+            continue
+        for field in unique_fields:
+            seen[field].add(values[field])
+
+        batch.append((row, values))
+        if len(batch) >= BATCH_SIZE:
+            flush(batch)
+            batch = []
+
+    if batch:
+        flush(batch)
+    report.errors.sort(key=lambda error: error['row'])
+    return report
+
+
+def _location_ids():
+    return set(db.session.scalars(db.select(Location.location_id)).all())
+
+
+def import_vehicles(stream, admin):
+    location_ids = _location_ids()
+
+    def parse(data):
+        values = vehicle_values(data)
+        values['location_id'] = location_value(data, admin.location_id, location_ids)
+        check_admin_scope(admin, values['location_id'])
+        return values
+
+    return _import(
+        read_csv(stream), Vehicle, ['license_plate'], parse,
+        'Vehicle with this license plate already exists'
+    )
+
+
+def import_users(stream, admin):
+    role_ids = {role.role_name: role.role_id for role in Role.query.all()}
+    location_ids = _location_ids()
+
+    def parse(data):
+        values = user_values(data, role_ids)
+        values['location_id'] = location_value(data, admin.location_id, location_ids)
+        # Přidělení role je stejně citlivé jako PUT /users/<id>/role pro uživatele bez pobočky
+        check_admin_scope(admin, values['location_id'], all_locations='role' in data)
+        return values
+
+    return _import(
+        read_csv(stream), AppUser, ['intranet_id', 'email'], parse,
+        'User with this intranet_id or email already exists'
+    )
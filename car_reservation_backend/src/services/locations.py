@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, jsonify
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import func, inspect, or_, select, text
+
+from src.models.database import db
+from src.models.app_user import AppUser
+from src.models.reservation import Reservation
+from src.models.vehicle import Vehicle
+
+# Hodnota ?location_id= pro celý vozový park místo výchozí pobočky uživatele
+ALL_LOCATIONS = 'all'
+# Tabulky, které dostaly sloupec location_id až se zavedením poboček
+LOCATED_MODELS = (Vehicle, AppUser)
+# Indexy, přes které se dotazy omezené na pobočku nedotknou zbytku vozového parku
+LOCATION_INDEXES = (
+    'ix_vehicles_location_id_status', 'ix_vehicles_location_id_updated_at',
+    'ix_users_location_id', 'ix_reservations_vehicle_id_start_time'
+)
+
+
+def resolve_location(value, default=None):
+    """ID pobočky z parametru ?location_id=
+
+    Bez parametru platí výchozí pobočka uživatele, 'all' znamená celý
+    vozový park (None). Neplatné číslo vyhodí ValueError.
+    """
+    if value is None or value == '':
+        return default
+    if value == ALL_LOCATIONS:
+        return None
+    return int(value)
+
+
+def require_admin(location_id=None, all_locations=False):
+    """Helper function to check if current user is admin of the location
+
+    location_id None means a shared vehicle (any admin); all_locations
+    requires an admin without a home location, e.g. for anything that
+    grants or removes access to every location.
+    """
+    user = AppUser.query.get(get_jwt_identity())
+    if not user or not user.is_admin():
+        return jsonify({'error': 'Admin access required'}), 403
+    if all_locations and user.location_id is not None:
+        return jsonify({'error': 'Admin access to all locations required'}), 403
+    if not user.administers(location_id):
+        return jsonify({'error': 'Admin access to this location required'}), 403
+    return None
+
+
+def location_vehicles(location_id):
+    """Podmínka na vozidla pobočky včetně sdílených vozidel bez pobočky"""
+    return or_(Vehicle.location_id == location_id, Vehicle.location_id.is_(None))
+
+
+def at_location(model, location_id):
+    """Podmínka na rezervace (i archivované) vozidel pobočky a sdílených vozidel
+
+    Poddotaz jde přes index (location_id, status) vozidel a rezervace se pak
+    hledají indexem (vehicle_id, start_time), takže dotaz roste s velikostí
+    pobočky, ne celého vozového parku.
+    """
+    return model.vehicle_id.in_(select(Vehicle.vehicle_id).where(location_vehicles(location_id)))
+
+
+def fleet_fingerprint_query(location_id):
+    """Počet vozidel pobočky (se sdílenými) a čas poslední změny, pro location_id None celého parku
+
+    Každá změna vozidla (i hromadné UPDATE z telematiky, servisního plánu a
+    importu) posune updated_at, převedení vozidla jinam změní počet. Dotaz
+    obslouží samotný index (location_id, updated_at).
+    """
+    query = select(func.count(), func.max(Vehicle.updated_at)).select_from(Vehicle)
+    if location_id is not None:
+        query = query.where(location_vehicles(location_id))
+    return query
+
+
+class LocationCache:
+    """Seznamy vozidel poboček v paměti workeru (LRU), platné jen pro daný otisk
+
+    Otisk (počet, max updated_at) nepozná změnu potvrzenou se starším
+    updated_at, než je už viditelné maximum; takovou změnu zachytí až
+    vypršení záznamu po ttl sekundách.
+    """
+
+    def __init__(self, max_size=200, ttl=30.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, fingerprint):
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None or cached[0] != fingerprint or time.monotonic() - cached[2] >= self.ttl:
+                return None
+            self._entries.move_to_end(key)
+            return cached[1]
+
+    def put(self, key, fingerprint, value):
+        with self._lock:
+            self._entries[key] = (fingerprint, value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+def init_locations(app):
+    """Cache seznamů vozidel po pobočkách"""
+    app.extensions['location_cache'] = LocationCache(app.config['LOCATION_CACHE_SIZE'], app.config['LOCATION_CACHE_TTL'])
+
+
+def cached_vehicle_list(location_id, status, load):
+    """Seznam vozidel pobočky (to_dict) z cache, při změně vozového parku znovu přes load()"""
+    cache = current_app.extensions['location_cache']
+    fingerprint = tuple(db.session.execute(fleet_fingerprint_query(location_id)).one())
+    key = (location_id, status)
+    vehicles = cache.get(key, fingerprint)
+    if vehicles is None:
+        vehicles = [vehicle.to_dict() for vehicle in load()]
+        cache.put(key, fingerprint, vehicles)
+    return vehicles
+
+
+def ensure_location_columns():
+    """Sloupce location_id a jejich indexy i v databázích vytvořených před zavedením poboček"""
+    inspector = inspect(db.engine)
+    with db.engine.begin() as connection:
+        for model in LOCATED_MODELS:
+            table = model.__tablename__
+            if 'location_id' not in {column['name'] for column in inspector.get_columns(table)}:
+                connection.execute(text(
+                    f'ALTER TABLE {table} ADD COLUMN location_id INTEGER REFERENCES locations(location_id)'
+                ))
+    for model in (*LOCATED_MODELS, Reservation):
+        for index in model.__table__.indexes:
+            if index.name in LOCATION_INDEXES:
+                index.create(db.engine, checkfirst=True)
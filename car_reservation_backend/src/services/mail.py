@@ -0,0 +1,406 @@
+import logging
+import os
+import smtplib
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from email.message import EmailMessage
+
+from flask import current_app
+from sqlalchemy import event, inspect, or_, select, update
+
+from src.models.database import db, dialect_insert, RoutingSession
+from src.models.outbox_message import OutboxMessage
+from src.models.reservation import Reservation
+from src.models.vehicle import Vehicle
+from src.models.app_user import AppUser
+from src.models.role import Role
+from src.services.accounts import ADMIN_ROLE
+
+logger = logging.getLogger(__name__)
+
+WAKE_KEY = 'mail_queued'
+CLAIM_SECONDS = 300
+# Po probuzení se chvíli čeká, aby se zprávy z návalu rezervací odeslaly jednou dávkou
+BATCH_WINDOW_SECONDS = 0.5
+# Lhůty vozidel hlídané souhrnem (sloupec, popis v e-mailu)
+COMPLIANCE_FIELDS = (
+    ('technical_inspection_expiry_date', 'STK'),
+    ('highway_vignette_expiry_date', 'dálniční známka'),
+    ('emission_inspection_expiry_date', 'emisní kontrola'),
+)
+
+
+def mail_enabled(config):
+    return bool(config.get('MAIL_SERVER'))
+
+
+def _period(reservation):
+    return f'{reservation.start_time:%d.%m.%Y %H:%M} – {reservation.end_time:%d.%m.%Y %H:%M} (UTC)'
+
+
+def _reservation_message(reservation, kind, user, vehicle):
+    first_name, email = user
+    license_plate, make, model = vehicle
+    if kind == 'reservation_created':
+        subject = f'Potvrzení rezervace vozidla {license_plate}'
+        intro = 'vaše rezervace vozidla byla vytvořena.'
+    else:
+        subject = f'Zrušení rezervace vozidla {license_plate}'
+        intro = 'vaše rezervace vozidla byla zrušena.'
+    body = (
+        f'Dobrý den {first_name},\n\n{intro}\n\n'
+        f'Vozidlo: {make} {model} ({license_plate})\n'
+        f'Termín: {_period(reservation)}\n'
+        f'Cíl cesty: {reservation.destination}\n'
+        f'Účel: {reservation.purpose}\n'
+    )
+    return {'kind': kind, 'recipient': email, 'subject': subject, 'body': body}
+
+
+def _queue_reservation_mail(session, flush_context):
+    if not mail_enabled(current_app.config):
+        return
+
+    items = [(instance, 'reservation_created') for instance in session.new if isinstance(instance, Reservation)]
+    for instance in session.dirty:
+        if isinstance(instance, Reservation) and instance.status == 'Cancelled':
+            if inspect(instance).attrs.status.history.has_changes():
+                items.append((instance, 'reservation_cancelled'))
+    if not items:
+        return
+
+    connection = session.connection()
+    users = {
+        row.user_id: (row.first_name, row.email)
+        for row in connection.execute(
+            select(AppUser.user_id, AppUser.first_name, AppUser.email)
+            .where(AppUser.user_id.in_([int(instance.user_id) for instance, _ in items]))
+        )
+    }
+    vehicles = {
+        row.vehicle_id: (row.license_plate, row.make, row.model)
+        for row in connection.execute(
+            select(Vehicle.vehicle_id, Vehicle.license_plate, Vehicle.make, Vehicle.model)
+            .where(Vehicle.vehicle_id.in_([int(instance.vehicle_id) for instance, _ in items]))
+        )
+    }
+
+    rows = []
+    for instance, kind in items:
+        user = users.get(int(instance.user_id))
+        vehicle = vehicles.get(int(instance.vehicle_id))
+        if user and user[1] and vehicle:
+            rows.append({
+                **_reservation_message(instance, kind, user, vehicle),
+                'status': 'pending',
+                'attempts': 0,
+                'next_attempt_at': datetime.utcnow(),
+                'created_at': datetime.utcnow()
+            })
+    if rows:
+        connection.execute(OutboxMessage.__table__.insert(), rows)
+        session.info[WAKE_KEY] = True
+
+
+def _wake_dispatcher(session):
+    if session.info.pop(WAKE_KEY, False):
+        dispatcher = current_app.extensions.get('mail_dispatcher')
+        if dispatcher is not None:
+            dispatcher.wake()
+
+
+def _discard_wake(session, previous_transaction=None):
+    session.info.pop(WAKE_KEY, None)
+
+
+class SMTPConnection:
+    """Jedno SMTP spojení workeru, znovu použité pro všechny dávky
+
+    Spojení nečinné déle než idle_seconds se před dalším použitím zavře,
+    protože ho server mezitím obvykle ukončí sám.
+    """
+
+    def __init__(self, config, idle_seconds=60):
+        self.host = config['MAIL_SERVER']
+        self.port = config['MAIL_PORT']
+        self.use_tls = config['MAIL_USE_TLS']
+        self.username = config.get('MAIL_USERNAME')
+        self.password = config.get('MAIL_PASSWORD')
+        self.idle_seconds = idle_seconds
+        self._smtp = None
+        self._used_at = None
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.use_tls:
+            smtp.starttls()
+        if self.username:
+            smtp.login(self.username, self.password or '')
+        self._smtp = smtp
+
+    def send(self, message):
+        if self._smtp is not None and datetime.utcnow() - self._used_at > timedelta(seconds=self.idle_seconds):
+            self.close()
+        if self._smtp is None:
+            self._connect()
+        try:
+            self._smtp.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            self._smtp = None
+            self._connect()
+            self._smtp.send_message(message)
+        self._used_at = datetime.utcnow()
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+
+class MailDispatcher:
+    """Odesílání zpráv z outboxu po dávkách jedním SMTP spojením
+
+    Dávka se nejdřív zabere (claim_token) jedním UPDATE, takže více workerů
+    může odesílat současně bez dvojího doručení. Neúspěšná zpráva se zkusí
+    znovu s exponenciálně rostoucí prodlevou, po max_attempts se označí
+    jako failed. Vlákno na pozadí se probudí po každé potvrzené rezervaci,
+    jinak kontroluje outbox jednou za poll_interval.
+    """
+
+    def __init__(self, app, batch_size=50, max_attempts=6, retry_base_seconds=60, poll_interval=30):
+        self.app = app
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.poll_interval = poll_interval
+        self.sender = app.config.get('MAIL_DEFAULT_SENDER') or app.config.get('MAIL_USERNAME')
+        self.connection = SMTPConnection(app.config)
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def ensure_started(self):
+        # Vlákno se spouští až ve workeru (po fork), ne v master procesu gunicornu
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='mail-dispatcher', daemon=True)
+                self._thread.start()
+
+    def wake(self):
+        self.ensure_started()
+        self._wakeup.set()
+
+    def _claim(self, now):
+        token = str(uuid.uuid4())
+        due = (
+            OutboxMessage.status == 'pending',
+            OutboxMessage.next_attempt_at <= now,
+            or_(OutboxMessage.claimed_until.is_(None), OutboxMessage.claimed_until < now)
+        )
+        batch = select(OutboxMessage.message_id).where(*due).order_by(OutboxMessage.next_attempt_at).limit(self.batch_size)
+        db.session.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.message_id.in_(batch), *due)
+            .values(claim_token=token, claimed_until=now + timedelta(seconds=CLAIM_SECONDS))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return OutboxMessage.query.filter_by(claim_token=token).order_by(OutboxMessage.message_id).all()
+
+    def _email(self, outbox_message):
+        message = EmailMessage()
+        message['From'] = self.sender
+        message['To'] = outbox_message.recipient
+        message['Subject'] = outbox_message.subject
+        message.set_content(outbox_message.body)
+        return message
+
+    def _retry_later(self, outbox_message, error, now):
+        outbox_message.attempts += 1
+        outbox_message.last_error = str(error)[:1000]
+        if outbox_message.attempts >= self.max_attempts:
+            outbox_message.status = 'failed'
+        else:
+            delay = self.retry_base_seconds * 2 ** (outbox_message.attempts - 1)
+            outbox_message.next_attempt_at = now + timedelta(seconds=delay)
+
+    def dispatch_batch(self):
+        """Odeslání jedné dávky; vrací počet zpracovaných zpráv"""
+        now = datetime.utcnow()
+        messages = self._claim(now)
+        connection_error = None
+        for outbox_message in messages:
+            message_id = outbox_message.message_id
+            if connection_error is not None:
+                # Server je nedostupný, zbytek dávky se jen odloží
+                self._retry_later(outbox_message, connection_error, now)
+            else:
+                try:
+                    self.connection.send(self._email(outbox_message))
+                    outbox_message.status = 'sent'
+                    outbox_message.sent_at = datetime.utcnow()
+                    outbox_message.attempts += 1
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError, smtplib.SMTPSenderRefused) as e:
+                    self._retry_later(outbox_message, e, now)
+                except (smtplib.SMTPException, OSError) as e:
+                    logger.warning('SMTP server %s není dostupný: %s', self.connection.host, e)
+                    self.connection.close()
+                    connection_error = e
+                    self._retry_later(outbox_message, e, now)
+                except Exception as e:
+                    # Chyba jedné zprávy (např. neplatná adresa) nesmí zastavit zbytek dávky
+                    logger.warning('Zprávu %s z outboxu nelze odeslat: %s', message_id, e)
+                    self._retry_later(outbox_message, e, now)
+            outbox_message.claim_token = None
+            outbox_message.claimed_until = None
+            # Výsledek se potvrdí hned po každé zprávě; pád workeru uprostřed
+            # dávky tak znovu odešle nejvýš jednu zprávu, ne celou dávku
+            try:
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.warning('Stav zprávy %s z outboxu nelze uložit: %s', message_id, e)
+        return len(messages)
+
+    def dispatch_pending(self):
+        """Odesílání, dokud jsou v outboxu splatné zprávy; vrací počet zpracovaných"""
+        processed = 0
+        while True:
+            count = self.dispatch_batch()
+            processed += count
+            if count < self.batch_size:
+                return processed
+
+    def _run(self):
+        while True:
+            if self._wakeup.wait(self.poll_interval):
+                time.sleep(BATCH_WINDOW_SECONDS)
+            self._wakeup.clear()
+            try:
+                with self.app.app_context():
+                    self.dispatch_pending()
+            except Exception as e:
+                logger.warning('Odesílání e-mailů z outboxu selhalo: %s', e)
+
+
+def queue_compliance_digest(warning_days, today=None):
+    """Zařazení denního souhrnu blížících se a prošlých lhůt vozidel adminům
+
+    Jeden e-mail na admina a den (dedupe_key), bez ohledu na počet vozidel.
+    Vrací počet nově zařazených zpráv.
+    """
+    today = today or date.today()
+    horizon = today + timedelta(days=warning_days)
+    vehicles = Vehicle.query.filter(
+        Vehicle.status != 'Archived',
+        or_(*(getattr(Vehicle, field) <= horizon for field, _ in COMPLIANCE_FIELDS))
+    ).all()
+
+    deadlines = []
+    for vehicle in vehicles:
+        for field, label in COMPLIANCE_FIELDS:
+            deadline = getattr(vehicle, field)
+            if deadline and deadline <= horizon:
+                deadlines.append((deadline, vehicle, label))
+    if not deadlines:
+        return 0
+
+    lines = []
+    for deadline, vehicle, label in sorted(deadlines, key=lambda item: (item[0], item[1].license_plate)):
+        state = 'PROŠLÉ' if deadline < today else f'za {(deadline - today).days} dní'
+        lines.append(f'- {vehicle.license_plate} ({vehicle.make} {vehicle.model}): {label} {deadline:%d.%m.%Y} – {state}')
+    body = (
+        f'Dobrý den,\n\nlhůty vozidel, které vyprší do {horizon:%d.%m.%Y} nebo již vypršely:\n\n'
+        + '\n'.join(lines) + '\n'
+    )
+
+    admins = AppUser.query.join(Role).filter(
+        Role.role_name == ADMIN_ROLE,
+        AppUser.is_active.is_(True),
+        AppUser.email.isnot(None)
+    ).all()
+    rows = [{
+        'kind': 'compliance_digest',
+        'recipient': admin.email,
+        'subject': f'Souhrn lhůt vozidel k {today:%d.%m.%Y} ({len(deadlines)})',
+        'body': body,
+        'dedupe_key': f'compliance-digest:{today.isoformat()}:{admin.user_id}',
+        'status': 'pending',
+        'attempts': 0,
+        'next_attempt_at': datetime.utcnow(),
+        'created_at': datetime.utcnow()
+    } for admin in admins]
+    if not rows:
+        return 0
+
+    insert = dialect_insert(OutboxMessage)
+    if insert is not None:
+        statement = insert.on_conflict_do_nothing(index_elements=['dedupe_key']).returning(OutboxMessage.message_id)
+        queued = len(db.session.execute(statement, rows).all())
+    else:
+        existing = set(db.session.scalars(
+            select(OutboxMessage.dedupe_key).where(OutboxMessage.dedupe_key.in_([row['dedupe_key'] for row in rows]))
+        ))
+        rows = [row for row in rows if row['dedupe_key'] not in existing]
+        if rows:
+            db.session.execute(OutboxMessage.__table__.insert(), rows)
+        queued = len(rows)
+    db.session.commit()
+    return queued
+
+
+def init_mail(app):
+    """Outbox e-mailů k rezervacím, odesílání na pozadí a příkazy pro cron"""
+    for name, listener in (
+        ('after_flush', _queue_reservation_mail),
+        ('after_commit', _wake_dispatcher),
+        ('after_rollback', _discard_wake),
+        ('after_soft_rollback', _discard_wake),
+    ):
+        if not event.contains(RoutingSession, name, listener):
+            event.listen(RoutingSession, name, listener)
+
+    dispatcher = None
+    if mail_enabled(app.config):
+        dispatcher = MailDispatcher(
+            app,
+            batch_size=app.config['MAIL_BATCH_SIZE'],
+            max_attempts=app.config['MAIL_MAX_ATTEMPTS'],
+            retry_base_seconds=app.config['MAIL_RETRY_BASE_SECONDS'],
+            poll_interval=app.config['MAIL_POLL_INTERVAL']
+        )
+        app.extensions['mail_dispatcher'] = dispatcher
+
+        @app.before_request
+        def start_mail_dispatcher():
+            dispatcher.ensure_started()
+
+    @app.cli.command('send-compliance-digest')
+    def send_compliance_digest_command():
+        """Souhrn blížících se lhůt vozidel adminům (flask --app src.main send-compliance-digest)"""
+        if dispatcher is None:
+            print('E-maily nejsou nakonfigurovány (MAIL_SERVER)')
+            return
+        queued = queue_compliance_digest(app.config['COMPLIANCE_WARNING_DAYS'])
+        sent = dispatcher.dispatch_pending()
+        dispatcher.connection.close()
+        print(f'Zařazeno {queued} souhrnů, zpracováno {sent} zpráv z outboxu')
+
+    @app.cli.command('dispatch-mail')
+    def dispatch_mail_command():
+        """Okamžité odeslání splatných zpráv z outboxu (flask --app src.main dispatch-mail)"""
+        if dispatcher is None:
+            print('E-maily nejsou nakonfigurovány (MAIL_SERVER)')
+            return
+        sent = dispatcher.dispatch_pending()
+        dispatcher.connection.close()
+        print(f'Zpracováno {sent} zpráv z outboxu')
@@ -0,0 +1,240 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import current_app
+from werkzeug.formparser import FormDataParser
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+THUMBNAIL_SIZE = (320, 320)
+
+# Rozpoznání formátu podle prvních bajtů souboru, nikoli podle hlaviček klienta
+IMAGE_SIGNATURES = [
+    (0, b'\xff\xd8\xff', '.jpg', 'image/jpeg'),
+    (0, b'\x89PNG\r\n\x1a\n', '.png', 'image/png'),
+    (8, b'WEBP', '.webp', 'image/webp'),
+    (4, b'ftypheic', '.heic', 'image/heic'),
+    (4, b'ftypheix', '.heic', 'image/heic'),
+    (4, b'ftypmif1', '.heic', 'image/heic'),
+]
+
+
+class InvalidPhotoError(ValueError):
+    pass
+
+
+class StoredPhoto:
+    """Výsledek uložení jedné fotografie"""
+
+    def __init__(self, path, sha256, size, content_type, created):
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+        self.content_type = content_type
+        self.created = created
+
+
+class HashingFile:
+    """Dočasný soubor, který při zápisu průběžně počítá SHA-256 obsahu
+
+    Tělo požadavku se tak zapisuje po blocích na disk a po dokončení uploadu
+    je hash známý bez dalšího čtení souboru.
+    """
+
+    def __init__(self, directory):
+        fd, self.name = tempfile.mkstemp(dir=directory, suffix='.upload')
+        self._file = os.fdopen(fd, 'w+b')
+        self._hash = hashlib.sha256()
+        self.size = 0
+        self.head = b''
+
+    def write(self, data):
+        if len(self.head) < 16:
+            self.head += data[:16 - len(self.head)]
+        self._hash.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+    def seek(self, *args):
+        return self._file.seek(*args)
+
+    def tell(self):
+        return self._file.tell()
+
+    def read(self, *args):
+        return self._file.read(*args)
+
+    def flush(self):
+        return self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def discard(self):
+        self.close()
+        if os.path.exists(self.name):
+            os.remove(self.name)
+
+
+def get_upload_root():
+    return current_app.config['UPLOAD_FOLDER']
+
+
+def get_photos_dir():
+    return os.path.join(get_upload_root(), 'photos')
+
+
+def get_thumbnails_dir():
+    return os.path.join(get_upload_root(), 'thumbnails')
+
+
+def _get_tmp_dir():
+    # Dočasné soubory na stejném svazku jako cíl, aby přesun byl atomický
+    tmp_dir = os.path.join(get_upload_root(), 'tmp')
+    os.makedirs(tmp_dir, exist_ok=True)
+    return tmp_dir
+
+
+def detect_image_type(head):
+    for offset, signature, extension, content_type in IMAGE_SIGNATURES:
+        if head[offset:offset + len(signature)] == signature:
+            return extension, content_type
+    return None
+
+
+def content_path(sha256, extension):
+    """Relativní cesta souboru podle hashe obsahu (ab/cd/abcd...jpg)"""
+    return os.path.join(sha256[:2], sha256[2:4], sha256 + extension)
+
+
+def thumbnail_relative_path(sha256):
+    return os.path.join(sha256[:2], sha256 + '.jpg')
+
+
+def thumbnail_path(sha256):
+    return os.path.join(get_thumbnails_dir(), thumbnail_relative_path(sha256))
+
+
+def _commit(hashing_file):
+    """Přesun dočasného souboru pod content-addressed cestu (s deduplikací)"""
+    hashing_file.close()
+
+    detected = detect_image_type(hashing_file.head)
+    if not detected or hashing_file.size == 0:
+        hashing_file.discard()
+        raise InvalidPhotoError('Unsupported image format. Use JPEG, PNG, WebP or HEIC')
+
+    extension, content_type = detected
+    sha256 = hashing_file.hexdigest()
+    relative_path = content_path(sha256, extension)
+    target = os.path.join(get_photos_dir(), relative_path)
+
+    created = not os.path.exists(target)
+    if created:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(hashing_file.name, target)
+        schedule_thumbnail(target, sha256)
+    else:
+        hashing_file.discard()
+
+    return StoredPhoto(relative_path, sha256, hashing_file.size, content_type, created)
+
+
+def store_stream(stream):
+    """Uložení fotografie z binárního těla požadavku (Content-Type: image/*)"""
+    hashing_file = HashingFile(_get_tmp_dir())
+    try:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            hashing_file.write(chunk)
+    except Exception:
+        hashing_file.discard()
+        raise
+    return _commit(hashing_file)
+
+
+def store_multipart(request):
+    """Uložení všech souborů z multipart/form-data požadavku
+
+    Soubory se při parsování zapisují rovnou do HashingFile, celé tělo se
+    nikdy nedrží v paměti.
+    """
+    tmp_dir = _get_tmp_dir()
+    opened = []
+
+    def stream_factory(total_content_length, content_type, filename, content_length=None):
+        hashing_file = HashingFile(tmp_dir)
+        opened.append(hashing_file)
+        return hashing_file
+
+    parser = FormDataParser(
+        stream_factory=stream_factory,
+        max_content_length=current_app.config.get('MAX_CONTENT_LENGTH'),
+        silent=False,
+    )
+
+    stored = []
+    try:
+        _, _, files = parser.parse(request.stream, request.mimetype, request.content_length, request.mimetype_params)
+        for storage in files.values():
+            stored.append(_commit(storage.stream))
+    finally:
+        # Úklid souborů, které nebyly přesunuty (chyba parsování nebo neplatný formát)
+        for hashing_file in opened:
+            hashing_file.discard()
+
+    return stored
+
+
+def _make_thumbnail(source, target, size):
+    """Běží v samostatném procesu mimo obsluhu požadavku"""
+    from PIL import Image, ImageOps
+
+    if os.path.exists(target):
+        return target
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(size)
+        tmp_target = target + '.tmp'
+        image.convert('RGB').save(tmp_target, 'JPEG', quality=80)
+    os.replace(tmp_target, target)
+    return target
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=current_app.config['THUMBNAIL_WORKERS'])
+        return _executor
+
+
+def _log_thumbnail_result(future):
+    error = future.exception()
+    if error:
+        logger.warning('Generování náhledu selhalo: %s', error)
+
+
+def schedule_thumbnail(source, sha256):
+    """Zařazení generování náhledu do process poolu bez čekání na výsledek"""
+    try:
+        future = _get_executor().submit(_make_thumbnail, source, thumbnail_path(sha256), THUMBNAIL_SIZE)
+        future.add_done_callback(_log_thumbnail_result)
+    except Exception as e:
+        logger.warning('Náhled pro %s nebyl naplánován: %s', sha256, e)
@@ -0,0 +1,137 @@
+import threading
+import time
+import uuid
+from collections import deque
+
+from sqlalchemy import make_url, exc as sa_exc
+from sqlalchemy.pool import QueuePool, NullPool
+
+POOL_MODES = ('queue', 'pgbouncer')
+
+
+class PoolStats:
+    """Statistiky čekání na spojení z poolu"""
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=window)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self._recent.append(wait)
+
+    def to_dict(self):
+        with self._lock:
+            recent = sorted(self._recent)
+
+        def percentile(pct):
+            if not recent:
+                return None
+            return round(recent[min(len(recent) - 1, int(len(recent) * pct / 100))] * 1000, 3)
+
+        return {
+            'checkouts': self.checkouts,
+            'timeouts': self.timeouts,
+            'wait_ms_avg': round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else None,
+            'wait_ms_max': round(self.max_wait * 1000, 3),
+            'wait_ms_p50': percentile(50),
+            'wait_ms_p95': percentile(95),
+        }
+
+
+class InstrumentedPoolMixin:
+    """Měření doby čekání na spojení (včetně případného navázání nového)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except sa_exc.TimeoutError:
+            self.stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - started)
+        return connection
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedNullPool(InstrumentedPoolMixin, NullPool):
+    pass
+
+
+def build_engine_options(config, database_url, async_mode=False):
+    """SQLALCHEMY_ENGINE_OPTIONS podle DB_POOL_* nastavení prostředí
+
+    V režimu pgbouncer se spojení nedrží v aplikaci (NullPool) a pooling
+    zajišťuje PgBouncer v transaction módu.
+    """
+    if config.DB_POOL_MODE not in POOL_MODES:
+        raise ValueError(f'Neznámý DB_POOL_MODE: {config.DB_POOL_MODE}')
+
+    url = make_url(database_url)
+
+    if config.DB_POOL_MODE == 'pgbouncer':
+        options = {'poolclass': NullPool if async_mode else InstrumentedNullPool}
+        if async_mode and url.get_backend_name() == 'postgresql':
+            # Transaction pooling nesdílí prepared statements mezi transakcemi
+            options['connect_args'] = {
+                'statement_cache_size': 0,
+                'prepared_statement_cache_size': 0,
+                'prepared_statement_name_func': lambda: f'__asyncpg_{uuid.uuid4()}__',
+            }
+        return options
+
+    options = {
+        'pool_pre_ping': config.DB_POOL_PRE_PING,
+        'pool_recycle': config.DB_POOL_RECYCLE,
+    }
+
+    # SQLite v paměti používá vlastní pool bez nastavitelné velikosti
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return options
+
+    options.update({
+        'pool_size': config.DB_POOL_SIZE,
+        'max_overflow': config.DB_MAX_OVERFLOW,
+        'pool_timeout': config.DB_POOL_TIMEOUT,
+    })
+    if not async_mode:
+        options['poolclass'] = InstrumentedQueuePool
+    return options
+
+
+def get_pool_status(engine):
+    """Aktuální stav poolu enginu pro admin endpoint"""
+    pool = engine.pool
+    status = {'pool_class': type(pool).__name__}
+
+    if isinstance(pool, QueuePool):
+        status.update({
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+            'timeout': pool.timeout(),
+        })
+
+    stats = getattr(pool, 'stats', None)
+    if stats:
+        status['waits'] = stats.to_dict()
+
+    return status
@@ -0,0 +1,241 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from flask import current_app, jsonify, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from sqlalchemy import case, literal, select
+
+from src.models.database import db, dialect_insert
+from src.models.app_user import AppUser
+from src.models.rate_limit_bucket import RateLimitBucket
+from src.models.role import Role
+from src.services.accounts import ADMIN_ROLE, EMPLOYEE_ROLE
+
+logger = logging.getLogger(__name__)
+
+ANONYMOUS = 'anonymous'
+ENDPOINT_CLASSES = ('read', 'write', 'export', 'login', 'feed')
+# Objemné výstupy s vlastním (menším) rozpočtem
+EXPORT_ENDPOINTS = {
+    'audit.get_audit_log',
+    'costs.get_cost_ranking',
+    'imports.import_vehicles_csv',
+    'imports.import_users_csv',
+}
+# Přihlášení je vždy anonymní; ranní nával za firemním NAT nesmí vyčerpat zápisy IP
+LOGIN_ENDPOINTS = {'auth.login'}
+# iCal feedy stahují kalendářové servery; každý feed má vlastní kbelík podle tokenu
+FEED_ENDPOINTS = {'ical.get_user_feed', 'ical.get_vehicle_feed'}
+# Telematická brána se ověřuje API klíčem a posílá data ve vlastním rytmu
+EXEMPT_ENDPOINTS = {'telemetry.ingest_odometer'}
+# Jak často databázové úložiště maže kbelíky, které se mezitím zcela doplnily
+PRUNE_INTERVAL_SECONDS = 300
+
+
+def parse_budget(spec):
+    """'read=120/60,write=30/60' -> {'read': (kapacita, tokenů za sekundu), ...}
+
+    120/60 znamená nejvýše 120 požadavků najednou a doplňování 120 za 60 s.
+    Chybějící třída endpointu není omezena.
+    """
+    budget = {}
+    for part in filter(None, (item.strip() for item in (spec or '').split(','))):
+        endpoint_class, _, value = part.partition('=')
+        requests_count, _, seconds = value.partition('/')
+        endpoint_class = endpoint_class.strip()
+        if endpoint_class not in ENDPOINT_CLASSES:
+            raise ValueError(f'Neznámá třída endpointu v limitu: {endpoint_class}')
+        capacity = float(requests_count)
+        budget[endpoint_class] = (capacity, capacity / float(seconds or 1))
+    return budget
+
+
+def retry_after(tokens, rate):
+    """Za kolik sekund bude v kbelíku celý token"""
+    return max(1, math.ceil((1 - tokens) / rate))
+
+
+class MemoryBucketStore:
+    """Kbelíky v paměti workeru; s více workery je limit úměrně volnější"""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate, now):
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+        return allowed, tokens
+
+    def _prune(self, now):
+        # Plný kbelík se neliší od chybějícího
+        self._buckets = {key: value for key, value in self._buckets.items() if value[2] > now}
+
+
+class DatabaseBucketStore:
+    """Kbelíky sdílené všemi workery v tabulce rate_limit_buckets
+
+    Doplnění a odběr tokenu proběhne jedním INSERT ... ON CONFLICT DO UPDATE
+    RETURNING v samostatné krátké transakci, mimo session požadavku.
+    """
+
+    def __init__(self, engine, insert):
+        # Engine i INSERT se drží přímo, kontrola běží i mimo kontext aplikace (ASGI)
+        self.engine = engine
+        self.insert = insert
+        self._pruned_at = time.time()
+
+    def take(self, key, capacity, rate, now):
+        table = RateLimitBucket.__table__
+        insert = self.insert
+        refilled = table.c.tokens + (insert.excluded.updated_at - table.c.updated_at) * literal(rate)
+        refilled = case((refilled > capacity, literal(capacity)), else_=refilled)
+        statement = insert.values(
+            bucket_key=key, tokens=capacity - 1, updated_at=now, allowed=True
+        ).on_conflict_do_update(
+            index_elements=['bucket_key'],
+            set_={
+                'tokens': case((refilled >= 1, refilled - 1), else_=refilled),
+                'updated_at': insert.excluded.updated_at,
+                'allowed': refilled >= 1,
+            }
+        ).returning(table.c.allowed, table.c.tokens)
+
+        with self.engine.begin() as connection:
+            allowed, tokens = connection.execute(statement).one()
+            if now - self._pruned_at > PRUNE_INTERVAL_SECONDS:
+                self._pruned_at = now
+                connection.execute(table.delete().where(table.c.updated_at < now - PRUNE_INTERVAL_SECONDS))
+        return bool(allowed), tokens
+
+
+class RateLimiter:
+    """Token bucket podle identity (uživatel z JWT, jinak IP) a třídy endpointu"""
+
+    def __init__(self, budgets, store):
+        self.budgets = budgets
+        self.store = store
+
+    def check(self, key, role, endpoint_class):
+        """None, pokud je požadavek povolen, jinak počet sekund pro Retry-After"""
+        limit = self.budgets.get(role, self.budgets[EMPLOYEE_ROLE]).get(endpoint_class)
+        if limit is None:
+            return None
+        capacity, rate = limit
+        try:
+            allowed, tokens = self.store.take(f'{key}:{endpoint_class}', capacity, rate, time.time())
+        except Exception as e:
+            # Výpadek sdíleného úložiště nesmí zastavit aplikaci
+            logger.warning('Kontrola limitu požadavků selhala: %s', e)
+            return None
+        return None if allowed else retry_after(tokens, rate)
+
+
+def queue_wait_ms(header, now=None):
+    """Doba čekání požadavku ve frontě podle X-Request-Start (t=<unix čas>)
+
+    Proxy posílají sekundy (nginx ${msec}), milisekundy nebo mikrosekundy;
+    jednotka se pozná podle řádu hodnoty.
+    """
+    try:
+        started = float(header.strip().removeprefix('t='))
+    except (AttributeError, ValueError):
+        return None
+    if started > 1e14:
+        started /= 1e6
+    elif started > 1e11:
+        started /= 1e3
+    return ((now or time.time()) - started) * 1000
+
+
+def too_many_requests(message, seconds):
+    response = jsonify({'error': message, 'retry_after': seconds})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(seconds)
+    return response
+
+
+def role_query(user_id):
+    """Role uživatele ze záznamu; claim v tokenu by po odebrání role platil až do expirace"""
+    return select(Role.role_name).join(AppUser, AppUser.role_id == Role.role_id).where(AppUser.user_id == int(user_id))
+
+
+def endpoint_class():
+    if request.endpoint in LOGIN_ENDPOINTS:
+        return 'login'
+    if request.endpoint in FEED_ENDPOINTS:
+        return 'feed'
+    if request.endpoint in EXPORT_ENDPOINTS:
+        return 'export'
+    return 'read' if request.method in ('GET', 'HEAD') else 'write'
+
+
+def _admit_request():
+    if not request.path.startswith('/api/') or request.method == 'OPTIONS' or request.endpoint in EXEMPT_ENDPOINTS:
+        return None
+
+    # Požadavek, který čekal ve frontě déle, než klient vydrží, jen prodlužuje frontu;
+    # funguje jen za proxy, která posílá X-Request-Start (Render ji neposílá)
+    max_queue_ms = current_app.config['RATE_LIMIT_MAX_QUEUE_MS']
+    if max_queue_ms:
+        waited = queue_wait_ms(request.headers.get('X-Request-Start'))
+        if waited is not None and waited > max_queue_ms:
+            return too_many_requests('Server is busy, retry later', 1)
+
+    # Za proxy je remote_addr adresa klienta jen s PROXY_FIX_HOPS (ProxyFix v main.py)
+    key, role = f'ip:{request.remote_addr}', ANONYMOUS
+    try:
+        if verify_jwt_in_request(optional=True):
+            key, role = f'user:{get_jwt_identity()}', db.session.scalar(role_query(get_jwt_identity())) or EMPLOYEE_ROLE
+    except Exception:
+        # Neplatný token odmítne až samotný endpoint, do té doby se počítá k IP
+        pass
+
+    request_class = endpoint_class()
+    if request_class == 'feed':
+        # Kalendáře mnoha uživatelů za jednou IP (Google, Outlook) by jinak sdílely jeden kbelík
+        token = (request.view_args or {}).get('token', '')
+        key = 'feed:' + hashlib.sha256(token.encode()).hexdigest()[:32]
+
+    seconds = current_app.extensions['rate_limiter'].check(key, role, request_class)
+    if seconds is not None:
+        return too_many_requests('Too many requests', seconds)
+    return None
+
+
+def build_rate_limiter(app):
+    budgets = {
+        EMPLOYEE_ROLE: parse_budget(app.config['RATE_LIMIT_EMPLOYEE']),
+        ADMIN_ROLE: parse_budget(app.config['RATE_LIMIT_ADMIN']),
+        ANONYMOUS: parse_budget(app.config['RATE_LIMIT_ANONYMOUS']),
+    }
+    store = MemoryBucketStore()
+    if app.config['RATE_LIMIT_BACKEND'] == 'database':
+        insert = dialect_insert(RateLimitBucket)
+        if insert is not None:
+            store = DatabaseBucketStore(db.engine, insert)
+        else:
+            logger.warning('Databáze nepodporuje sdílené limity požadavků, používá se paměť workeru')
+    return RateLimiter(budgets, store)
+
+
+def init_rate_limit(app):
+    """Omezení požadavků na uživatele a třídu endpointu (odpověď 429 s Retry-After)"""
+    if not app.config['RATE_LIMIT_ENABLED']:
+        return
+
+    # dialect_insert potřebuje engine, ten je dostupný jen v kontextu aplikace
+    with app.app_context():
+        app.extensions['rate_limiter'] = build_rate_limiter(app)
+    app.before_request(_admit_request)
@@ -0,0 +1,172 @@
+import itertools
+import logging
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import text
+
+from src.models.database import db
+
+logger = logging.getLogger(__name__)
+
+# Zpoždění repliky v sekundách; na primární databázi (nebo bez replikace) vrací 0
+POSTGRES_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReplicaState:
+    """Stav jedné repliky zjištěný posledním health checkem"""
+
+    def __init__(self, bind_key):
+        self.bind_key = bind_key
+        self.healthy = False
+        self.lag = None
+        self.checked_at = None
+        self.checking = False
+
+
+class ReplicaRouter:
+    """Výběr read repliky podle zdraví a zpoždění replikace
+
+    Health check probíhá líně při výběru repliky, nejvýše jednou za
+    check_interval sekund pro každou repliku. Zámek chrání jen výběr pořadí
+    a zabrání souběžným kontrolám téže repliky; samotné spojení s replikou
+    probíhá mimo něj a ostatní vlákna mezitím použijí poslední známý stav.
+    Pokud žádná replika nesplňuje limit zpoždění, čte se z primární databáze.
+    """
+
+    def __init__(self, bind_keys, max_lag=5.0, check_interval=10.0, pin_seconds=5.0):
+        self.replicas = [ReplicaState(key) for key in bind_keys]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.pin_seconds = pin_seconds
+        self._cycle = itertools.cycle(range(len(self.replicas)))
+        self._lock = threading.Lock()
+        self._recent_writers = {}
+
+    def _check(self, replica):
+        healthy, lag = True, 0.0
+        try:
+            engine = db.engines[replica.bind_key]
+            with engine.connect() as connection:
+                if engine.dialect.name == 'postgresql':
+                    lag = float(connection.execute(POSTGRES_LAG_QUERY).scalar() or 0)
+                else:
+                    connection.execute(text('SELECT 1'))
+        except Exception as e:
+            logger.warning('Replika %s není dostupná: %s', replica.bind_key, e)
+            healthy, lag = False, None
+        with self._lock:
+            replica.healthy = healthy
+            replica.lag = lag
+            replica.checked_at = time.monotonic()
+            replica.checking = False
+
+    def _claim_check(self, replica):
+        """Zda má tohle vlákno repliku zkontrolovat (je na řadě a nikdo jiný ji nekontroluje)"""
+        with self._lock:
+            if replica.checking:
+                return False
+            if replica.checked_at is not None and time.monotonic() - replica.checked_at < self.check_interval:
+                return False
+            replica.checking = True
+            return True
+
+    def _is_usable(self, replica):
+        if self._claim_check(replica):
+            self._check(replica)
+        with self._lock:
+            return replica.healthy and replica.lag <= self.max_lag
+
+    def choose_engine(self):
+        """Vrátí engine použitelné repliky (round-robin) nebo None pro primární databázi"""
+        with self._lock:
+            order = [self.replicas[next(self._cycle)] for _ in range(len(self.replicas))]
+        for replica in order:
+            if self._is_usable(replica):
+                return db.engines[replica.bind_key]
+        return None
+
+    def mark_write(self, identity):
+        with self._lock:
+            now = time.monotonic()
+            self._recent_writers[identity] = now
+            # Průběžné čištění, aby slovník nerostl
+            if len(self._recent_writers) > 10000:
+                self._recent_writers = {
+                    key: at for key, at in self._recent_writers.items()
+                    if now - at < self.pin_seconds
+                }
+
+    def recently_wrote(self, identity):
+        written_at = self._recent_writers.get(identity)
+        return written_at is not None and time.monotonic() - written_at < self.pin_seconds
+
+    def stats(self):
+        return [{
+            'bind_key': replica.bind_key,
+            'healthy': replica.healthy,
+            'lag_seconds': replica.lag,
+        } for replica in self.replicas]
+
+
+def get_replica_binds(replica_urls):
+    """SQLALCHEMY_BINDS pro repliky z čárkou odděleného seznamu URL"""
+    binds = {}
+    for i, url in enumerate(u.strip() for u in replica_urls.split(',') if u.strip()):
+        if url.startswith('postgres://'):
+            url = url.replace('postgres://', 'postgresql://', 1)
+        binds[f'replica_{i}'] = url
+    return binds
+
+
+def init_replicas(app):
+    """Registrace routeru replik; volat po db.init_app"""
+    bind_keys = [key for key in app.config.get('SQLALCHEMY_BINDS', {}) if key.startswith('replica_')]
+    if not bind_keys:
+        return
+
+    router = ReplicaRouter(
+        bind_keys,
+        max_lag=app.config['DATABASE_REPLICA_MAX_LAG'],
+        check_interval=app.config['DATABASE_REPLICA_CHECK_INTERVAL'],
+        pin_seconds=app.config['DATABASE_REPLICA_PIN_SECONDS'],
+    )
+    app.extensions['replica_router'] = router
+
+    @app.after_request
+    def remember_writer(response):
+        # Uživatel, který právě zapisoval, čte po krátkou dobu z primární databáze
+        if g.get('wrote_to_primary'):
+            identity = g.get('replica_identity') or _current_identity()
+            if identity is not None:
+                router.mark_write(identity)
+        return response
+
+
+def _current_identity():
+    try:
+        return get_jwt_identity()
+    except Exception:
+        return None
+
+
+def use_replica(f):
+    """Dekorátor pro čtecí endpointy, které mohou číst z read repliky"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        router = current_app.extensions.get('replica_router')
+        if router:
+            identity = _current_identity()
+            g.replica_identity = identity
+            g.use_replica = not router.recently_wrote(identity)
+        return f(*args, **kwargs)
+    return decorated
@@ -0,0 +1,162 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import delete, or_, select
+
+from src.models.database import db
+from src.models.revoked_token import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+PRUNE_INTERVAL = 600
+# Jak daleko zpět se při každé synchronizaci znovu projdou záznamy podle revoked_at;
+# transakce s nižším revocation_id může být potvrzena až po vyšším
+RESCAN_SECONDS = 60
+
+
+def _timestamp(value):
+    # Sloupce v databázi jsou naivní UTC (datetime.utcnow)
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class TokenDenylist:
+    """Kopie tabulky revoked_tokens v paměti workeru
+
+    Kontrola tokenu je jen vyhledání v hashovací tabulce; databáze se ptá
+    nejvýše jednou za sync_seconds a jen na řádky novější než poslední
+    známé revocation_id nebo zneplatněné za posledních RESCAN_SECONDS
+    (ID potvrzená mimo pořadí). Vypršelé záznamy se průběžně zahazují, takže
+    velikost odpovídá počtu odhlášení za dobu platnosti tokenu.
+    """
+
+    def __init__(self, sync_seconds=2):
+        self.sync_seconds = sync_seconds
+        self._jtis = {}
+        self._users = {}
+        self._lock = threading.Lock()
+        self._last_id = 0
+        self._rescan_from = None
+        self._synced_at = 0.0
+        self._pruned_at = time.monotonic()
+
+    def _apply(self, row):
+        expires = _timestamp(row.expires_at)
+        if row.jti:
+            self._jtis[row.jti] = expires
+        elif row.user_id is not None:
+            key = str(row.user_id)
+            cutoff = _timestamp(row.revoked_at)
+            previous = self._users.get(key)
+            if previous is None or previous[0] < cutoff:
+                self._users[key] = (cutoff, expires)
+        self._last_id = max(self._last_id, row.revocation_id)
+
+    def sync(self):
+        started = datetime.utcnow()
+        if self._rescan_from is None:
+            query = select(RevokedToken).where(RevokedToken.expires_at > started)
+        else:
+            query = select(RevokedToken).where(or_(
+                RevokedToken.revocation_id > self._last_id,
+                RevokedToken.revoked_at >= self._rescan_from
+            ))
+        rows = db.session.execute(query.order_by(RevokedToken.revocation_id)).scalars().all()
+        with self._lock:
+            for row in rows:
+                self._apply(row)
+            self._rescan_from = started - timedelta(seconds=RESCAN_SECONDS)
+            self._synced_at = time.monotonic()
+
+    def request_sync(self):
+        """Vynucení synchronizace při příští kontrole (po zápisu v tomto workeru)"""
+        self._synced_at = 0.0
+
+    def prune(self):
+        now = time.time()
+        with self._lock:
+            self._jtis = {jti: expires for jti, expires in self._jtis.items() if expires > now}
+            self._users = {key: entry for key, entry in self._users.items() if entry[1] > now}
+            self._pruned_at = time.monotonic()
+
+        with db.engine.begin() as connection:
+            connection.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+
+    def maintenance_due(self):
+        """Zda příští kontrola půjde do databáze (synchronizace nebo mazání)"""
+        now = time.monotonic()
+        return now - self._synced_at >= self.sync_seconds or now - self._pruned_at >= PRUNE_INTERVAL
+
+    def _maintain(self):
+        now = time.monotonic()
+        try:
+            if now - self._synced_at >= self.sync_seconds:
+                self.sync()
+            if now - self._pruned_at >= PRUNE_INTERVAL:
+                self.prune()
+        except Exception as e:
+            # Při výpadku databáze platí poslední známý stav
+            db.session.rollback()
+            self._synced_at = now
+            logger.warning('Synchronizace zneplatněných tokenů selhala: %s', e)
+
+    def is_revoked(self, jwt_payload, maintain=True):
+        if maintain:
+            self._maintain()
+        if jwt_payload.get('jti') in self._jtis:
+            return True
+        entry = self._users.get(jwt_payload.get('sub'))
+        # Zneplatněné jsou tokeny vydané před revoked_at; iat má jen celé sekundy,
+        # proto přednost má přesný claim issued_at (starší tokeny ho nemají)
+        issued_at = jwt_payload.get('issued_at', jwt_payload.get('iat', 0))
+        return entry is not None and issued_at < entry[0]
+
+
+def init_revocation(app, jwt):
+    """Registrace kontroly zneplatněných tokenů pro všechny @jwt_required endpointy"""
+    denylist = TokenDenylist(sync_seconds=app.config['TOKEN_REVOCATION_SYNC_SECONDS'])
+    app.extensions['token_denylist'] = denylist
+
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(jwt_header, jwt_payload):
+        return denylist.is_revoked(jwt_payload)
+
+
+def is_token_revoked(jwt_payload, maintain=True):
+    denylist = current_app.extensions.get('token_denylist')
+    return bool(denylist and denylist.is_revoked(jwt_payload, maintain))
+
+
+def revocation_maintenance_due():
+    denylist = current_app.extensions.get('token_denylist')
+    return bool(denylist and denylist.maintenance_due())
+
+
+def _request_sync():
+    denylist = current_app.extensions.get('token_denylist')
+    if denylist:
+        denylist.request_sync()
+
+
+def revoke_token(jwt_payload):
+    """Zneplatnění jednoho tokenu (commit provádí volající)"""
+    db.session.add(RevokedToken(
+        jti=jwt_payload['jti'],
+        user_id=int(jwt_payload['sub']),
+        revoked_at=datetime.utcnow(),
+        expires_at=datetime.fromtimestamp(jwt_payload['exp'], timezone.utc).replace(tzinfo=None)
+    ))
+    _request_sync()
+
+
+def revoke_user_tokens(user_id):
+    """Zneplatnění všech dosud vydaných tokenů uživatele (commit provádí volající)"""
+    revoked_at = datetime.utcnow()
+    db.session.add(RevokedToken(
+        user_id=user_id,
+        revoked_at=revoked_at,
+        expires_at=revoked_at + current_app.config['JWT_ACCESS_TOKEN_EXPIRES']
+    ))
+    _request_sync()
@@ -0,0 +1,261 @@
+import logging
+import re
+
+from flask import current_app
+from sqlalchemy import text
+from sqlalchemy.orm import selectinload
+
+from src.models.database import db
+from src.models.vehicle import Vehicle
+from src.models.reservation import Reservation
+from src.models.service_record import ServiceRecord
+from src.models.damage_record import DamageRecord
+
+logger = logging.getLogger(__name__)
+
+MAX_TERMS = 10
+
+# Prohledávaný text jednotlivých entit. SPZ se indexuje i bez mezer,
+# aby '1A2 3456' i '1a23456' našly stejné vozidlo.
+SEARCH_SOURCES = {
+    'vehicle': {
+        'table': 'vehicles',
+        'id': 'vehicle_id',
+        'type_code': 0,
+        'owner': 'NULL',
+        'content': "coalesce({p}make, '') || ' ' || coalesce({p}model, '') || ' ' || "
+                   "coalesce({p}license_plate, '') || ' ' || replace(coalesce({p}license_plate, ''), ' ', '') || ' ' || "
+                   "coalesce({p}description, '')",
+    },
+    'reservation': {
+        'table': 'reservations',
+        'id': 'reservation_id',
+        'type_code': 1,
+        'owner': '{p}user_id',
+        'content': "coalesce({p}purpose, '') || ' ' || coalesce({p}destination, '')",
+    },
+    'damage_record': {
+        'table': 'damage_records',
+        'id': 'damage_id',
+        'type_code': 2,
+        'owner': 'NULL',
+        'content': "coalesce({p}description, '')",
+    },
+    'service_record': {
+        'table': 'service_records',
+        'id': 'service_id',
+        'type_code': 3,
+        'owner': 'NULL',
+        'content': "coalesce({p}description, '')",
+    },
+}
+
+# Model, primární klíč a vztahy načítané hromadně při sestavení výsledků
+SEARCH_MODELS = {
+    'vehicle': (Vehicle, 'vehicle_id', []),
+    'reservation': (Reservation, 'reservation_id', ['vehicle', 'user']),
+    'damage_record': (DamageRecord, 'damage_id', ['vehicle', 'photos']),
+    'service_record': (ServiceRecord, 'service_id', ['vehicle']),
+}
+
+PLATE_EXPRESSION = "lower(replace(license_plate, ' ', ''))"
+
+
+def _tsvector(source):
+    return f"to_tsvector('simple', {source['content'].format(p='')})"
+
+
+def _fts_rowid(source, prefix):
+    # Jednoznačné rowid v FTS tabulce: id entity * 4 + kód typu
+    return f"{prefix}{source['id']} * 4 + {source['type_code']}"
+
+
+def _init_postgres():
+    statements = [
+        f"CREATE INDEX IF NOT EXISTS idx_{source['table']}_search ON {source['table']} USING GIN ({_tsvector(source)})"
+        for source in SEARCH_SOURCES.values()
+    ]
+    for statement in statements:
+        with db.engine.begin() as connection:
+            connection.execute(text(statement))
+
+    # Trigramový index pro hledání části SPZ; pg_trgm nemusí být k dispozici
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+            connection.execute(text(
+                f'CREATE INDEX IF NOT EXISTS idx_vehicles_plate_trgm ON vehicles USING GIN ({PLATE_EXPRESSION} gin_trgm_ops)'
+            ))
+        return True
+    except Exception as e:
+        logger.warning('Trigramový index SPZ nebyl vytvořen: %s', e)
+        return False
+
+
+def _init_sqlite():
+    with db.engine.begin() as connection:
+        exists = connection.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'"
+        )).first()
+        if not exists:
+            connection.execute(text(
+                "CREATE VIRTUAL TABLE search_index USING fts5("
+                "content, entity_type UNINDEXED, entity_id UNINDEXED, owner_id UNINDEXED, "
+                "tokenize = 'unicode61 remove_diacritics 2')"
+            ))
+
+        for entity_type, source in SEARCH_SOURCES.items():
+            table = source['table']
+            insert = (
+                f"INSERT INTO search_index(rowid, content, entity_type, entity_id, owner_id) VALUES ("
+                f"{_fts_rowid(source, 'new.')}, {source['content'].format(p='new.')}, '{entity_type}', "
+                f"new.{source['id']}, {source['owner'].format(p='new.')});"
+            )
+            delete = f"DELETE FROM search_index WHERE rowid = {_fts_rowid(source, 'old.')};"
+            connection.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_search_ai AFTER INSERT ON {table} BEGIN {insert} END"
+            ))
+            connection.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_search_au AFTER UPDATE ON {table} BEGIN {delete} {insert} END"
+            ))
+            connection.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_search_ad AFTER DELETE ON {table} BEGIN {delete} END"
+            ))
+
+            if not exists:
+                # První naplnění indexu z existujících řádků
+                connection.execute(text(
+                    f"INSERT INTO search_index(rowid, content, entity_type, entity_id, owner_id) "
+                    f"SELECT {_fts_rowid(source, '')}, {source['content'].format(p='')}, '{entity_type}', "
+                    f"{source['id']}, {source['owner'].format(p='')} FROM {table}"
+                ))
+
+
+def init_search(app):
+    """Vytvoření fulltextových indexů; indexy pak udržuje databáze sama při zápisech"""
+    dialect = db.engine.dialect.name
+    trigram = False
+    try:
+        if dialect == 'postgresql':
+            trigram = _init_postgres()
+        elif dialect == 'sqlite':
+            _init_sqlite()
+        else:
+            logger.warning('Fulltextové vyhledávání není pro %s podporováno', dialect)
+            return
+    except Exception as e:
+        logger.warning('Fulltextové indexy nebyly vytvořeny: %s', e)
+        return
+    app.extensions['search'] = {'dialect': dialect, 'trigram': trigram}
+
+
+def extract_terms(query):
+    terms = [term.lower() for term in re.findall(r'\w+', query) if len(term) > 1]
+    return list(dict.fromkeys(terms))[:MAX_TERMS]
+
+
+def _search_postgres(terms, query, owner_id, limit, offset, trigram):
+    tsquery = ' | '.join(f'{term}:*' for term in terms)
+    params = {'tsquery': tsquery, 'limit': limit, 'offset': offset}
+
+    selects = []
+    for entity_type, source in SEARCH_SOURCES.items():
+        document = _tsvector(source)
+        rank = f"ts_rank({document}, q.query)"
+        condition = f"{document} @@ q.query"
+        if entity_type == 'vehicle' and trigram:
+            params['plate'] = '%' + re.sub(r'\s+', '', query.lower()) + '%'
+            rank = f"{rank} + CASE WHEN {PLATE_EXPRESSION} LIKE :plate THEN 1 ELSE 0 END"
+            condition = f"({condition} OR {PLATE_EXPRESSION} LIKE :plate)"
+        if entity_type == 'reservation' and owner_id is not None:
+            condition += ' AND user_id = :owner_id'
+            params['owner_id'] = owner_id
+        selects.append(
+            f"SELECT '{entity_type}' AS entity_type, {source['id']} AS entity_id, {rank} AS rank "
+            f"FROM {source['table']}, q WHERE {condition}"
+        )
+
+    sql = (
+        "WITH q AS (SELECT to_tsquery('simple', :tsquery) AS query) "
+        + ' UNION ALL '.join(selects)
+        + ' ORDER BY rank DESC, entity_type, entity_id LIMIT :limit OFFSET :offset'
+    )
+    return [(row[0], row[1], float(row[2])) for row in db.session.execute(text(sql), params)]
+
+
+def _search_sqlite(terms, owner_id, limit, offset):
+    match = ' OR '.join(f'"{term}"*' for term in terms)
+    params = {'match': match, 'limit': limit, 'offset': offset}
+    owner_filter = ''
+    if owner_id is not None:
+        owner_filter = "AND (entity_type != 'reservation' OR owner_id = :owner_id)"
+        params['owner_id'] = owner_id
+
+    sql = (
+        "SELECT entity_type, entity_id, bm25(search_index) AS rank FROM search_index "
+        f"WHERE search_index MATCH :match {owner_filter} "
+        "ORDER BY rank, rowid LIMIT :limit OFFSET :offset"
+    )
+    # bm25 vrací nižší hodnotu pro lepší shodu, pro API se otáčí znaménko
+    return [(row[0], row[1], -float(row[2])) for row in db.session.execute(text(sql), params)]
+
+
+def _title(entity_type, item):
+    if entity_type == 'vehicle':
+        return f'{item.make} {item.model} ({item.license_plate})'
+    if entity_type == 'reservation':
+        return f'{item.purpose} – {item.destination}'
+    if entity_type == 'service_record':
+        return f'{item.service_type}: {item.description[:80]}'
+    return item.description[:80]
+
+
+def search(query, owner_id=None, page=1, per_page=20):
+    """Seřazené výsledky napříč vozidly, rezervacemi a záznamy
+
+    owner_id omezí rezervace na jednoho uživatele (ne-admin). Vrací
+    (výsledky, has_more).
+    """
+    settings = current_app.extensions.get('search')
+    if settings is None:
+        raise RuntimeError('Search index is not available')
+
+    terms = extract_terms(query)
+    if not terms:
+        return [], False
+
+    offset = (page - 1) * per_page
+    if settings['dialect'] == 'postgresql':
+        hits = _search_postgres(terms, query, owner_id, per_page + 1, offset, settings['trigram'])
+    else:
+        hits = _search_sqlite(terms, owner_id, per_page + 1, offset)
+
+    has_more = len(hits) > per_page
+    hits = hits[:per_page]
+
+    # Načtení entit jedním dotazem na typ
+    ids_by_type = {}
+    for entity_type, entity_id, _ in hits:
+        ids_by_type.setdefault(entity_type, []).append(entity_id)
+
+    loaded = {}
+    for entity_type, ids in ids_by_type.items():
+        model, primary_key, relationships = SEARCH_MODELS[entity_type]
+        options = [selectinload(getattr(model, name)) for name in relationships]
+        for item in model.query.options(*options).filter(getattr(model, primary_key).in_(ids)).all():
+            loaded[(entity_type, getattr(item, primary_key))] = item
+
+    results = []
+    for entity_type, entity_id, rank in hits:
+        item = loaded.get((entity_type, entity_id))
+        if item is None:
+            continue
+        results.append({
+            'type': entity_type,
+            'id': entity_id,
+            'title': _title(entity_type, item),
+            'rank': round(rank, 6),
+            'item': item.to_dict()
+        })
+
+    return results, has_more
@@ -0,0 +1,165 @@
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func, select, update
+
+from src.models.database import db
+from src.models.vehicle import Vehicle
+from src.models.reservation import Reservation
+from src.models.service_record import ServiceRecord
+from src.models.odometer_reading import OdometerReading
+
+UPDATE_CHUNK_SIZE = 500
+HISTORY_DAYS = 90
+LOOKAHEAD_DAYS = 30
+
+
+class ServiceIntervals:
+    def __init__(self, km, days):
+        self.km = km
+        self.days = days
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config['SERVICE_INTERVAL_KM'], config['SERVICE_INTERVAL_DAYS'])
+
+
+def _reserved_hours(vehicle_ids, start, end):
+    """Rezervované hodiny vozidel v intervalu [start, end) jedním dotazem"""
+    hours = defaultdict(float)
+    rows = db.session.execute(
+        select(Reservation.vehicle_id, Reservation.start_time, Reservation.end_time).where(
+            Reservation.vehicle_id.in_(vehicle_ids),
+            Reservation.status != 'Cancelled',
+            Reservation.start_time < end,
+            Reservation.end_time > start
+        )
+    ).all()
+    for vehicle_id, reservation_start, reservation_end in rows:
+        overlap = min(reservation_end, end) - max(reservation_start, start)
+        hours[vehicle_id] += max(overlap.total_seconds(), 0) / 3600
+    return hours
+
+
+def _fleet_inputs(vehicle_ids, now):
+    """Vstupy projekce pro celý vozový park pevným počtem agregačních dotazů"""
+    history_start = now - timedelta(days=HISTORY_DAYS)
+
+    history = {
+        row.vehicle_id: row
+        for row in db.session.execute(
+            select(
+                OdometerReading.vehicle_id,
+                func.min(OdometerReading.recorded_at).label('first_at'),
+                func.max(OdometerReading.recorded_at).label('last_at'),
+                func.min(OdometerReading.odometer).label('first_odometer'),
+                func.max(OdometerReading.odometer).label('last_odometer'),
+            )
+            .where(OdometerReading.vehicle_id.in_(vehicle_ids), OdometerReading.recorded_at >= history_start)
+            .group_by(OdometerReading.vehicle_id)
+        )
+    }
+
+    last_service = (
+        select(ServiceRecord.vehicle_id, func.max(ServiceRecord.service_date).label('service_date'))
+        .where(ServiceRecord.vehicle_id.in_(vehicle_ids))
+        .group_by(ServiceRecord.vehicle_id)
+        .subquery()
+    )
+    last_services = dict(db.session.execute(select(last_service.c.vehicle_id, last_service.c.service_date)).all())
+
+    # Stav tachometru v den posledního servisu (poslední odečet do konce toho dne)
+    odometer_at_service = dict(db.session.execute(
+        select(OdometerReading.vehicle_id, func.max(OdometerReading.odometer))
+        .join(last_service, last_service.c.vehicle_id == OdometerReading.vehicle_id)
+        .where(func.date(OdometerReading.recorded_at) <= last_service.c.service_date)
+        .group_by(OdometerReading.vehicle_id)
+    ).all())
+
+    past_hours = _reserved_hours(vehicle_ids, history_start, now)
+    upcoming_hours = _reserved_hours(vehicle_ids, now, now + timedelta(days=LOOKAHEAD_DAYS))
+    return history, last_services, odometer_at_service, past_hours, upcoming_hours
+
+
+def project_next_service(vehicle, intervals, today, daily_rate, last_service_date, odometer_at_service):
+    """Datum příštího servisu: dřívější z termínu podle času a podle kilometrů (i v minulosti)"""
+    # Ručně zadané datum posledního servisu může být novější než servisní záznamy
+    known = [d for d in (last_service_date, vehicle.last_service_date) if d]
+    last_service_date = max(known) if known else (vehicle.created_at or datetime.utcnow()).date()
+    due = last_service_date + timedelta(days=intervals.days)
+
+    if daily_rate > 0:
+        if odometer_at_service is None:
+            # Bez odečtu z doby servisu se stav odhadne zpětně podle tempa
+            odometer_at_service = vehicle.odometer_reading - daily_rate * max((today - last_service_date).days, 0)
+        remaining_km = intervals.km - (vehicle.odometer_reading - odometer_at_service)
+        due = min(due, today + timedelta(days=max(math.ceil(remaining_km / daily_rate), 0)))
+
+    # Zpožděný servis si drží skutečné datum (je vidět, o kolik je po termínu);
+    # blokaci na dnešní den řeší Vehicle.service_window
+    return due
+
+
+def schedule_services(intervals, vehicle_ids=None, now=None):
+    """Přepočet next_service_date aktivních vozidel v jednom průchodu
+
+    Tempo (km/den) se bere z historie tachometru za HISTORY_DAYS. Pokud jsou
+    na příštích LOOKAHEAD_DAYS rezervace nad obvyklé vytížení, tempo se
+    úměrně zvýší podle km na hodinu rezervace (vlastní, jinak průměr parku).
+    Vrací slovník {vehicle_id: next_service_date}.
+    """
+    now = now or datetime.utcnow()
+    today = now.date()
+
+    query = Vehicle.query.filter(Vehicle.status == 'Active')
+    if vehicle_ids is not None:
+        query = query.filter(Vehicle.vehicle_id.in_(vehicle_ids))
+    vehicles = query.all()
+    if not vehicles:
+        return {}
+
+    ids = [vehicle.vehicle_id for vehicle in vehicles]
+    history, last_services, odometer_at_service, past_hours, upcoming_hours = _fleet_inputs(ids, now)
+
+    # Tempo z historie a km na hodinu rezervace (průměr parku jako náhrada)
+    rates = {}
+    km_per_hour = {}
+    for vehicle_id, row in history.items():
+        days = (row.last_at - row.first_at).total_seconds() / 86400
+        distance = row.last_odometer - row.first_odometer
+        if days >= 1:
+            rates[vehicle_id] = distance / days
+        if past_hours.get(vehicle_id):
+            km_per_hour[vehicle_id] = distance / past_hours[vehicle_id]
+    fleet_km_per_hour = sum(km_per_hour.values()) / len(km_per_hour) if km_per_hour else 0
+
+    projected = {}
+    for vehicle in vehicles:
+        vehicle_id = vehicle.vehicle_id
+        booked_rate = km_per_hour.get(vehicle_id, fleet_km_per_hour) * upcoming_hours.get(vehicle_id, 0) / LOOKAHEAD_DAYS
+        daily_rate = max(rates.get(vehicle_id, 0), booked_rate)
+        projected[vehicle_id] = project_next_service(
+            vehicle, intervals, today, daily_rate,
+            last_services.get(vehicle_id), odometer_at_service.get(vehicle_id)
+        )
+
+    items = list(projected.items())
+    for start in range(0, len(items), UPDATE_CHUNK_SIZE):
+        chunk = dict(items[start:start + UPDATE_CHUNK_SIZE])
+        db.session.execute(
+            update(Vehicle)
+            .where(Vehicle.vehicle_id.in_(list(chunk)))
+            .values(next_service_date=case(chunk, value=Vehicle.vehicle_id), updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+    db.session.commit()
+    return projected
+
+
+def init_service_schedule(app):
+    @app.cli.command('schedule-services')
+    def schedule_services_command():
+        """Projekce next_service_date všech vozidel (flask --app src.main schedule-services)"""
+        projected = schedule_services(ServiceIntervals.from_config(app.config))
+        print(f'Naplánován servis pro {len(projected)} vozidel')
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+from src.models.reservation import Reservation
+from src.models.vehicle import Vehicle
+
+# Kolik nejbližších volných termínů se nabídne pro vozidlo a pro srovnatelná vozidla
+SUGGESTION_LIMIT = 3
+# Jak daleko před a po požadovaném termínu se hledá
+SEARCH_HORIZON = timedelta(days=14)
+
+
+def _naive(value):
+    return value.replace(tzinfo=None)
+
+
+def nearest_gaps(busy, start, duration, search_from, search_to):
+    """Nejbližší umístění termínu délky duration do mezer mezi obsazenými intervaly
+
+    busy musí být seřazené podle začátku. Z každé mezery se vezme jediné
+    umístění – co nejblíž požadovanému začátku; vrací [(vzdálenost, od, do)].
+    """
+    placements = []
+    cursor = search_from
+    for busy_start, busy_end in [*busy, (search_to, search_to)]:
+        gap_end = min(busy_start, search_to)
+        if gap_end - cursor >= duration:
+            slot_start = min(max(start, cursor), gap_end - duration)
+            placements.append((abs(slot_start - start), slot_start, slot_start + duration))
+        cursor = max(cursor, busy_end)
+        if cursor >= search_to:
+            break
+    return placements
+
+
+def suggest_slots(vehicle, start_time, end_time, exclude_reservation_id=None, now=None):
+    """Nejbližší volné termíny stejné délky pro vozidlo a srovnatelná vozidla
+
+    Srovnatelná jsou aktivní vozidla téže pobočky (u sdíleného vozidla ostatní
+    sdílená) se stejným počtem míst a palivem.
+    Potvrzené rezervace všech kandidátů se načtou jedním dotazem seřazené
+    podle vozidla a začátku, mezery se pak hledají jedním průchodem.
+    """
+    now = now or datetime.utcnow()
+    start_time, end_time = _naive(start_time), _naive(end_time)
+    duration = end_time - start_time
+    search_from = max(now, start_time - SEARCH_HORIZON)
+    search_to = end_time + SEARCH_HORIZON
+
+    vehicles = Vehicle.query.filter(
+        Vehicle.status == 'Active',
+        (Vehicle.vehicle_id == vehicle.vehicle_id) | (
+            (Vehicle.seating_capacity == vehicle.seating_capacity) & (Vehicle.fuel_type == vehicle.fuel_type)
+            & Vehicle.location_id.is_not_distinct_from(vehicle.location_id)
+        )
+    ).all()
+
+    query = Reservation.query.with_entities(
+        Reservation.vehicle_id, Reservation.start_time, Reservation.end_time
+    ).filter(
+        Reservation.vehicle_id.in_([candidate.vehicle_id for candidate in vehicles]),
+        Reservation.status == 'Confirmed',
+        Reservation.start_time < search_to,
+        Reservation.end_time > search_from
+    )
+    if exclude_reservation_id:
+        query = query.filter(Reservation.reservation_id != exclude_reservation_id)
+
+    busy = {candidate.vehicle_id: [] for candidate in vehicles}
+    for vehicle_id, busy_start, busy_end in query.order_by(Reservation.vehicle_id, Reservation.start_time):
+        busy[vehicle_id].append((busy_start, busy_end))
+
+    same_vehicle, comparable = [], []
+    for candidate in vehicles:
+        intervals = busy[candidate.vehicle_id]
+        window = candidate.service_window()
+        if window:
+            intervals = sorted([*intervals, window])
+        for distance, slot_start, slot_end in nearest_gaps(intervals, start_time, duration, search_from, search_to):
+            slot = {
+                'vehicle_id': candidate.vehicle_id,
+                'license_plate': candidate.license_plate,
+                'start_time': slot_start.isoformat(),
+                'end_time': slot_end.isoformat()
+            }
+            (same_vehicle if candidate.vehicle_id == vehicle.vehicle_id else comparable).append((distance, slot_start, slot))
+
+    return {
+        'same_vehicle': [slot for _, _, slot in sorted(same_vehicle, key=lambda item: item[:2])[:SUGGESTION_LIMIT]],
+        'comparable_vehicles': [slot for _, _, slot in sorted(comparable, key=lambda item: item[:2])[:SUGGESTION_LIMIT]]
+    }
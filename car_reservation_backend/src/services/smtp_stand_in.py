@@ -0,0 +1,116 @@
+"""Minimální SMTP server pro vývoj a testy odesílání e-mailů
+
+Přijaté zprávy drží v paměti (a volitelně vypisuje), nic nedoručuje dál.
+Spuštění: python -m src.services.smtp_stand_in --port 1025
+a v aplikaci MAIL_SERVER=localhost, MAIL_PORT=1025, MAIL_USE_TLS=false.
+"""
+import argparse
+import socketserver
+import threading
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+
+    def _reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        server = self.server
+        self._reply('220 smtp-stand-in ready')
+        sender, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors='replace').strip()
+            verb = command[:4].upper()
+            if server.fail_commands and verb in server.fail_commands:
+                self._reply('451 Temporary failure')
+            elif verb == 'EHLO':
+                self._reply('250-smtp-stand-in')
+                self._reply('250 8BITMIME')
+            elif verb == 'HELO':
+                self._reply('250 smtp-stand-in')
+            elif verb == 'MAIL':
+                sender, recipients = command.split(':', 1)[1].strip(), []
+                self._reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(command.split(':', 1)[1].strip())
+                self._reply('250 OK')
+            elif verb == 'DATA':
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data in (b'.\r\n', b'.\n'):
+                        break
+                    lines.append(data[1:] if data.startswith(b'..') else data)
+                server.record(sender, recipients, b''.join(lines))
+                sender, recipients = None, []
+                self._reply('250 OK')
+            elif verb in ('RSET', 'NOOP'):
+                if verb == 'RSET':
+                    sender, recipients = None, []
+                self._reply('250 OK')
+            elif verb == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('502 Command not implemented')
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    """SMTP server v samostatném vlákně; messages obsahuje přijaté zprávy
+
+    connections počítá otevřená spojení (ověření, že dávka jde jedním
+    spojením), fail_commands umožní simulovat dočasné chyby serveru.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0, verbose=False):
+        super().__init__((host, port), _SMTPHandler)
+        self.verbose = verbose
+        self.messages = []
+        self.connections = 0
+        self.fail_commands = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def process_request(self, request, client_address):
+        with self._lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+    def record(self, sender, recipients, data):
+        with self._lock:
+            self.messages.append({'sender': sender, 'recipients': recipients, 'data': data})
+        if self.verbose:
+            print(f'--- {sender} -> {", ".join(recipients)}')
+            print(data.decode(errors='replace'))
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='smtp-stand-in', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Lokální SMTP server pro vývoj')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=1025)
+    args = parser.parse_args()
+    server = SMTPStandIn(args.host, args.port, verbose=True)
+    print(f'SMTP stand-in naslouchá na {args.host}:{server.port}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
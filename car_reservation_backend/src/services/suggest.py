@@ -0,0 +1,183 @@
+import bisect
+import re
+import threading
+import time
+import unicodedata
+
+from flask import current_app
+
+from src.models.database import db
+from src.models.vehicle import Vehicle
+from src.models.app_user import AppUser
+
+
+def normalize(value):
+    """Malá písmena bez diakritiky a mezer ('Novák' -> 'novak', '1A2 3456' -> '1a23456')"""
+    value = unicodedata.normalize('NFKD', value or '')
+    value = ''.join(char for char in value if not unicodedata.combining(char))
+    return re.sub(r'\s+', '', value.lower())
+
+
+class PrefixIndex:
+    """Seřazené pole (klíč, id) s vyhledáním prefixu přes bisect
+
+    Jedna entita může mít více klíčů (např. jméno, příjmení, e-mail).
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._entries = {}
+        self._entry_keys = {}
+
+    def put(self, entry_id, keys, payload):
+        self.remove(entry_id)
+        keys = sorted({normalize(key) for key in keys if key} - {''})
+        for key in keys:
+            bisect.insort(self._keys, (key, entry_id))
+        self._entries[entry_id] = payload
+        self._entry_keys[entry_id] = keys
+
+    def remove(self, entry_id):
+        for key in self._entry_keys.pop(entry_id, []):
+            i = bisect.bisect_left(self._keys, (key, entry_id))
+            if i < len(self._keys) and self._keys[i] == (key, entry_id):
+                del self._keys[i]
+        self._entries.pop(entry_id, None)
+
+    def search(self, prefix, limit):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        found = {}
+        i = bisect.bisect_left(self._keys, (prefix,))
+        while i < len(self._keys) and len(found) < limit:
+            key, entry_id = self._keys[i]
+            if not key.startswith(prefix):
+                break
+            found.setdefault(entry_id, self._entries[entry_id])
+            i += 1
+        return list(found.values())
+
+
+def vehicle_keys(vehicle):
+    return [vehicle.license_plate]
+
+
+def vehicle_payload(vehicle):
+    return {
+        'vehicle_id': vehicle.vehicle_id,
+        'license_plate': vehicle.license_plate,
+        'make': vehicle.make,
+        'model': vehicle.model,
+        'status': vehicle.status
+    }
+
+
+def user_keys(user):
+    return [
+        user.intranet_id,
+        user.first_name,
+        user.last_name,
+        f'{user.first_name} {user.last_name}',
+        f'{user.last_name} {user.first_name}',
+        user.email,
+    ]
+
+
+def user_payload(user):
+    return {
+        'user_id': user.user_id,
+        'intranet_id': user.intranet_id,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'email': user.email
+    }
+
+
+class SuggestIndex:
+    """Indexy pro našeptávání SPZ a uživatelů v paměti workeru
+
+    Zápisové endpointy index aktualizují okamžitě; změny provedené jinými
+    workery se projeví nejpozději po refresh_seconds díky levné kontrole
+    počtu a max(updated_at) v tabulkách.
+    """
+
+    def __init__(self, refresh_seconds=30):
+        self.refresh_seconds = refresh_seconds
+        self.vehicles = PrefixIndex()
+        self.users = PrefixIndex()
+        self._lock = threading.Lock()
+        self._signature = None
+        self._checked_at = 0.0
+
+    def _current_signature(self):
+        return tuple(
+            tuple(db.session.query(db.func.count(), db.func.max(model.updated_at)).one())
+            for model in (Vehicle, AppUser)
+        )
+
+    def rebuild(self):
+        vehicles = PrefixIndex()
+        for vehicle in Vehicle.query.filter(Vehicle.status != 'Archived').all():
+            vehicles.put(vehicle.vehicle_id, vehicle_keys(vehicle), vehicle_payload(vehicle))
+
+        users = PrefixIndex()
+        for user in AppUser.query.filter_by(is_active=True).all():
+            users.put(user.user_id, user_keys(user), user_payload(user))
+
+        with self._lock:
+            self.vehicles, self.users = vehicles, users
+            self._signature = self._current_signature()
+            self._checked_at = time.monotonic()
+
+    def refresh_if_stale(self):
+        if time.monotonic() - self._checked_at < self.refresh_seconds:
+            return
+        self._checked_at = time.monotonic()
+        if self._current_signature() != self._signature:
+            self.rebuild()
+
+    def suggest(self, kind, prefix, limit):
+        with self._lock:
+            index = self.vehicles if kind == 'vehicles' else self.users
+            return index.search(prefix, limit)
+
+    def update_vehicle(self, vehicle):
+        with self._lock:
+            if vehicle.status == 'Archived':
+                self.vehicles.remove(vehicle.vehicle_id)
+            else:
+                self.vehicles.put(vehicle.vehicle_id, vehicle_keys(vehicle), vehicle_payload(vehicle))
+
+    def update_user(self, user):
+        with self._lock:
+            if user.is_active:
+                self.users.put(user.user_id, user_keys(user), user_payload(user))
+            else:
+                self.users.remove(user.user_id)
+
+
+def init_suggest(app):
+    """Sestavení indexu při startu aplikace (volat v kontextu aplikace)"""
+    index = SuggestIndex(refresh_seconds=app.config['SUGGEST_REFRESH_SECONDS'])
+    index.rebuild()
+    app.extensions['suggest'] = index
+
+
+def get_suggest_index():
+    return current_app.extensions.get('suggest')
+
+
+def index_vehicle(vehicle):
+    """Aktualizace indexu po zápisu vozidla"""
+    index = get_suggest_index()
+    if index:
+        index.update_vehicle(vehicle)
+
+
+def index_user(user):
+    """Aktualizace indexu po zápisu uživatele"""
+    index = get_suggest_index()
+    if index:
+        index.update_user(user)
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from src.models.database import db, RoutingSession
+from src.models.tombstone import Tombstone
+from src.models.vehicle import Vehicle
+from src.models.reservation import Reservation
+from src.models.service_record import ServiceRecord
+from src.models.damage_record import DamageRecord
+
+# Synchronizované entity: (typ pro tombstones, primární klíč, stavy znamenající odstranění)
+SYNCED = {
+    Vehicle: ('vehicle', 'vehicle_id', ('Archived',)),
+    Reservation: ('reservation', 'reservation_id', ('Cancelled',)),
+    ServiceRecord: ('service_record', 'service_id', ()),
+    DamageRecord: ('damage_record', 'damage_id', ()),
+}
+
+
+def _record_tombstones(session, flush_context):
+    rows = []
+    for instance in session.deleted:
+        if type(instance) in SYNCED:
+            entity_type, primary_key, _ = SYNCED[type(instance)]
+            rows.append({
+                'entity_type': entity_type,
+                'entity_id': getattr(instance, primary_key),
+                'deleted_at': datetime.utcnow()
+            })
+    if rows:
+        session.connection().execute(Tombstone.__table__.insert(), rows)
+
+
+def init_sync(app):
+    """Zápis tombstones při mazání synchronizovaných entit"""
+    if not event.contains(RoutingSession, 'after_flush', _record_tombstones):
+        event.listen(RoutingSession, 'after_flush', _record_tombstones)
+
+
+def ensure_sync_indexes():
+    """Indexy updated_at pro ?since= i v databázích vytvořených před jejich zavedením"""
+    for model in SYNCED:
+        for index in model.__table__.indexes:
+            if index.name.endswith('_updated_at'):
+                index.create(db.engine, checkfirst=True)
+
+
+def delta_response(model, filtered, scoped, since, lag_seconds):
+    """Rozdílová odpověď pro klienta, který drží lokální kopii seznamu
+
+    filtered je dotaz se všemi filtry endpointu, scoped jen s omezením
+    přístupu (např. vlastní rezervace). Změněné řádky, které filtrům
+    vyhovují, se vrátí celé; ostatní změněné řádky (zrušené, archivované,
+    nebo které z filtru vypadly) a smazané řádky se vrátí jako tombstones.
+
+    Nový watermark je o lag_seconds starší než čas dotazu, aby se zachytily
+    i transakce potvrzené se zpožděním a zpoždění read replik. Klient proto
+    může některé řádky dostat opakovaně a má je přepsat podle ID.
+    """
+    entity_type, primary_key, closed_statuses = SYNCED[model]
+    watermark = max(since, datetime.utcnow() - timedelta(seconds=lag_seconds))
+    key = getattr(model, primary_key)
+    changed = model.updated_at > since
+
+    items = []
+    for row in filtered.filter(changed).all():
+        if closed_statuses and row.status in closed_statuses:
+            continue
+        items.append(row)
+    live_ids = {getattr(row, primary_key) for row in items}
+
+    columns = [key, model.status] if closed_statuses else [key]
+    deleted = []
+    for row in scoped.filter(changed).with_entities(*columns).all():
+        if row[0] in live_ids:
+            continue
+        reason = row[1].lower() if closed_statuses and row[1] in closed_statuses else 'filtered'
+        deleted.append({'id': row[0], 'reason': reason})
+
+    tombstones = Tombstone.query.filter(
+        Tombstone.entity_type == entity_type,
+        Tombstone.deleted_at > since
+    ).order_by(Tombstone.deleted_at).all()
+    deleted.extend(tombstone.to_dict() for tombstone in tombstones)
+
+    return {
+        'items': [row.to_dict() for row in items],
+        'deleted': deleted,
+        'since': since.isoformat(),
+        'watermark': watermark.isoformat()
+    }
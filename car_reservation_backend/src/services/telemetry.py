@@ -0,0 +1,266 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import case, delete, func, or_, select, update
+
+from src.models.database import db, dialect_insert
+from src.models.vehicle import Vehicle
+from src.models.odometer_reading import OdometerReading
+
+logger = logging.getLogger(__name__)
+
+UPDATE_CHUNK_SIZE = 500
+COMPACT_INTERVAL = 3600
+BUCKETS = ('raw', 'day', 'week', 'month')
+
+
+def parse_timestamp(value):
+    """ISO čas -> naivní UTC (stejně jako ostatní sloupce DateTime)"""
+    parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+class IngestReport:
+    def __init__(self):
+        self.accepted = 0
+        self.duplicates = 0
+        self.updated_vehicles = 0
+        self.errors = []
+
+    def add_error(self, index, message):
+        self.errors.append({'index': index, 'error': message})
+
+    def to_dict(self):
+        return {
+            'accepted': self.accepted,
+            'duplicates': self.duplicates,
+            'updated_vehicles': self.updated_vehicles,
+            'failed': len(self.errors),
+            'errors': sorted(self.errors, key=lambda error: error['index'])
+        }
+
+
+def _parse_readings(readings, report):
+    parsed = []
+    for index, item in enumerate(readings):
+        if not isinstance(item, dict):
+            report.add_error(index, 'Reading must be an object')
+            continue
+        if 'vehicle_id' not in item and 'license_plate' not in item:
+            report.add_error(index, 'vehicle_id or license_plate is required')
+            continue
+        try:
+            odometer = int(item['odometer'])
+            recorded_at = parse_timestamp(item['recorded_at'])
+        except KeyError as e:
+            report.add_error(index, f'{e.args[0]} is required')
+            continue
+        except (TypeError, ValueError):
+            report.add_error(index, 'Invalid odometer or recorded_at. Use an integer and ISO datetime')
+            continue
+        if odometer < 0:
+            report.add_error(index, 'odometer must not be negative')
+            continue
+        parsed.append((index, item.get('vehicle_id'), item.get('license_plate'), odometer, recorded_at))
+    return parsed
+
+
+def ingest_odometer_readings(readings):
+    """Hromadné zpracování odečtů tachometru
+
+    Vše probíhá několika dotazy bez ohledu na počet odečtů: načtení vozidel
+    a posledních odečtů, jeden hromadný INSERT do historie a jeden UPDATE
+    vozidel přes CASE. Odečet se stejným (vozidlo, čas) jako již uložený je
+    duplicita, nikoli chyba, takže opakované odeslání dávky nic nezmění.
+    """
+    report = IngestReport()
+    parsed = _parse_readings(readings, report)
+    if not parsed:
+        return report
+
+    vehicle_ids = {vehicle_id for _, vehicle_id, _, _, _ in parsed if vehicle_id is not None}
+    plates = {plate for _, vehicle_id, plate, _, _ in parsed if vehicle_id is None}
+    vehicles = db.session.execute(
+        select(Vehicle.vehicle_id, Vehicle.license_plate, Vehicle.odometer_reading).where(
+            or_(Vehicle.vehicle_id.in_(list(vehicle_ids)), Vehicle.license_plate.in_(list(plates)))
+        )
+    ).all()
+    ids_by_plate = {plate: vehicle_id for vehicle_id, plate, _ in vehicles}
+    current = {vehicle_id: odometer for vehicle_id, _, odometer in vehicles}
+
+    resolved = []
+    for index, vehicle_id, plate, odometer, recorded_at in parsed:
+        vehicle_id = vehicle_id if vehicle_id is not None else ids_by_plate.get(plate)
+        if vehicle_id not in current:
+            report.add_error(index, 'Vehicle not found')
+            continue
+        resolved.append((vehicle_id, recorded_at, index, odometer))
+
+    if not resolved:
+        return report
+
+    # Poslední uložený odečet každého vozidla a odečty se shodným časem (duplicity)
+    ids = {vehicle_id for vehicle_id, _, _, _ in resolved}
+    latest = dict(db.session.execute(
+        select(OdometerReading.vehicle_id, func.max(OdometerReading.recorded_at))
+        .where(OdometerReading.vehicle_id.in_(list(ids)))
+        .group_by(OdometerReading.vehicle_id)
+    ).all())
+    existing = {
+        (vehicle_id, recorded_at): odometer
+        for vehicle_id, recorded_at, odometer in db.session.execute(
+            select(OdometerReading.vehicle_id, OdometerReading.recorded_at, OdometerReading.odometer).where(
+                OdometerReading.vehicle_id.in_(list(ids)),
+                OdometerReading.recorded_at.in_(list({recorded_at for _, recorded_at, _, _ in resolved}))
+            )
+        ).all()
+    }
+
+    accepted = []
+    final = {}
+    for vehicle_id, recorded_at, index, odometer in sorted(resolved, key=lambda r: (r[0], r[1], r[2])):
+        key = (vehicle_id, recorded_at)
+        if key in existing:
+            if existing[key] == odometer:
+                report.duplicates += 1
+            else:
+                report.add_error(index, 'A different reading for this vehicle and time already exists')
+            continue
+        if latest.get(vehicle_id) and recorded_at < latest[vehicle_id]:
+            report.add_error(index, 'Reading is older than the latest stored reading')
+            continue
+        if odometer < current[vehicle_id]:
+            report.add_error(index, 'Odometer reading goes backwards')
+            continue
+
+        accepted.append({'vehicle_id': vehicle_id, 'recorded_at': recorded_at, 'odometer': odometer})
+        existing[key] = odometer
+        latest[vehicle_id] = recorded_at
+        current[vehicle_id] = odometer
+        final[vehicle_id] = odometer
+
+    if accepted:
+        insert = dialect_insert(OdometerReading)
+        if insert is not None:
+            # Souběžně odeslaná stejná dávka nezpůsobí chybu unikátního omezení;
+            # přijaté jsou jen skutečně vložené řádky, zbytek vložil souběžný požadavek
+            statement = insert.on_conflict_do_nothing().returning(OdometerReading.reading_id)
+            inserted = len(db.session.execute(statement, accepted).all())
+        else:
+            db.session.add_all(OdometerReading(**values) for values in accepted)
+            db.session.flush()
+            inserted = len(accepted)
+        report.accepted = inserted
+        report.duplicates += len(accepted) - inserted
+
+    items = list(final.items())
+    for start in range(0, len(items), UPDATE_CHUNK_SIZE):
+        chunk = dict(items[start:start + UPDATE_CHUNK_SIZE])
+        new_value = case(chunk, value=Vehicle.vehicle_id)
+        result = db.session.execute(
+            update(Vehicle)
+            .where(Vehicle.vehicle_id.in_(list(chunk)), Vehicle.odometer_reading <= new_value)
+            .values(odometer_reading=new_value, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        report.updated_vehicles += result.rowcount
+
+    db.session.commit()
+    return report
+
+
+def compact_history(retention_days, window_days):
+    """Zhuštění odečtů starších než retention_days na poslední odečet dne
+
+    Zpracovává se jen okno window_days celých dní před hranicí retence;
+    starší dny byly zhuštěny dřívějšími běhy. Po zkrácení retence nebo
+    delší pauze v příjmu odečtů je potřeba okno dočasně zvětšit
+    (ODOMETER_COMPACT_WINDOW_DAYS). Vrací počet smazaných řádků.
+    """
+    cutoff = datetime.combine(datetime.utcnow().date() - timedelta(days=retention_days), datetime.min.time())
+    rows = db.session.execute(
+        select(OdometerReading.reading_id, OdometerReading.vehicle_id, OdometerReading.recorded_at)
+        .where(
+            OdometerReading.recorded_at >= cutoff - timedelta(days=window_days),
+            OdometerReading.recorded_at < cutoff
+        )
+        .order_by(OdometerReading.vehicle_id, OdometerReading.recorded_at)
+    ).all()
+
+    # Řádek se maže, pokud po něm následuje odečet téhož vozidla ze stejného dne
+    obsolete = [
+        reading_id
+        for (reading_id, vehicle_id, recorded_at), following in zip(rows, rows[1:])
+        if following.vehicle_id == vehicle_id and following.recorded_at.date() == recorded_at.date()
+    ]
+    for start in range(0, len(obsolete), UPDATE_CHUNK_SIZE):
+        db.session.execute(delete(OdometerReading).where(
+            OdometerReading.reading_id.in_(obsolete[start:start + UPDATE_CHUNK_SIZE])
+        ))
+    db.session.commit()
+    return len(obsolete)
+
+
+_compacted_at = 0.0
+_compact_lock = threading.Lock()
+
+
+def compact_history_if_due(retention_days, window_days):
+    """Zhuštění historie nejvýše jednou za COMPACT_INTERVAL v každém workeru"""
+    global _compacted_at
+    with _compact_lock:
+        if time.monotonic() - _compacted_at < COMPACT_INTERVAL:
+            return
+        _compacted_at = time.monotonic()
+    try:
+        removed = compact_history(retention_days, window_days)
+        if removed:
+            logger.info('Zhuštěno %d starých odečtů tachometru', removed)
+    except Exception as e:
+        db.session.rollback()
+        logger.warning('Zhuštění historie tachometru selhalo: %s', e)
+
+
+def _bucket_start(recorded_at, bucket):
+    day = recorded_at.date()
+    if bucket == 'day':
+        return day
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def odometer_history(vehicle_id, start, end, bucket='day'):
+    """Vývoj tachometru vozidla, u bucket != 'raw' poslední odečet za den/týden/měsíc"""
+    readings = db.session.execute(
+        select(OdometerReading.recorded_at, OdometerReading.odometer)
+        .where(
+            OdometerReading.vehicle_id == vehicle_id,
+            OdometerReading.recorded_at >= start,
+            OdometerReading.recorded_at < end
+        )
+        .order_by(OdometerReading.recorded_at)
+    ).all()
+
+    if bucket == 'raw':
+        return [{'recorded_at': recorded_at.isoformat(), 'odometer': odometer} for recorded_at, odometer in readings]
+
+    points = {}
+    for recorded_at, odometer in readings:
+        points[_bucket_start(recorded_at, bucket)] = (recorded_at, odometer)
+
+    history = []
+    previous = None
+    for bucket_start, (recorded_at, odometer) in points.items():
+        history.append({
+            'bucket': bucket_start.isoformat(),
+            'recorded_at': recorded_at.isoformat(),
+            'odometer': odometer,
+            'distance': odometer - previous if previous is not None else None
+        })
+        previous = odometer
+    return history
@@ -0,0 +1,238 @@
+import logging
+from datetime import datetime
+
+from sqlalchemy import event, inspect, or_, select
+
+from src.models.database import db, RoutingSession
+from src.models.app_user import AppUser
+from src.models.reservation import Reservation
+from src.models.vehicle import Vehicle
+from src.models.waitlist_entry import WaitlistEntry
+from src.services.locations import location_vehicles
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = 'waitlist_pending'
+FREED_KEY = 'waitlist_freed'
+# Kolik čekatelů se nejvýše zkouší pro jedno uvolněné okno
+MATCH_LIMIT = 50
+
+
+def _old_value(state, name):
+    history = state.attrs[name].history
+    return (history.deleted or history.unchanged or [None])[0]
+
+
+def _collect_freed(session, flush_context):
+    """Uvolněná kapacita jako (vehicle_id, od, do); None znamená bez omezení"""
+    freed = []
+    for instance in session.dirty:
+        state = inspect(instance)
+        if isinstance(instance, Reservation) and session.is_modified(instance):
+            if _old_value(state, 'status') != 'Confirmed':
+                continue
+            changed = any(state.attrs[name].history.has_changes() for name in ('status', 'start_time', 'end_time', 'vehicle_id'))
+            if changed:
+                # Zrušení, zkrácení i přesun uvolní původní termín; co zůstalo obsazené, pozná is_available
+                freed.append((_old_value(state, 'vehicle_id'), _old_value(state, 'start_time'), _old_value(state, 'end_time')))
+        elif isinstance(instance, Vehicle):
+            if instance.status == 'Active' and state.attrs.status.history.has_changes():
+                freed.append((instance.vehicle_id, None, None))
+            elif state.attrs.next_service_date.history.has_changes() and _old_value(state, 'next_service_date'):
+                freed.append((instance.vehicle_id, None, None))
+    for instance in session.deleted:
+        if isinstance(instance, Reservation) and _old_value(inspect(instance), 'status') == 'Confirmed':
+            freed.append((instance.vehicle_id, instance.start_time, instance.end_time))
+    if freed:
+        session.info.setdefault(PENDING_KEY, []).extend(freed)
+
+
+def _confirm_freed(session):
+    # Párovat se smí jen kapacita, jejíž uvolnění bylo skutečně potvrzeno
+    freed = session.info.pop(PENDING_KEY, None)
+    if freed:
+        session.info.setdefault(FREED_KEY, []).extend(freed)
+
+
+def _discard_freed(session, previous_transaction=None):
+    session.info.pop(PENDING_KEY, None)
+
+
+def _naive(value):
+    return value.replace(tzinfo=None) if value is not None else None
+
+
+def _eligible(vehicle):
+    """Čekatelé, jejichž požadavky vozidlo splňuje
+
+    Vozidlo pobočky dostanou jen čekatelé téže pobočky a bez pobočky (stejně
+    jako výchozí seznam vozidel), pokud o konkrétní vozidlo výslovně nežádali.
+    """
+    conditions = (
+        or_(WaitlistEntry.vehicle_id.is_(None), WaitlistEntry.vehicle_id == vehicle.vehicle_id),
+        or_(WaitlistEntry.fuel_type.is_(None), WaitlistEntry.fuel_type == vehicle.fuel_type),
+        or_(WaitlistEntry.transmission_type.is_(None), WaitlistEntry.transmission_type == vehicle.transmission_type),
+        or_(WaitlistEntry.number_of_passengers.is_(None), WaitlistEntry.number_of_passengers <= vehicle.seating_capacity),
+    )
+    if vehicle.location_id is None:
+        return conditions
+    local_users = select(AppUser.user_id).where(
+        or_(AppUser.location_id.is_(None), AppUser.location_id == vehicle.location_id)
+    )
+    return (*conditions, or_(WaitlistEntry.vehicle_id == vehicle.vehicle_id, WaitlistEntry.user_id.in_(local_users)))
+
+
+def _has_overlapping_reservation(entry):
+    """Zda už má čekatel na svůj termín jinou potvrzenou rezervaci"""
+    return db.session.query(Reservation.query.filter(
+        Reservation.user_id == entry.user_id,
+        Reservation.status == 'Confirmed',
+        Reservation.start_time < entry.end_time,
+        Reservation.end_time > entry.start_time
+    ).exists()).scalar()
+
+
+def _assign(entry, vehicle, now):
+    """Rezervace pro čekatele; podmíněný UPDATE zabrání dvojímu přidělení z více workerů
+
+    Čekatel, který si mezitím termín zarezervoval jinak, se přeskočí a zůstane
+    v pořadníku (pokud tu rezervaci zruší, může ještě dostat vozidlo).
+    """
+    if _has_overlapping_reservation(entry):
+        return None
+    claimed = WaitlistEntry.query.filter_by(waitlist_id=entry.waitlist_id, status='Waiting').update(
+        {'status': 'Assigned', 'assigned_at': now, 'updated_at': now}, synchronize_session=False
+    )
+    if not claimed:
+        return None
+    reservation = Reservation(
+        vehicle_id=vehicle.vehicle_id,
+        user_id=entry.user_id,
+        start_time=entry.start_time,
+        end_time=entry.end_time,
+        purpose=entry.purpose,
+        destination=entry.destination,
+        number_of_passengers=entry.number_of_passengers,
+        user_notes=entry.user_notes
+    )
+    db.session.add(reservation)
+    db.session.flush()
+    WaitlistEntry.query.filter_by(waitlist_id=entry.waitlist_id).update(
+        {'reservation_id': reservation.reservation_id}, synchronize_session=False
+    )
+    db.session.expire(entry)
+    return reservation
+
+
+def match_window(vehicle, start, end, now=None):
+    """Přidělení uvolněného okna vozidla čekatelům v pořadí zápisu
+
+    Kandidáti se hledají indexem (status, start_time, end_time) jen mezi
+    čekateli, jejichž termín okno překrývá; celý jejich termín pak ověří
+    Vehicle.is_available.
+    """
+    now = now or datetime.utcnow()
+    if vehicle is None or vehicle.status != 'Active':
+        return []
+    query = WaitlistEntry.query.filter(WaitlistEntry.status == 'Waiting', WaitlistEntry.start_time > now, *_eligible(vehicle))
+    if end is not None:
+        query = query.filter(WaitlistEntry.start_time < _naive(end))
+    if start is not None:
+        query = query.filter(WaitlistEntry.end_time > _naive(start))
+
+    assigned = []
+    for entry in query.order_by(WaitlistEntry.created_at, WaitlistEntry.waitlist_id).limit(MATCH_LIMIT).all():
+        if vehicle.is_available(entry.start_time, entry.end_time):
+            reservation = _assign(entry, vehicle, now)
+            if reservation is not None:
+                assigned.append(reservation)
+    return assigned
+
+
+def match_entry(entry, now=None):
+    """Okamžité přidělení nově zapsanému čekateli, pokud už je vhodné vozidlo volné"""
+    now = now or datetime.utcnow()
+    query = Vehicle.query.filter(Vehicle.status == 'Active')
+    if entry.vehicle_id:
+        query = query.filter(Vehicle.vehicle_id == entry.vehicle_id)
+    else:
+        # Jen vozidla domovské pobočky čekatele a sdílená (viz _eligible)
+        location_id = db.session.scalar(select(AppUser.location_id).where(AppUser.user_id == entry.user_id))
+        if location_id is not None:
+            query = query.filter(location_vehicles(location_id))
+    if entry.fuel_type:
+        query = query.filter(Vehicle.fuel_type == entry.fuel_type)
+    if entry.transmission_type:
+        query = query.filter(Vehicle.transmission_type == entry.transmission_type)
+    if entry.number_of_passengers:
+        query = query.filter(Vehicle.seating_capacity >= entry.number_of_passengers)
+    for vehicle in query.order_by(Vehicle.vehicle_id).all():
+        if vehicle.is_available(entry.start_time, entry.end_time):
+            return _assign(entry, vehicle, now)
+    return None
+
+
+def match_freed_capacity(freed, now=None):
+    """Přidělení všech uvolněných oken; commit provádí tato funkce"""
+    windows = {}
+    for vehicle_id, start, end in freed:
+        if vehicle_id is None:
+            continue
+        # Okna téhož vozidla stačí projít jednou jako jejich obálku
+        current = windows.get(vehicle_id)
+        if current is None:
+            windows[vehicle_id] = (start, end)
+        else:
+            windows[vehicle_id] = (
+                None if start is None or current[0] is None else min(_naive(start), _naive(current[0])),
+                None if end is None or current[1] is None else max(_naive(end), _naive(current[1]))
+            )
+
+    assigned = []
+    for vehicle_id, (start, end) in windows.items():
+        assigned.extend(match_window(db.session.get(Vehicle, vehicle_id), start, end, now))
+    db.session.commit()
+    return assigned
+
+
+def expire_entries(now=None):
+    """Čekatelé, jejichž termín už začal, přejdou do stavu Expired"""
+    now = now or datetime.utcnow()
+    expired = WaitlistEntry.query.filter(
+        WaitlistEntry.status == 'Waiting', WaitlistEntry.start_time <= now
+    ).update({'status': 'Expired', 'updated_at': now}, synchronize_session=False)
+    db.session.commit()
+    return expired
+
+
+def init_waitlist(app):
+    """Párování čekatelů s uvolněnou kapacitou po potvrzení změny"""
+    for name, listener in (
+        ('after_flush', _collect_freed),
+        ('after_commit', _confirm_freed),
+        ('after_rollback', _discard_freed),
+        ('after_soft_rollback', _discard_freed),
+    ):
+        if not event.contains(RoutingSession, name, listener):
+            event.listen(RoutingSession, name, listener)
+
+    @app.after_request
+    def match_waitlist(response):
+        freed = db.session.info.pop(FREED_KEY, None)
+        if freed:
+            try:
+                assigned = match_freed_capacity(freed)
+                if assigned:
+                    logger.info('Z pořadníku přiděleno %d rezervací', len(assigned))
+            except Exception as e:
+                db.session.rollback()
+                logger.warning('Párování pořadníku selhalo: %s', e)
+        return response
+
+    @app.cli.command('match-waitlist')
+    def match_waitlist_command():
+        """Vypršení starých čekatelů a párování s volnými vozidly (flask --app src.main match-waitlist)"""
+        expired = expire_entries()
+        vehicles = Vehicle.query.filter(Vehicle.status == 'Active').all()
+        assigned = match_freed_capacity([(vehicle.vehicle_id, None, None) for vehicle in vehicles])
+        print(f'Vypršelo {expired} čekatelů, přiděleno {len(assigned)} rezervací')